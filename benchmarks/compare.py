@@ -0,0 +1,58 @@
+# =======================================================
+# benchmarks/compare.py
+# Compare two run_benchmarks.py JSON files stage by stage.
+#
+# Usage:
+#   python -m benchmarks.compare base.json new.json [--threshold 1.10]
+# Exit code 1 when any stage is slower than threshold x base (regression).
+# =======================================================
+
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {r["stage"]: r for r in report["results"]}
+
+
+def compare(base, new, threshold=1.10):
+    """Rows of (stage, base_s, new_s, speedup, base_mb, new_mb, regression) for stages in both runs."""
+    rows = []
+    for stage, b in base.items():
+        n = new.get(stage)
+        if n is None:
+            continue
+        ratio = n["best_s"] / b["best_s"] if b["best_s"] > 0 else float("inf")
+        rows.append((stage, b["best_s"], n["best_s"], 1.0 / ratio if ratio else float("inf"),
+                     b["peak_mb"], n["peak_mb"], ratio > threshold))
+    return rows
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=1.10,
+                   help="new/base time ratio above which a stage counts as a regression")
+    args = p.parse_args(argv)
+
+    base_report, base = load_results(args.base)
+    new_report, new = load_results(args.new)
+    if base_report["config"] != new_report["config"]:
+        print("[WARN] benchmark configs differ; timings are not directly comparable", file=sys.stderr)
+
+    print(f"base: {base_report['meta'].get('commit')}  new: {new_report['meta'].get('commit')}")
+    print(f"{'stage':45s} {'base ms':>10s} {'new ms':>10s} {'speedup':>8s} {'base MB':>8s} {'new MB':>8s}")
+    rows = compare(base, new, args.threshold)
+    for stage, b, n, speedup, bmb, nmb, slow in rows:
+        flag = "  <-- regression" if slow else ""
+        print(f"{stage:45s} {b * 1e3:10.2f} {n * 1e3:10.2f} {speedup:7.2f}x {bmb:8.1f} {nmb:8.1f}{flag}")
+
+    return 1 if any(r[-1] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
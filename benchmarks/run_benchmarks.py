@@ -0,0 +1,271 @@
+# =======================================================
+# benchmarks/run_benchmarks.py
+# Benchmark harness for the derating and climate extraction hot paths.
+# Every stage is timed (best / median of --repeat runs) and its peak
+# traced memory is recorded with tracemalloc. Results are written as JSON
+# so runs from different commits can be compared with benchmarks/compare.py.
+# Stages that need an API a tree does not have yet (array kernels, batch
+# and closed-form engine paths, percentiles, ...) are detected and listed
+# under "skipped", so the same harness runs on old and new trees.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.run_benchmarks --plants 2000 --assets 5000 \
+#       --scenarios 1000 --list-len 120 --out bench_$(git rev-parse --short HEAD).json
+# =======================================================
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_inputs
+from source_ema import ema_derating_calculator as calculator
+from source_ema import f_derating_registry as registry
+from source_ema.ema_climate_extractor import ClimateExtractor
+from source_ema.ema_derating_calculator import DeratingEngine
+
+
+# -------------------------------------
+# TIMING
+# -------------------------------------
+
+def measure(fn, repeat=3, setup=None):
+    """
+    Run fn() `repeat` times; return (last result, stats dict).
+    setup: optional callable whose result is passed to fn; it runs before
+    every call and is neither timed nor traced (e.g. a fresh extractor).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        t0 = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - t0)
+
+    # peak memory from one extra traced run (tracing slows the code down)
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "repeat": repeat,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def _accepts(fn, name):
+    """True if callable fn takes a keyword argument `name` (older trees may not)."""
+    try:
+        return name in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -------------------------------------
+# STAGES
+# -------------------------------------
+
+def bench_registry(results, skipped, n_values, repeat):
+    """Every registry function on one list of n_values temperatures (list API and, if present, array kernel)."""
+    T = np.random.default_rng(0).uniform(20, 45, n_values)
+    T_list = T.tolist()
+    wind = np.full(n_values, 1.0)
+    kernels = getattr(registry, "ARRAY_DERATING_FUNCTIONS", {})
+
+    for name, fn in registry.DERATING_FUNCTIONS.items():
+        if name == "transmission_derating":
+            args, args_arr = (wind.tolist(), T_list, 28.0), (wind, T, 28.0)
+        elif name == "gas_derating":
+            args, args_arr = (T_list, 100.0, registry.GLOBAL_ALPHA), (T, 100.0, registry.GLOBAL_ALPHA)
+        else:
+            args, args_arr = (T_list, 100.0), (T, 100.0)
+
+        _, stats = measure(functools.partial(fn, *args), repeat)
+        results.append({"stage": f"registry.{name}", "rows": n_values, **stats})
+
+        if name not in kernels:
+            skipped.append(f"registry.{name}_array")
+            continue
+        _, stats = measure(functools.partial(kernels[name], *args_arr), repeat)
+        results.append({"stage": f"registry.{name}_array", "rows": n_values, **stats})
+
+
+def bench_engine(results, skipped, fleet_csv, n_scenarios, repeat):
+    """DeratingEngine: load, apply_derating loop, summarize and, if present, evaluate / batch / loss curve."""
+    eng, stats = measure(lambda: DeratingEngine(fleet_csv), repeat)
+    n_plants = len(eng.df)
+    results.append({"stage": "engine.load", "rows": n_plants, **stats})
+
+    T = np.random.default_rng(1).uniform(22.93, 38.91, n_scenarios)
+
+    def loop():
+        out = []
+        for t in T:
+            eng.apply_derating(t)
+            out.append(eng.summarize())
+        return out
+
+    _, stats = measure(loop, repeat)
+    results.append({"stage": "engine.apply_derating+summarize", "rows": n_scenarios, **stats})
+
+    eng.apply_derating(T[0])
+    _, stats = measure(eng.summarize, repeat)
+    results.append({"stage": "engine.summarize", "rows": n_plants, **stats})
+
+    if hasattr(eng, "evaluate"):
+        _, stats = measure(lambda: [eng.evaluate(t) for t in T], repeat)
+        results.append({"stage": "engine.evaluate", "rows": n_scenarios, **stats})
+    else:
+        skipped.append("engine.evaluate")
+
+    if hasattr(eng, "apply_derating_batch"):
+        _, stats = measure(lambda: eng.apply_derating_batch(T), repeat)
+        results.append({"stage": "engine.apply_derating_batch", "rows": n_scenarios, **stats})
+    else:
+        skipped.append("engine.apply_derating_batch")
+
+    loss_curve = getattr(calculator, "LossCurve", None)
+    if loss_curve is not None and hasattr(eng, "plants"):
+        # a new curve every run, so the closed-form build is part of the timing
+        _, stats = measure(lambda: loss_curve(eng.plants).loss_mw(T), repeat)
+        results.append({"stage": "engine.loss_curve", "rows": n_scenarios, **stats})
+    else:
+        skipped.append("engine.loss_curve")
+
+
+def bench_climate(results, skipped, overlay_csv, n_assets, repeat):
+    """ClimateExtractor: load + decode, compute_minmax and, if present, percentiles / batched national T."""
+    ext, stats = measure(lambda: ClimateExtractor(overlay_csv), repeat)
+    results.append({"stage": "climate.load", "rows": n_assets, **stats})
+
+    # every run reduces a freshly loaded extractor (loading is not timed)
+    new_extractor = functools.partial(ClimateExtractor, overlay_csv)
+    _, stats = measure(lambda e: e.compute_minmax(), repeat, setup=new_extractor)
+    results.append({"stage": "climate.compute_minmax", "rows": n_assets, **stats})
+
+    # decoding moved from compute_minmax into load on newer trees; time both together
+    # so the end-to-end cost compares across trees
+    _, stats = measure(lambda: ClimateExtractor(overlay_csv).compute_minmax(), repeat)
+    results.append({"stage": "climate.load+compute_minmax", "rows": n_assets, **stats})
+
+    if _accepts(ext.compute_minmax, "percentiles"):
+        _, stats = measure(lambda e: e.compute_minmax(percentiles=[90, 99]), repeat, setup=new_extractor)
+        results.append({"stage": "climate.compute_minmax_percentiles", "rows": n_assets, **stats})
+    else:
+        skipped.append("climate.compute_minmax_percentiles")
+
+    ext.compute_minmax()
+    _, stats = measure(lambda: ext.compute_national_temperature("85_2051_2060"), repeat)
+    results.append({"stage": "climate.compute_national_temperature", "rows": len(ext.provs), **stats})
+
+    if hasattr(ext, "compute_national_temperatures"):
+        _, stats = measure(ext.compute_national_temperatures, repeat)
+        results.append({"stage": "climate.compute_national_temperatures", "rows": len(ext.provs), **stats})
+    else:
+        skipped.append("climate.compute_national_temperatures")
+
+
+# -------------------------------------
+# MAIN
+# -------------------------------------
+
+def run(args):
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "workdir")}
+    results, skipped = [], []
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ema_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        fleet_csv, overlay_csv = write_inputs(workdir, args.plants, args.assets, args.provinces,
+                                              args.columns, args.list_len, args.seed)
+
+        stages = set(args.stages)
+        if "registry" in stages:
+            bench_registry(results, skipped, args.registry_values, args.repeat)
+        if "engine" in stages:
+            bench_engine(results, skipped, fleet_csv, args.scenarios, args.repeat)
+        if "climate" in stages:
+            bench_climate(results, skipped, overlay_csv, args.assets, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": config,
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the derating and climate extraction hot paths.")
+    p.add_argument("--plants", type=int, default=2000, help="plants in the synthetic RUKN fleet")
+    p.add_argument("--assets", type=int, default=2000, help="rows in the synthetic overlay csv")
+    p.add_argument("--provinces", type=int, default=38)
+    p.add_argument("--columns", type=int, default=10, help="tasmax list columns in the overlay")
+    p.add_argument("--list-len", type=int, default=120, help="items per CMIP list cell")
+    p.add_argument("--scenarios", type=int, default=1000, help="T_nat values per engine stage")
+    p.add_argument("--registry-values", type=int, default=100_000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--stages", nargs="+", default=["registry", "engine", "climate"],
+                   choices=["registry", "engine", "climate"])
+    p.add_argument("--workdir", default=None, help="where synthetic csv files are written")
+    p.add_argument("--out", default=None, help="JSON output file (default: stdout)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"[OK] Saved benchmark results to: {args.out}")
+    else:
+        print(text)
+
+    for r in report["results"]:
+        print(f"{r['stage']:45s} {r['best_s'] * 1e3:10.2f} ms  {r['peak_mb']:8.1f} MB", file=sys.stderr)
+    if report["skipped"]:
+        print(f"skipped (API not in this tree): {', '.join(report['skipped'])}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# =======================================================
+# benchmarks/synthetic.py
+# Synthetic inputs of configurable size for the benchmark harness:
+#   - RUKN-style fleet csv   (Nama, jenis, kategori, daya_mw, Area)
+#   - asset overlay csv      (Nama, jenis, daya_mw, provinsi + tasmax list columns)
+# Column names follow the real overlay so ColumnIndex resolves them.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+
+from source.region_maps import get_ordered_provinces
+
+
+# jenis codes covering every mapped law plus unaffected technologies
+JENIS = ["PLTU", "PLTU MT", "PLTG", "PLTGU", "PLTMG", "PLTD", "PLTS", "PLTS+BESS",
+         "PLTN", "PLTBm", "PLTBg", "PLTA", "PLTB", "PLTP"]
+
+# (column name, list length factor) per window; factor 1.0 = list_len items
+OVERLAY_COLUMNS = [
+    ("tasmax_rcp45_203101-204012", 1.0),
+    ("tasmax_rcp85_203101-204012", 1.0),
+    ("tasmax_rcp45_205101-206012", 1.0),
+    ("tasmax_rcp85_205101-206012", 1.0),
+    ("tasmax_rcp45_202401-202412", 0.1),
+    ("tasmax_rcp85_202401-202412", 0.1),
+    ("tmax_ERA5_2024", 0.1),
+    ("tmax_ERA5_2020", 0.1),
+    ("tmax_ERA5_2010", 0.1),
+    ("tmax_ERA5_2000", 0.1),
+]
+
+
+def synthetic_fleet(n_plants, seed=0):
+    """RUKN-style fleet dataframe with n_plants rows."""
+    rng = np.random.default_rng(seed)
+    jenis = rng.choice(JENIS, size=n_plants)
+    return pd.DataFrame({
+        "Nama": [f"PLANT_{i:06d}" for i in range(n_plants)],
+        "jenis": jenis,
+        "kategori": "synthetic",
+        "daya_mw": np.round(rng.lognormal(4.0, 1.2, size=n_plants), 1),
+        "Area": "INDONESIA",
+    })
+
+
+def synthetic_overlay(n_assets, n_provinces=38, n_columns=len(OVERLAY_COLUMNS), list_len=120, seed=0):
+    """
+    Asset overlay dataframe with stringified tasmax lists, like the real
+    ClimateExtractor input. The first n_columns entries of OVERLAY_COLUMNS are used
+    (more than that repeats the ERA5 years further back).
+    """
+    rng = np.random.default_rng(seed)
+    provs = list(dict.fromkeys(get_ordered_provinces()))
+    provs = [provs[i] if i < len(provs) else f"PROVINSI {i}" for i in range(n_provinces)]
+
+    columns = list(OVERLAY_COLUMNS[:n_columns])
+    for k in range(len(columns), n_columns):
+        columns.append((f"tmax_ERA5_{1999 - k}", 0.1))
+
+    df = pd.DataFrame({
+        "Nama": [f"ASSET_{i:06d}" for i in range(n_assets)],
+        "jenis": rng.choice(JENIS, size=n_assets),
+        "daya_mw": np.round(rng.lognormal(3.0, 1.2, size=n_assets), 1),
+        "provinsi": rng.choice(provs, size=n_assets),
+    })
+
+    base = rng.normal(31.0, 2.0, size=n_assets)
+    for name, factor in columns:
+        n_items = max(1, int(round(list_len * factor)))
+        values = np.round(base[:, None] + rng.normal(0.0, 1.5, size=(n_assets, n_items)), 2)
+        df[name] = ["[" + ", ".join(map(str, row)) + "]" for row in values.tolist()]
+    return df
+
+
+def write_inputs(workdir, n_plants, n_assets, n_provinces, n_columns, list_len, seed=0):
+    """Write both csv files into workdir; return (fleet_csv, overlay_csv)."""
+    fleet_csv = f"{workdir}/fleet.csv"
+    overlay_csv = f"{workdir}/overlay.csv"
+    synthetic_fleet(n_plants, seed).to_csv(fleet_csv, index=False)
+    synthetic_overlay(n_assets, n_provinces, n_columns, list_len, seed).to_csv(overlay_csv, index=False)
+    return fleet_csv, overlay_csv
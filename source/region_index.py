@@ -0,0 +1,192 @@
+# source/region_index.py
+# Compiled, integer-coded view of region_maps.py.
+# - every province name (and known alias) -> one integer code
+# - per hierarchy level: province code -> group code array
+# - any per-province array rolls up to a level with one bincount
+#   (or one sparse matmul when scipy is installed)
+
+import warnings
+
+import numpy as np
+
+from source.region_maps import (
+    ISLAND_MAP,
+    ISLAND_MEASURE_SYSTEM_MAP,
+    PROVINCE_TO_SYSTEM_MEASURE,
+    SYSTEM_MAP,
+    get_ordered_provinces,
+)
+
+# Alternative spellings -> canonical province name (after normalize_name)
+PROVINCE_ALIASES = {
+    "DI YOGYAKARTA": "DAERAH ISTIMEWA YOGYAKARTA",
+    "D.I. YOGYAKARTA": "DAERAH ISTIMEWA YOGYAKARTA",
+    "DIY": "DAERAH ISTIMEWA YOGYAKARTA",
+    "YOGYAKARTA": "DAERAH ISTIMEWA YOGYAKARTA",
+    "JAKARTA": "DKI JAKARTA",
+    "DKI": "DKI JAKARTA",
+    "KEPRI": "KEPULAUAN RIAU",
+    "KEP. RIAU": "KEPULAUAN RIAU",
+    "BABEL": "BANGKA BELITUNG",
+    "KEPULAUAN BANGKA BELITUNG": "BANGKA BELITUNG",
+    "NAD": "ACEH",
+    "NANGGROE ACEH DARUSSALAM": "ACEH",
+}
+
+# Hierarchy levels compiled by RegionIndex
+LEVELS = ("system", "island", "measure", "measure_system")
+
+
+def normalize_name(name):
+    """Upper-case, trimmed, single-spaced province name."""
+    return " ".join(str(name).upper().split())
+
+
+def _level_maps():
+    """level -> {canonical province: group name}."""
+    measure_parent = {m: parent for parent, ms in ISLAND_MEASURE_SYSTEM_MAP.items() for m in ms}
+    return {
+        "system": {p: s for s, provs in SYSTEM_MAP.items() for p in provs},
+        "island": {p: isl for isl, provs in ISLAND_MAP.items() for p in provs},
+        "measure": dict(PROVINCE_TO_SYSTEM_MEASURE),
+        "measure_system": {p: measure_parent[m] for p, m in PROVINCE_TO_SYSTEM_MEASURE.items()
+                           if m in measure_parent},
+    }
+
+
+def _level_groups():
+    """level -> ordered group names (map order of region_maps)."""
+    measures = list(dict.fromkeys(m for ms in ISLAND_MEASURE_SYSTEM_MAP.values() for m in ms))
+    measures += [m for m in dict.fromkeys(PROVINCE_TO_SYSTEM_MEASURE.values()) if m not in measures]
+    return {
+        "system": list(SYSTEM_MAP),
+        "island": list(ISLAND_MAP),
+        "measure": measures,
+        "measure_system": list(ISLAND_MEASURE_SYSTEM_MAP),
+    }
+
+
+class RegionIndex:
+    """
+    Integer-coded province hierarchy.
+
+        idx = get_region_index()
+        codes = idx.codes(df["provinsi"])                   # -1 = unknown province
+        idx.aggregate(per_province, "system")               # (..., n_provinces) -> (..., n_systems)
+        idx.aggregate_by_name(daya_mw, df["provinsi"], "island")
+    """
+
+    def __init__(self, aliases=None, warn=True):
+        self.aliases = {normalize_name(k): normalize_name(v) for k, v in (aliases or PROVINCE_ALIASES).items()}
+        maps = {lvl: {self.canonical(p): g for p, g in m.items()} for lvl, m in _level_maps().items()}
+
+        # canonical provinces: SYSTEM_MAP order first, then any only named in other maps
+        names = [self.canonical(p) for p in get_ordered_provinces()]
+        for m in maps.values():
+            names.extend(m)
+        self.provinces = list(dict.fromkeys(names))
+        self._code = {p: i for i, p in enumerate(self.provinces)}
+        for alias, canon in self.aliases.items():
+            if canon in self._code:
+                self._code.setdefault(alias, self._code[canon])
+
+        self.groups = _level_groups()
+        self.parent = {}
+        self.unmapped = {}
+        for lvl in LEVELS:
+            pos = {g: i for i, g in enumerate(self.groups[lvl])}
+            self.parent[lvl] = np.array([pos.get(maps[lvl].get(p), -1) for p in self.provinces], dtype=np.int64)
+            self.unmapped[lvl] = [p for p, g in zip(self.provinces, self.parent[lvl]) if g < 0]
+
+        # one warning for all levels; the warnings registry shows a given message once
+        missing = {lvl: self.unmapped[lvl] for lvl in LEVELS if self.unmapped[lvl]}
+        if warn and missing:
+            detail = "; ".join(f"'{lvl}': {provs}" for lvl, provs in missing.items())
+            warnings.warn(f"provinces without a group at some levels: {detail}", stacklevel=2)
+
+    # ---------------------------
+    # NAMES -> CODES
+    # ---------------------------
+
+    def canonical(self, name):
+        n = normalize_name(name)
+        return self.aliases.get(n, n)
+
+    def code(self, name):
+        """Province code, or -1 if the name (after alias resolution) is unknown."""
+        return self._code.get(normalize_name(name), -1)
+
+    def codes(self, names):
+        """Vector of province codes; each distinct name is resolved once."""
+        names = list(names)
+        lookup = {n: self.code(n) for n in set(names)}
+        return np.array([lookup[n] for n in names], dtype=np.int64)
+
+    def unknown(self, names):
+        """Distinct names that do not resolve to any province."""
+        return sorted({str(n) for n in names if self.code(n) < 0})
+
+    def group_codes(self, names, level):
+        """Group code at `level` per name (-1 = unknown province or no group)."""
+        c = self.codes(names)
+        return np.where(c >= 0, self.parent[level][np.maximum(c, 0)], -1)
+
+    # ---------------------------
+    # AGGREGATION
+    # ---------------------------
+
+    def aggregate(self, values, level):
+        """
+        Roll (..., n_provinces) values up to (..., n_groups) with one bincount.
+        NaN only affects its own group; provinces without a group are dropped.
+        """
+        return _bincount_rows(values, self.parent[level], len(self.groups[level]))
+
+    def aggregate_by_name(self, values, names, level):
+        """Sum row values (e.g. per-asset MW) into `level` groups using their province names."""
+        return _bincount_rows(values, self.group_codes(names, level), len(self.groups[level]))
+
+    def matrix(self, level, sparse=None):
+        """
+        (n_provinces x n_groups) 0/1 aggregation matrix.
+        sparse=None -> scipy.sparse CSR when scipy is installed, else dense.
+        """
+        parent = self.parent[level]
+        rows = np.flatnonzero(parent >= 0)
+        shape = (len(self.provinces), len(self.groups[level]))
+
+        if sparse is not False:
+            try:
+                from scipy.sparse import csr_matrix
+            except ImportError:
+                if sparse:
+                    raise
+            else:
+                return csr_matrix((np.ones(rows.size), (rows, parent[rows])), shape=shape)
+
+        M = np.zeros(shape)
+        M[rows, parent[rows]] = 1.0
+        return M
+
+
+def _bincount_rows(values, codes, n_groups):
+    """Sum the last axis of values into n_groups by codes (-1 dropped), one bincount for all rows."""
+    values = np.asarray(values, dtype=float)
+    lead = values.shape[:-1]
+    flat = values.reshape(-1, values.shape[-1])
+    ok = codes >= 0
+    rows = np.arange(flat.shape[0])[:, None]
+    bins = (rows * n_groups + codes[ok][None, :]).ravel()
+    out = np.bincount(bins, weights=flat[:, ok].ravel(), minlength=flat.shape[0] * n_groups)
+    return out.reshape(lead + (n_groups,))
+
+
+_INDEX = None
+
+
+def get_region_index():
+    """Shared RegionIndex, built (and unmapped provinces reported) on first use."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = RegionIndex()
+    return _INDEX
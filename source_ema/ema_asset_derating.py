@@ -0,0 +1,174 @@
+# =======================================================
+# ema_asset_derating.py
+# Spatially resolved derating: every asset uses its OWN tasmax series
+# (from the ClimateExtractor overlay) instead of one national temperature.
+# Produces derated MW per timestep aggregated to:
+#   - provinsi
+#   - SYSTEM_MAP system
+#   - nation
+# Time is processed in chunks so memory stays bounded.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+
+from source.region_index import get_region_index
+from source_ema.ema_derating_calculator import (
+    compile_plant_table,
+    derate_plants_or_full,
+    map_derating_function,
+)
+
+
+UNMAPPED_SYSTEM = "UNMAPPED"
+
+
+# -------------------------------------
+# UTILITIES
+# -------------------------------------
+
+def ragged_to_dense(col, t0=0, t1=None):
+    """
+    Steps [t0, t1) of a RaggedColumn as float32 (steps x rows);
+    rows shorter than t1 are padded with NaN. t1=None -> longest row.
+    """
+    counts = np.diff(col.offsets)
+    if t1 is None:
+        t1 = int(counts.max()) if counts.size else 0
+    n_steps = max(t1 - t0, 0)
+
+    dense = np.full((n_steps, counts.size), np.nan, dtype=np.float32)
+    take = np.clip(counts - t0, 0, n_steps)
+    total = int(take.sum())
+    if total:
+        rows = np.repeat(np.arange(counts.size), take)
+        steps = np.arange(total) - np.repeat(np.cumsum(take) - take, take)
+        dense[steps, rows] = col.values[col.offsets[:-1][rows] + t0 + steps]
+    return dense
+
+
+def membership_matrix(codes, n_groups):
+    """One-hot (rows x groups) float matrix; code -1 = no group."""
+    M = np.zeros((codes.size, n_groups))
+    ok = codes >= 0
+    M[np.flatnonzero(ok), codes[ok]] = 1.0
+    return M
+
+
+# -------------------------------------
+# CLASS: AssetDeratingEngine
+# -------------------------------------
+
+class AssetDeratingEngine:
+    """
+    Per-asset derating engine on top of a loaded ClimateExtractor.
+    Each asset is joined to the compiled coefficients of its technology
+    (jenis) and derated with its own temperature at every timestep.
+    Timesteps with no temperature for an asset keep full capacity.
+
+    prov_matrix / system_matrix: one-hot (assets x provs) and (assets x systems)
+    membership matrices, so derated @ prov_matrix sums assets per region.
+    """
+
+    def __init__(self, extractor, jenis_col="jenis"):
+        self.extractor = extractor
+
+        assets = extractor.assets
+        lookup = {j: map_derating_function(j) for j in assets[jenis_col].unique()}
+        df = pd.DataFrame({
+            "jenis": assets[jenis_col].astype(str).to_numpy(),
+            "daya_mw": assets["daya_mw"].fillna(0.0).to_numpy(dtype=float),
+            "derating_function": assets[jenis_col].map(lookup).to_numpy(),
+        })
+        self.plants = compile_plant_table(df)
+
+        # provinsi codes aligned to extractor.provs
+        self.provs = list(extractor.provs)
+        prov_codes = pd.Categorical(assets["provinsi"], categories=self.provs).codes
+
+        # SYSTEM_MAP systems (+ UNMAPPED for provinces not in SYSTEM_MAP), aliases resolved
+        regions = get_region_index()
+        self.systems = list(regions.groups["system"])
+        sys_of_prov = regions.group_codes(self.provs, "system")
+        self.unmapped_provs = sorted(p for p, c in zip(self.provs, sys_of_prov) if c < 0)
+        if self.unmapped_provs:
+            self.systems.append(UNMAPPED_SYSTEM)
+            sys_of_prov[sys_of_prov < 0] = len(self.systems) - 1
+            print(f"[WARN] provinces not in SYSTEM_MAP: {self.unmapped_provs}")
+        sys_codes = np.where(prov_codes >= 0, sys_of_prov[np.maximum(prov_codes, 0)], -1)
+
+        self.prov_matrix = membership_matrix(prov_codes, len(self.provs))
+        self.system_matrix = membership_matrix(sys_codes, len(self.systems))
+
+    # ---------------------------
+    # INTERNAL HELPERS
+    # ---------------------------
+
+    def window_columns(self, **query):
+        """Columns of one window (ColumnIndex.lookup query) in time order."""
+        keys = self.extractor.columns.keys
+        cols = self.extractor.columns.lookup(**query)
+        return sorted(cols, key=lambda c: (keys[c].start, keys[c].end, c))
+
+    def iter_temperature(self, columns, chunk_steps=366):
+        """
+        Yield (time_index, T) chunks; T is float32 (steps x assets) with at most
+        chunk_steps rows. time_index is a dataframe of (column, step).
+        """
+        for col in columns:
+            ragged = self.extractor.tasmax[col]
+            counts = np.diff(ragged.offsets)
+            n_steps = int(counts.max()) if counts.size else 0
+            for t0 in range(0, n_steps, chunk_steps):
+                t1 = min(t0 + chunk_steps, n_steps)
+                index = pd.DataFrame({"column": col, "step": np.arange(t0, t1)})
+                yield index, ragged_to_dense(ragged, t0, t1)
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+
+    def iter_derated(self, columns, chunk_steps=366):
+        """Yield (time_index, derated MW (steps x assets)) chunks."""
+        for index, T in self.iter_temperature(columns, chunk_steps):
+            yield index, derate_plants_or_full(self.plants, T)
+
+    def derate_regions(self, columns=None, chunk_steps=366, **query):
+        """
+        Derated MW per timestep for provinsi, system and nation.
+        Pass either columns (in time order) or a ColumnIndex query, e.g.
+            derate_regions(scenario="rcp85", start=2051)
+        Return dict: {"provinsi": df, "system": df, "nation": series, "capacity_mw": dict}
+        """
+        if columns is None:
+            columns = self.window_columns(**query)
+
+        index, prov, system, nation = [], [], [], []
+        for idx, derated in self.iter_derated(columns, chunk_steps):
+            index.append(idx)
+            prov.append(derated @ self.prov_matrix)
+            system.append(derated @ self.system_matrix)
+            nation.append(derated.sum(axis=1))
+
+        if index:
+            time_index = pd.MultiIndex.from_frame(pd.concat(index, ignore_index=True))
+            prov = np.vstack(prov)
+            system = np.vstack(system)
+            nation = np.concatenate(nation)
+        else:
+            time_index = pd.MultiIndex.from_arrays([[], []], names=["column", "step"])
+            prov = np.empty((0, len(self.provs)))
+            system = np.empty((0, len(self.systems)))
+            nation = np.empty(0)
+
+        P = self.plants.daya_mw
+        return {
+            "provinsi": pd.DataFrame(prov, index=time_index, columns=self.provs),
+            "system": pd.DataFrame(system, index=time_index, columns=self.systems),
+            "nation": pd.Series(nation, index=time_index, name="derated_mw"),
+            "capacity_mw": {
+                "provinsi": dict(zip(self.provs, P @ self.prov_matrix)),
+                "system": dict(zip(self.systems, P @ self.system_matrix)),
+                "nation": float(P.sum()),
+            },
+        }
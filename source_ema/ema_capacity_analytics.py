@@ -0,0 +1,203 @@
+# =======================================================
+# ema_capacity_analytics.py
+# Capacity-loss analytics per provinsi, SYSTEM_MAP system and nation:
+#   - loss-duration curves
+#   - percentile losses (P90 / P99 / ...)
+#   - return periods of loss thresholds
+# Losses are streamed from AssetDeratingEngine chunk by chunk into one
+# HistogramSketch (one group per region), so ensembles of any size are
+# reduced in a single pass without keeping or re-sorting the series.
+# exact_loss_statistics() gives the exact values from one sort when
+# the loss matrix fits in memory.
+# Return periods need the number of steps per year; for streamed windows
+# it is derived from each column's ColumnKey period and its list length
+# (monthly lists in the overlay -> 12 steps per year).
+# =======================================================
+
+import numpy as np
+import pandas as pd
+
+from source_ema.ema_climate_extractor import period_years
+from source_ema.ema_quantile_sketch import HistogramSketch
+
+
+# -------------------------------------
+# EXACT (one sort)
+# -------------------------------------
+
+def exact_loss_statistics(loss, percentiles=(90, 99), thresholds=(), steps_per_year=None):
+    """
+    loss: (steps x regions) array or dataframe of loss (any unit); NaN = no data.
+    One np.sort along time gives every percentile and exceedance at once:
+    percentiles are read from interpolated ranks of the sorted valid values
+    (same convention as np.percentile), exceedances via searchsorted.
+    steps_per_year (e.g. 12 for monthly series) is required with thresholds.
+    Return dataframe (regions x [p.., exceed_.., rp_..]); NaN for regions without data.
+    """
+    if thresholds and steps_per_year is None:
+        raise ValueError("steps_per_year is required to turn exceedances into return periods")
+
+    names = list(loss.columns) if isinstance(loss, pd.DataFrame) else list(range(np.shape(loss)[1]))
+    L = np.sort(np.asarray(loss, dtype=float), axis=0)    # NaN sorted to the end
+    n_valid = (~np.isnan(L)).sum(axis=0)
+    cols = np.arange(L.shape[1])
+    has_data = n_valid > 0
+
+    out = {}
+    for q in percentiles:
+        pos = q / 100.0 * np.maximum(n_valid - 1, 0)
+        r0 = np.floor(pos).astype(np.int64)
+        r1 = np.minimum(r0 + 1, np.maximum(n_valid - 1, 0))
+        v0 = L[r0, cols] if L.shape[0] else np.full(cols.size, np.nan)
+        v1 = L[r1, cols] if L.shape[0] else np.full(cols.size, np.nan)
+        out[f"p{q:g}"] = np.where(has_data, v0 + (pos - r0) * (v1 - v0), np.nan)
+
+    for x in thresholds:
+        below = np.array([np.searchsorted(L[:k, j], x, side="left") for j, k in enumerate(n_valid)])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(has_data, (n_valid - below) / n_valid, np.nan)
+            out[f"exceed_{x:g}"] = frac
+            out[f"rp_{x:g}_years"] = 1.0 / (frac * steps_per_year)
+    return pd.DataFrame(out, index=names)
+
+
+def loss_duration_curve(loss):
+    """One sort -> dataframe (duration_fraction, loss) with loss sorted high to low."""
+    v = np.asarray(loss, dtype=float)
+    v = np.sort(v[~np.isnan(v)])[::-1]
+    return pd.DataFrame({"duration_fraction": np.arange(1, v.size + 1) / v.size, "loss": v})
+
+
+# -------------------------------------
+# CLASS: LossAnalytics (streaming)
+# -------------------------------------
+
+class LossAnalytics:
+    """
+    Streaming loss statistics for every provinsi, system and the nation.
+
+        ana = LossAnalytics(AssetDeratingEngine(ext))
+        for scenario in ("rcp45", "rcp85"):               # ensemble members / windows
+            ana.accumulate(scenario=scenario, start=2051)
+        ana.percentiles([90, 99])
+        ana.return_periods([5, 10])                       # loss % thresholds
+        ana.loss_duration_curve("system", "Jamali")
+
+    Loss is tracked in percent of regional capacity (resolution = bin width);
+    MW figures are percent x capacity, so they carry the same relative error.
+    """
+
+    def __init__(self, asset_engine, resolution=0.01, lo=None, hi=None):
+        self.engine = asset_engine
+
+        self.regions = pd.MultiIndex.from_tuples(
+            [("provinsi", p) for p in asset_engine.provs]
+            + [("system", s) for s in asset_engine.systems]
+            + [("nation", "INDONESIA")],
+            names=["level", "region"],
+        )
+        P = asset_engine.plants.daya_mw
+        prov, system = asset_engine.prov_matrix, asset_engine.system_matrix
+        self.capacity_mw = np.concatenate([P @ prov, P @ system, [P.sum()]])
+        self._to_region = np.hstack([prov, system, np.ones((P.size, 1))])
+
+        self.sketch = HistogramSketch(len(self.regions), lo=lo, hi=hi, resolution=resolution)
+        self.n_steps = 0
+        self.n_years = 0.0     # years of climate covered by the streamed steps
+
+    # ---------------------------
+    # ACCUMULATE
+    # ---------------------------
+
+    def update(self, derated, years=0.0):
+        """
+        Add one chunk of derated MW (steps x assets).
+        years: climate years the chunk covers (used for return periods).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            loss_pct = 100 * (1 - (derated @ self._to_region) / self.capacity_mw)
+        groups = np.broadcast_to(np.arange(len(self.regions)), loss_pct.shape)
+        self.sketch.update(groups.ravel(), loss_pct.ravel())
+        self.n_steps += derated.shape[0]
+        self.n_years += years
+
+    def accumulate(self, columns=None, chunk_steps=366, **query):
+        """
+        Stream one window (columns or a ColumnIndex query) into the sketch.
+        Each column's ColumnKey period is spread over its steps, so the
+        steps per year follow the list length (e.g. 120 monthly items / 10 years).
+        """
+        if columns is None:
+            columns = self.engine.window_columns(**query)
+        keys = self.engine.extractor.columns.keys
+        for col in columns:
+            n_col = int(np.diff(self.engine.extractor.tasmax[col].offsets).max(initial=0))
+            years_per_step = period_years(keys[col]) / n_col if n_col else 0.0
+            for _, derated in self.engine.iter_derated([col], chunk_steps):
+                self.update(derated, years=derated.shape[0] * years_per_step)
+        return self
+
+    def merge(self, other):
+        """Combine with analytics accumulated elsewhere (same regions)."""
+        if not self.regions.equals(other.regions):
+            raise ValueError("Cannot merge analytics over different regions")
+        self.sketch.merge(other.sketch)
+        self.n_steps += other.n_steps
+        self.n_years += other.n_years
+        return self
+
+    @property
+    def steps_per_year(self):
+        """Streamed steps per climate year (NaN before any years are known)."""
+        return self.n_steps / self.n_years if self.n_years else np.nan
+
+    # ---------------------------
+    # RESULTS
+    # ---------------------------
+
+    def percentiles(self, qs=(90, 99)):
+        """Dataframe (level, region) x [capacity_mw, p{q}_loss_percent, p{q}_loss_mw]."""
+        out = pd.DataFrame({"capacity_mw": self.capacity_mw}, index=self.regions)
+        for q in qs:
+            pct = self.sketch.quantile(q)
+            out[f"p{q:g}_loss_percent"] = pct
+            out[f"p{q:g}_loss_mw"] = pct / 100 * self.capacity_mw
+        return out
+
+    def return_periods(self, thresholds_percent, steps_per_year=None):
+        """
+        For each loss threshold (% of regional capacity): fraction of timesteps at or
+        above it and the return period in years (1 / expected exceedances per year).
+        steps_per_year=None -> derived from the streamed columns (see accumulate()).
+        """
+        if steps_per_year is None:
+            steps_per_year = self.steps_per_year
+            if np.isnan(steps_per_year):
+                raise ValueError("Steps per year unknown: use accumulate() or pass update(..., years=)")
+        out = pd.DataFrame({"capacity_mw": self.capacity_mw}, index=self.regions)
+        for x in thresholds_percent:
+            frac = self.sketch.exceedance(x)
+            out[f"exceed_{x:g}"] = frac
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[f"rp_{x:g}_years"] = 1.0 / (frac * steps_per_year)
+        return out
+
+    def loss_duration_curve(self, level, region, n_points=101):
+        """Loss (%, MW) exceeded for each fraction of time, from the region's histogram."""
+        g = self.regions.get_loc((level, region))
+        counts = self.sketch.counts[g]
+        n = counts.sum()
+        duration = np.linspace(0.0, 1.0, n_points)
+        if n == 0:
+            loss = np.full(n_points, np.nan)
+        else:
+            # loss value exceeded for a fraction d of the time = (1 - d) quantile
+            cum = np.cumsum(counts)
+            rank = np.clip(np.ceil((1 - duration) * n).astype(np.int64), 1, n)
+            b = np.searchsorted(cum, rank, side="left")
+            loss = self.sketch.bin_centres()[b]
+        return pd.DataFrame({
+            "duration_fraction": duration,
+            "loss_percent": loss,
+            "loss_mw": loss / 100 * self.capacity_mw[g],
+        })
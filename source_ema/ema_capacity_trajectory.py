@@ -0,0 +1,169 @@
+# =======================================================
+# ema_capacity_trajectory.py
+# Derating along a RUPTL/RUKN capacity trajectory (year x plant):
+#   - every planning year is matched to a climate window
+#     (2024, 2031-2040, 2051-2060 by default)
+#   - all years x scenarios x plants are evaluated in ONE broadcast
+#     of the compiled piecewise-linear coefficients
+#   - output: loss by year (and by year x technology)
+# =======================================================
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from source_ema.ema_derating_calculator import (
+    COEFFICIENT_FIELDS,
+    compile_plant_table,
+    map_derating_function,
+)
+from source_ema.ema_profiling import count_law_evaluations
+from source_ema.f_derating_registry import linear_multiplier
+
+
+# (first year, last year, window suffix) -> national temperature key "<scenario>_<suffix>"
+# 2041-2050 has no CMIP window in the overlay and uses 2051-2060 (conservative).
+YEAR_WINDOWS = [
+    (2000, 2030, "2024"),
+    (2031, 2040, "2031_2040"),
+    (2041, 2060, "2051_2060"),
+]
+
+_RE_YEAR = re.compile(r"^(19|20)\d{2}$")
+
+
+# -------------------------------------
+# UTILITIES
+# -------------------------------------
+
+def window_for_year(year, windows=YEAR_WINDOWS):
+    for first, last, suffix in windows:
+        if first <= year <= last:
+            return suffix
+    raise ValueError(f"No climate window configured for year {year}")
+
+
+def read_trajectory(csv_or_df):
+    """
+    Capacity trajectory -> (plants dataframe [Nama, jenis], years, capacity (years x plants)).
+    csv_or_df: dataframe, or a csv path (str / os.PathLike) or buffer.
+    Accepted layouts:
+      - wide: one row per plant, one column per year ("2024", "2025", ...) with MW
+      - long: columns year, jenis, daya_mw (optionally Nama); one row per plant-year
+    """
+    if isinstance(csv_or_df, pd.DataFrame):
+        df = csv_or_df.copy()
+    else:
+        df = pd.read_csv(os.fspath(csv_or_df) if isinstance(csv_or_df, os.PathLike) else csv_or_df)
+
+    if "year" in df.columns:
+        key = ["Nama", "jenis"] if "Nama" in df.columns else ["jenis"]
+        wide = df.pivot_table(index=key, columns="year", values="daya_mw", aggfunc="sum", fill_value=0.0)
+        plants = wide.index.to_frame(index=False)
+        years = np.array([int(y) for y in wide.columns])
+        capacity = wide.to_numpy(dtype=float).T
+    else:
+        year_cols = [c for c in df.columns if _RE_YEAR.match(str(c).strip())]
+        if not year_cols:
+            raise ValueError("Trajectory needs year columns (wide) or a 'year' column (long)")
+        plants = df[[c for c in ("Nama", "jenis") if c in df.columns]].reset_index(drop=True)
+        years = np.array([int(str(c).strip()) for c in year_cols])
+        capacity = df[year_cols].fillna(0.0).to_numpy(dtype=float).T
+
+    order = np.argsort(years)
+    return plants, years[order], capacity[order]
+
+
+# -------------------------------------
+# CLASS: CapacityTrajectory
+# -------------------------------------
+
+class CapacityTrajectory:
+    """
+    Year x plant capacity with compiled derating coefficients per plant.
+
+        traj = CapacityTrajectory("ruptl_trajectory.csv")
+        T = traj.window_temperatures(ce.compute_national_temperatures(), scenarios=["45", "85"])
+        traj.loss_by_year(T)             # year x scenario loss table
+        traj.loss_by_technology(T)       # year x scenario x jenis
+    """
+
+    def __init__(self, trajectory, params=None):
+        self.plants, self.years, self.capacity = read_trajectory(trajectory)
+
+        df = self.plants.copy()
+        lookup = {j: map_derating_function(j) for j in df["jenis"].unique()}
+        df["derating_function"] = df["jenis"].map(lookup)
+        df["daya_mw"] = 0.0
+        self.table = compile_plant_table(df, params)
+        self.technologies, self._tech_codes = np.unique(df["jenis"].astype(str), return_inverse=True)
+
+    # ---------------------------
+    # TEMPERATURES
+    # ---------------------------
+
+    def window_temperatures(self, national, scenarios=("85",), statistic="national_max", windows=YEAR_WINDOWS):
+        """
+        Temperature per (scenario, year) from a compute_national_temperatures() table.
+        Return dataframe (scenarios x years).
+        """
+        table = national.set_index("scenario")[statistic]
+        rows = {}
+        for sc in scenarios:
+            keys = [f"{sc}_{window_for_year(int(y), windows)}" for y in self.years]
+            missing = sorted(set(keys) - set(table.index))
+            if missing:
+                raise ValueError(f"National temperatures missing for {missing}")
+            rows[sc] = table.loc[keys].to_numpy(dtype=float)
+        return pd.DataFrame(rows, index=self.years).T
+
+    # ---------------------------
+    # EVALUATION
+    # ---------------------------
+
+    def derate(self, T):
+        """
+        T: (years,) or (scenarios x years) temperatures.
+        Return derated MW with shape (scenarios x years x plants), one broadcast.
+        """
+        T = np.atleast_2d(np.asarray(T, dtype=float))
+        if T.shape[-1] != self.years.size:
+            raise ValueError(f"Expected {self.years.size} temperatures per scenario, got {T.shape[-1]}")
+        m = linear_multiplier(T[:, :, None], *(getattr(self.table, k) for k in COEFFICIENT_FIELDS))
+        count_law_evaluations(self.table.function_id, T.shape[0] * T.shape[1])
+        return self.capacity[None, :, :] * m
+
+    def loss_by_year(self, T):
+        """Long table: scenario, year, T_nat, total_before_mw, total_after_mw, total_loss_mw, loss_percent."""
+        scen = list(T.index) if isinstance(T, pd.DataFrame) else list(range(np.atleast_2d(T).shape[0]))
+        Tv = np.atleast_2d(np.asarray(T, dtype=float))
+        after = self.derate(Tv).sum(axis=2)
+        before = np.broadcast_to(self.capacity.sum(axis=1), after.shape)
+        loss = before - after
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = 100 * loss / before
+
+        S, Y = after.shape
+        return pd.DataFrame({
+            "scenario": np.repeat(scen, Y),
+            "year": np.tile(self.years, S),
+            "T_nat": Tv.ravel(),
+            "total_before_mw": np.round(before.ravel(), 2),
+            "total_after_mw": np.round(after.ravel(), 2),
+            "total_loss_mw": np.round(loss.ravel(), 2),
+            "loss_percent": np.round(pct.ravel(), 2),
+        })
+
+    def loss_by_technology(self, T):
+        """Loss MW per (scenario, year, jenis) via one bincount over plants."""
+        scen = list(T.index) if isinstance(T, pd.DataFrame) else list(range(np.atleast_2d(T).shape[0]))
+        loss = self.capacity[None] - self.derate(T)
+        S, Y, P = loss.shape
+        K = self.technologies.size
+        bins = (np.arange(S * Y)[:, None] * K + self._tech_codes[None, :]).ravel()
+        by_tech = np.bincount(bins, weights=loss.reshape(S * Y, P).ravel(), minlength=S * Y * K).reshape(S * Y, K)
+
+        index = pd.MultiIndex.from_arrays([np.repeat(scen, Y), np.tile(self.years, S)], names=["scenario", "year"])
+        return pd.DataFrame(np.round(by_tech, 2), index=index, columns=self.technologies)
@@ -9,6 +9,13 @@
 import pandas as pd
 import numpy as np
 import ast
+import re
+import warnings
+from collections import namedtuple
+
+from source_ema.ema_overlay_cache import load_overlay_cache, save_overlay_cache
+from source_ema.ema_profiling import profiled
+from source_ema.ema_quantile_sketch import HistogramSketch
 
 
 # -------------------------------------
@@ -40,140 +47,641 @@ def extract_minmax(series_of_lists):
     return float(arr.min()), float(arr.max())
 
 
+# Ragged (CSR-style) storage for one decoded list column:
+#   values  : float32, all list items of all rows concatenated
+#   offsets : int64, len = n_rows + 1; row i = values[offsets[i]:offsets[i+1]]
+RaggedColumn = namedtuple("RaggedColumn", ["values", "offsets"])
+
+
+def _parse_tokens(text):
+    """Parse the inside of one "[a, b, ...]" cell; None items are skipped like parse_list."""
+    out = []
+    for tok in text.split(","):
+        tok = tok.strip()
+        if tok == "" or tok == "None":
+            continue
+        out.append(float(tok))
+    return out
+
+
+def decode_list_column(cells):
+    """
+    Decode a column of stringified lists into a RaggedColumn in one pass.
+    Return (RaggedColumn, n_errors); a malformed cell counts as one error
+    and decodes to an empty row (same result parse_list gives it).
+    """
+    n = len(cells)
+    texts = [""] * n
+    direct = {}
+    for i, cell in enumerate(cells):
+        if isinstance(cell, str):
+            texts[i] = cell.strip()
+        elif isinstance(cell, (list, tuple, np.ndarray)):
+            direct[i] = parse_list(cell)
+
+    # fast path: every string cell is a plain "[num, num, ...]" list
+    inner = [t[1:-1] if t[:1] == "[" and t[-1:] == "]" else None for t in texts]
+    counts = np.zeros(n, dtype=np.int64)
+    values = None
+    if all(t is not None or texts[i] == "" for i, t in enumerate(inner)):
+        for i, t in enumerate(inner):
+            if t is not None and t.strip():
+                counts[i] = t.count(",") + 1
+        try:
+            joined = ",".join(t for t in inner if t is not None and t.strip())
+            values = np.array(joined.split(",") if joined else [], dtype=np.float64)
+        except ValueError:
+            values = None
+
+    errors = 0
+    if values is None or direct:
+        # slow path: per cell, counting malformed cells instead of hiding them
+        rows = []
+        for i, t in enumerate(inner):
+            if i in direct:
+                rows.append(direct[i])
+            elif t is None:
+                if texts[i] != "":
+                    errors += 1
+                rows.append([])
+            else:
+                try:
+                    rows.append(_parse_tokens(t))
+                except ValueError:
+                    errors += 1
+                    rows.append([])
+        counts = np.array([len(r) for r in rows], dtype=np.int64)
+        values = np.array([x for r in rows for x in r], dtype=np.float64)
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return RaggedColumn(values.astype(np.float32), offsets), errors
+
+
+def ragged_row_stats(col):
+    """Per-row (min, max, sum, count) of a RaggedColumn, ignoring NaN items; min/max NaN for empty rows."""
+    n = len(col.offsets) - 1
+    row_min = np.full(n, np.nan)
+    row_max = np.full(n, np.nan)
+    row_sum = np.zeros(n)
+    row_cnt = np.zeros(n)
+    nonempty = np.diff(col.offsets) > 0
+    if nonempty.any():
+        starts = col.offsets[:-1][nonempty]
+        values = np.asarray(col.values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        row_min[nonempty] = np.fmin.reduceat(values, starts)
+        row_max[nonempty] = np.fmax.reduceat(values, starts)
+        row_sum[nonempty] = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        row_cnt[nonempty] = np.add.reduceat(valid.astype(np.float64), starts)
+    return row_min, row_max, row_sum, row_cnt
+
+
+def window_row_stats(n_rows, colsets, row_stats_of):
+    """
+    Combine per-column row stats into (rows x windows) min/max/sum/count matrices.
+    row_stats_of(column) must return ragged_row_stats() of that column.
+    """
+    W = len(colsets)
+    row_min = np.full((n_rows, W), np.nan)
+    row_max = np.full((n_rows, W), np.nan)
+    row_sum = np.zeros((n_rows, W))
+    row_cnt = np.zeros((n_rows, W))
+    for w, colset in enumerate(colsets):
+        for c in colset:
+            mn, mx, sm, ct = row_stats_of(c)
+            row_min[:, w] = np.fmin(row_min[:, w], mn)
+            row_max[:, w] = np.fmax(row_max[:, w], mx)
+            row_sum[:, w] += sm
+            row_cnt[:, w] += ct
+    return row_min, row_max, row_sum, row_cnt
+
+
+def ragged_rows(col, rows):
+    """Concatenate the values of the given row indices of a RaggedColumn (one fancy-index gather)."""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = col.offsets[rows]
+    lengths = col.offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return col.values[:0]
+    idx = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+    return col.values[idx]
+
+
+def is_list_column(series):
+    """True if the first non-null cell looks like a serialized list."""
+    first = series.dropna()
+    if first.empty:
+        return False
+    cell = first.iloc[0]
+    return isinstance(cell, (list, tuple, np.ndarray)) or (isinstance(cell, str) and cell.lstrip().startswith("["))
+
+
+# Structured key parsed once from a tasmax column name.
+#   source   : "ERA5" or "CMIP"
+#   scenario : normalized pathway, e.g. "rcp45", "ssp245" (None for ERA5)
+#   start/end: YYYYMM ints of the covered period
+ColumnKey = namedtuple("ColumnKey", ["source", "scenario", "start", "end"])
+
+def period_years(key):
+    """Length of a ColumnKey period in years (whole months / 12), e.g. 203101-204012 -> 10.0."""
+    months = (key.end // 100 - key.start // 100) * 12 + (key.end % 100 - key.start % 100) + 1
+    return months / 12.0
+
+
+# YYYYMM or YYYYMMDD pairs ("203101-204012", "20310101-20401231"), or year pairs ("2031-2040")
+_RE_PERIOD = re.compile(r"(?<!\d)(\d{6}(?:\d{2})?)-(\d{6}(?:\d{2})?)(?!\d)")
+_RE_YEARS = re.compile(r"(?<!\d)((?:19|20)\d{2})-((?:19|20)\d{2})(?!\d)")
+_RE_RCP = re.compile(r"rcp[_-]?(\d)\.?(\d)", re.IGNORECASE)
+_RE_SSP = re.compile(r"ssp[_-]?(\d)[_-]?(\d)\.?(\d)", re.IGNORECASE)
+_RE_ERA5 = re.compile(r"ERA5[_-]?(\d{4})", re.IGNORECASE)
+_RE_CLIMATE_HINT = re.compile(r"tas|tmax|rcp|ssp|era5", re.IGNORECASE)
+
+
+def _period_of(name):
+    """(start, end) as YYYYMM ints from a period in the name, or None."""
+    period = _RE_PERIOD.search(name)
+    if period:
+        return int(period.group(1)[:6]), int(period.group(2)[:6])
+    years = _RE_YEARS.search(name)
+    if years:
+        return int(years.group(1)) * 100 + 1, int(years.group(2)) * 100 + 12
+    return None
+
+
+def parse_column_name(name):
+    """
+    Parse a tasmax column name into a ColumnKey, or None if it is not a climate column.
+    A scenario in the name makes it a CMIP column, even if it also mentions ERA5
+    (e.g. bias-corrected to ERA5); otherwise an ERA5 tag makes it reanalysis.
+    """
+    period = _period_of(name)
+
+    scenario = _scenario_of(name)
+    if scenario is not None:
+        if period is None:
+            return None
+        return ColumnKey("CMIP", scenario, *period)
+
+    era5 = _RE_ERA5.search(name)
+    if era5:
+        if period:
+            return ColumnKey("ERA5", None, *period)
+        yr = int(era5.group(1))
+        return ColumnKey("ERA5", None, yr * 100 + 1, yr * 100 + 12)
+
+    return None
+
+
+def _scenario_of(text):
+    ssp = _RE_SSP.search(text)
+    if ssp:
+        return "ssp" + "".join(ssp.groups())
+    rcp = _RE_RCP.search(text)
+    if rcp:
+        return "rcp" + "".join(rcp.groups())
+    return None
+
+
+def normalize_scenario(scenario):
+    """"SSP2-4.5" / "ssp245" / "RCP8.5" -> "ssp245" / "rcp85"."""
+    if scenario is None:
+        return None
+    return _scenario_of(str(scenario)) or str(scenario).lower()
+
+
+class ColumnIndex:
+    """
+    Index of climate columns by ColumnKey, built once from the column names.
+    lookup() filters on any subset of the key fields; start/end given as a
+    4-digit year mean YYYY01 / YYYY12. Results are memoized per query.
+    Climate-looking columns (tas/tmax/rcp/ssp/ERA5 in the name) that cannot be
+    parsed are kept in self.unparsed, with a warning, instead of being dropped silently.
+    """
+
+    def __init__(self, columns):
+        self.keys = {}
+        self.by_key = {}
+        self.unparsed = []
+        for c in columns:
+            key = parse_column_name(c)
+            if key is None:
+                if _RE_CLIMATE_HINT.search(str(c)):
+                    self.unparsed.append(c)
+                continue
+            self.keys[c] = key
+            self.by_key.setdefault(key, []).append(c)
+        self._memo = {}
+
+        if self.unparsed:
+            warnings.warn(f"Climate columns with no recognised scenario/period are not indexed: {self.unparsed}",
+                          stacklevel=2)
+
+    def lookup(self, source=None, scenario=None, start=None, end=None):
+        scenario = normalize_scenario(scenario)
+        if start is not None and int(start) < 10000:
+            start = int(start) * 100 + 1
+        if end is not None and int(end) < 10000:
+            end = int(end) * 100 + 12
+
+        query = (source, scenario, start, end)
+        if query not in self._memo:
+            cols = []
+            for key, key_cols in self.by_key.items():
+                if all(q is None or q == k for q, k in zip(query, key)):
+                    cols.extend(key_cols)
+            self._memo[query] = cols
+        return list(self._memo[query])
+
+
 def capacity_weighted(series, weights):
     """Simple weighted average function."""
     return float(np.average(series, weights=weights))
 
 
+# -------------------------------------
+# CLASS: BaseClimateExtractor
+# -------------------------------------
+
+class BaseClimateExtractor:
+    """
+    Shared part of the in-memory and streaming extractors:
+    - default scenario windows and their column lookup
+    - writing per-window stats into the wide self.out table
+    - capacity-weighted NATIONAL MIN/MAX from self.out
+
+    Subclasses set self.columns (ColumnIndex), self.provs, self.out and
+    self._capacity (daya_mw per provinsi aligned to self.provs), and implement
+    compute_minmax().
+    """
+
+    ERA5_YEARS = [2024, 2023, 2022, 2021, 2020, 2010, 2000]
+
+    # (output label, ColumnIndex.lookup query) per CMIP window
+    WINDOWS = [
+        ("assets_45_2031_2040", {"scenario": "rcp45", "start": 203101}),
+        ("assets_85_2031_2040", {"scenario": "rcp85", "start": 203101}),
+        ("assets_45_2051_2060", {"scenario": "rcp45", "start": 205101}),
+        ("assets_85_2051_2060", {"scenario": "rcp85", "start": 205101}),
+        ("assets_45_2024", {"scenario": "rcp45", "start": 202401, "end": 202412}),
+        ("assets_85_2024", {"scenario": "rcp85", "start": 202401, "end": 202412}),
+    ]
+
+    @profiled("climate.find_columns")
+    def _find_columns(self, windows=None):
+        """Resolve (label, query) windows to tasmax columns: {label: [columns]}."""
+        return {label: self.columns.lookup(**query) for label, query in (windows or self.windows())}
+
+    def windows(self):
+        """Default windows: WINDOWS plus one ERA5 window per ERA5_YEARS entry."""
+        era5 = [(f"ERA5_{yr}", {"source": "ERA5", "start": yr}) for yr in self.ERA5_YEARS]
+        return list(self.WINDOWS) + era5
+
+    @profiled("climate.write_out", rows=lambda r, *a, **k: len(r))
+    def _write_out(self, labels, stats, mean, pct):
+        """Write per-window stats (n_provs x n_windows arrays) into the wide self.out table."""
+        for w, label in enumerate(labels):
+            self.out[f"min_{label}"] = stats["min"][:, w]
+            self.out[f"max_{label}"] = stats["max"][:, w]
+            if mean:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    self.out[f"mean_{label}"] = stats["sum"][:, w] / stats["count"][:, w]
+            for q, values in pct.items():
+                self.out[f"p{q:g}_{label}"] = values[:, w]
+
+        # Round all numeric columns to 2 decimals
+        numeric_cols = self.out.select_dtypes(include=[np.number]).columns
+        self.out[numeric_cols] = self.out[numeric_cols].round(3)
+
+        return self.out
+
+    def _scenario_columns(self, scenario):
+        """(min_col, max_col) in self.out for a scenario key ("85_2051_2060" or "ERA5_2024")."""
+        for prefix in ("assets_", ""):
+            min_col = f"min_{prefix}{scenario}"
+            max_col = f"max_{prefix}{scenario}"
+            if min_col in self.out.columns and max_col in self.out.columns:
+                return min_col, max_col
+        raise ValueError(f"Scenario columns not found: min_assets_{scenario}")
+
+    def capacity_weights(self):
+        """Total daya_mw per provinsi aligned to self.provs."""
+        if self._capacity is None:
+            raise ValueError("Provincial capacity is not known yet; run compute_minmax() first")
+        return self._capacity
+
+    def compute_national_temperature(self, scenario="85_2051_2060"):
+        """
+        Compute capacity-weighted MIN/MAX national temperature for a given scenario.
+        scenario key examples:
+            "45_2051_2060"
+            "85_2051_2060"
+        """
+        row = self.compute_national_temperatures([scenario]).iloc[0]
+
+        return {
+            "scenario": scenario,
+            "national_min": float(row["national_min"]),
+            "national_max": float(row["national_max"])
+        }
+
+    @profiled("climate.national_temperatures", rows=lambda r, *a, **k: len(r))
+    def compute_national_temperatures(self, scenarios=None):
+        """
+        Capacity-weighted MIN/MAX national temperature for many scenarios at once
+        (one matrix-vector product). scenarios=None -> every window in self.out.
+        Return dataframe: scenario, national_min, national_max.
+        """
+        if scenarios is None:
+            scenarios = [c[len("min_"):] for c in self.out.columns if c.startswith("min_")]
+            scenarios = [sc[len("assets_"):] if sc.startswith("assets_") else sc for sc in scenarios]
+
+        cols = [self._scenario_columns(sc) for sc in scenarios]
+        M = self.out[[c for pair in cols for c in pair]].to_numpy(dtype=float)
+
+        w = self.capacity_weights()
+        Tnat = (w @ M) / w.sum()
+
+        return pd.DataFrame({
+            "scenario": list(scenarios),
+            "national_min": np.round(Tnat[0::2], 3),
+            "national_max": np.round(Tnat[1::2], 3),
+        })
+
+    @profiled("climate.save", rows=lambda r, self, *a, **k: len(self.out))
+    def save(self, output_csv):
+        self.out.to_csv(output_csv, index=False)
+        print(f"[OK] Saved climate min–max table to: {output_csv}")
+
+
 # -------------------------------------
 # CLASS: ClimateExtractor
 # -------------------------------------
 
-class ClimateExtractor:
+class ClimateExtractor(BaseClimateExtractor):
     """
     Extractor for asset-based tasmax lists:
     - MIN/MAX per provinsi
     - NATIONAL MIN/MAX (capacity-weighted)
     """
 
-    ERA5_YEARS = [2024, 2023, 2022, 2021, 2020, 2010, 2000]
+    def __init__(self, assets_csv, cache_dir=None):
+        """
+        Load asset CSV once and decode every list column into self.tasmax
+        ({column: RaggedColumn}); self.assets keeps only the scalar columns.
+        Malformed cells are counted per column in self.parse_errors.
+
+        cache_dir: optional directory for a binary cache of the decoded overlay
+        (see ema_overlay_cache). When the cache matches the CSV it is memory-mapped
+        instead of re-reading and re-parsing the text.
+        """
+        cached = load_overlay_cache(assets_csv, cache_dir) if cache_dir else None
+
+        if cached is not None:
+            self.all_cols = cached["all_cols"]
+            self.tasmax = {c: RaggedColumn(*v) for c, v in cached["tasmax"].items()}
+            self.parse_errors = cached["parse_errors"]
+            self.assets = cached["assets"]
+        else:
+            self._load_csv(assets_csv)
+            if cache_dir:
+                save_overlay_cache(assets_csv, cache_dir, self.assets, self.tasmax,
+                                   self.all_cols, self.parse_errors)
 
-    def __init__(self, assets_csv):
-        """Load asset CSV once."""
-        self.assets = pd.read_csv(assets_csv)
         self.provs = sorted(self.assets["provinsi"].unique())
         self.out = pd.DataFrame({"provinsi": self.provs})
-        self.all_cols = list(self.assets.columns)
 
-    # ---------------------------
-    # INTERNAL HELPERS
-    # ---------------------------
-
-    def _find_columns(self):
-        """Identify tasmax columns by scenario pattern."""
+        self.columns = ColumnIndex(self.tasmax)
+        self._prov_index = None   # (row order sorted by province, segment starts)
+        self._row_stats = {}      # column -> ragged_row_stats, computed on first use
+        self._capacity = None     # daya_mw per provinsi aligned to self.provs
 
-        cols = {}
+        n_bad = sum(self.parse_errors.values())
+        if n_bad:
+            print(f"[WARN] {n_bad} malformed list cells in {assets_csv} (see .parse_errors)")
 
-        cols["45_2031"] = [c for c in self.all_cols if "rcp45" in c and "203101" in c]
-        cols["85_2031"] = [c for c in self.all_cols if "rcp85" in c and "203101" in c]
+    @profiled("climate.load", rows=lambda r, self, *a, **k: len(self.assets))
+    def _load_csv(self, assets_csv):
+        """Read the CSV and decode its list columns."""
+        assets = pd.read_csv(assets_csv)
+        self.all_cols = list(assets.columns)
 
-        cols["45_2051"] = [c for c in self.all_cols if "rcp45" in c and "205101" in c]
-        cols["85_2051"] = [c for c in self.all_cols if "rcp85" in c and "205101" in c]
+        self.tasmax = {}
+        self.parse_errors = {}
+        for c in self.all_cols:
+            if assets[c].dtype == object or pd.api.types.is_string_dtype(assets[c]):
+                if is_list_column(assets[c]):
+                    self.tasmax[c], self.parse_errors[c] = decode_list_column(assets[c].tolist())
 
-        cols["45_2024"] = [c for c in self.all_cols if "rcp45" in c and "202401-202412" in c]
-        cols["85_2024"] = [c for c in self.all_cols if "rcp85" in c and "202401-202412" in c]
+        self.assets = assets.drop(columns=list(self.tasmax))
 
-        # ERA5
-        for yr in self.ERA5_YEARS:
-            cols[f"ERA5_{yr}"] = [c for c in self.all_cols if c.startswith(f"tmax_ERA5_{yr}")]
+    # ---------------------------
+    # INTERNAL HELPERS
+    # ---------------------------
 
-        return cols
+    def _province_index(self):
+        """Rows sorted by province and the start of each province segment (aligned to self.provs)."""
+        if self._prov_index is None:
+            codes = pd.Categorical(self.assets["provinsi"], categories=self.provs).codes
+            order = np.argsort(codes, kind="stable")
+            order = order[codes[order] >= 0]
+            starts = np.searchsorted(codes[order], np.arange(len(self.provs)))
+            self._prov_index = (order, starts)
+        return self._prov_index
+
+    def _column_row_stats(self, col):
+        if col not in self._row_stats:
+            self._row_stats[col] = ragged_row_stats(self.tasmax[col])
+        return self._row_stats[col]
+
+    @profiled("climate.window_stats", rows=lambda r, self, *a, **k: len(self.assets))
+    def _window_stats(self, colsets):
+        """
+        Min/max/sum/count per provinsi for many windows in one grouped pass.
+        Return dict of arrays (n_provs x n_windows).
+        """
+        order, starts = self._province_index()
+        W = len(colsets)
+        row_min, row_max, row_sum, row_cnt = window_row_stats(len(self.assets), colsets, self._column_row_stats)
 
-    def _minmax_per_province(self, colset):
-        """Return dict { 'min': {prov}, 'max': {prov} }."""
-        result_min = {}
-        result_max = {}
+        if len(starts) == 0:
+            empty = np.empty((0, W))
+            return {"min": empty, "max": empty, "sum": empty, "count": empty}
 
-        for prov, rows in self.assets.groupby("provinsi")[colset]:
-            mn, mx = extract_minmax(rows.values.flatten())
-            result_min[prov] = mn
-            result_max[prov] = mx
+        return {
+            "min": np.fmin.reduceat(row_min[order], starts, axis=0),
+            "max": np.fmax.reduceat(row_max[order], starts, axis=0),
+            "sum": np.add.reduceat(row_sum[order], starts, axis=0),
+            "count": np.add.reduceat(row_cnt[order], starts, axis=0),
+        }
 
-        return {"min": result_min, "max": result_max}
+    @profiled("climate.percentiles", rows=lambda r, self, *a, **k: len(self.assets))
+    def _window_percentiles(self, colsets, qs):
+        """
+        Percentiles per provinsi for many windows: array (n_qs x n_provs x n_windows).
+        Each column is gathered once in province order (via _province_index), and
+        every (provinsi, window) block gets a single np.percentile call for all qs.
+        """
+        order, starts = self._province_index()
+        P, W = len(self.provs), len(colsets)
+        out = np.full((len(qs), P, W), np.nan)
+        if P == 0:
+            return out
+
+        for w, colset in enumerate(colsets):
+            blocks = []
+            for c in colset:
+                col = self.tasmax[c]
+                lengths = np.diff(col.offsets)[order]
+                bounds = np.zeros(len(order) + 1, dtype=np.int64)
+                np.cumsum(lengths, out=bounds[1:])
+                blocks.append((ragged_rows(col, order), bounds[np.append(starts, len(order))]))
+
+            for p in range(P):
+                parts = [v[b[p]:b[p + 1]] for v, b in blocks]
+                vals = np.concatenate(parts).astype(np.float64) if parts else np.empty(0)
+                vals = vals[~np.isnan(vals)]
+                if vals.size:
+                    out[:, p, w] = np.percentile(vals, qs)
+        return out
+
+    def percentile_per_province(self, colset, q):
+        """Return {prov: np.percentile(values, q)} over all list items of colset."""
+        values = self._window_percentiles([colset], [q])[0, :, 0]
+        return dict(zip(self.provs, values))
 
     # ---------------------------
     # PUBLIC API
     # ---------------------------
 
-    def compute_minmax(self):
-        """Compute MIN/MAX tasmax per provinsi for all scenario windows."""
-
-        cols = self._find_columns()
-
-        def add(colset, label):
-            mm = self._minmax_per_province(colset)
-            self.out[f"min_{label}"] = self.out["provinsi"].map(mm["min"])
-            self.out[f"max_{label}"] = self.out["provinsi"].map(mm["max"])
+    @profiled("climate.compute_minmax")
+    def compute_minmax(self, mean=False, percentiles=None, windows=None):
+        """
+        Compute MIN/MAX tasmax per provinsi for all scenario windows.
+        All windows are reduced in one grouped pass over the decoded arrays.
+        Optional extra columns per window:
+            mean=True             -> mean_{label}
+            percentiles=[90, 99]  -> p90_{label}, p99_{label}
+        windows: list of (label, query) to use instead of self.windows(), e.g.
+            [("assets_245_2041_2050", {"scenario": "SSP2-4.5", "start": 2041})]
+        """
 
-        # Add RCP windows
-        add(cols["45_2031"], "assets_45_2031_2040")
-        add(cols["85_2031"], "assets_85_2031_2040")
+        windows = list(self._find_columns(windows).items())
 
-        add(cols["45_2051"], "assets_45_2051_2060")
-        add(cols["85_2051"], "assets_85_2051_2060")
+        stats = self._window_stats([colset for _, colset in windows])
 
-        # Add 12-month 2024 window
-        add(cols["45_2024"], "assets_45_2024")
-        add(cols["85_2024"], "assets_85_2024")
+        qs = list(percentiles or [])
+        pct = {}
+        if qs:
+            values = self._window_percentiles([colset for _, colset in windows], qs)
+            pct = {q: values[i] for i, q in enumerate(qs)}
 
-        # ERA5
-        for yr in self.ERA5_YEARS:
-            label = f"ERA5_{yr}"
-            colset = cols[f"ERA5_{yr}"]
+        return self._write_out([label for label, _ in windows], stats, mean, pct)
 
-            if len(colset) > 0:
-                mm = self._minmax_per_province(colset)
-                self.out[f"min_{label}"] = self.out["provinsi"].map(mm["min"])
-                self.out[f"max_{label}"] = self.out["provinsi"].map(mm["max"])
-            else:
-                self.out[f"min_{label}"] = np.nan
-                self.out[f"max_{label}"] = np.nan
-
-        # Round all numeric columns to 2 decimals
-        numeric_cols = self.out.select_dtypes(include=[np.number]).columns
-        self.out[numeric_cols] = self.out[numeric_cols].round(3)
+    def capacity_weights(self):
+        """Total daya_mw per provinsi aligned to self.provs (computed once)."""
+        if self._capacity is None:
+            cap = self.assets.groupby("provinsi")["daya_mw"].sum()
+            self._capacity = cap.reindex(self.provs).to_numpy(dtype=float)
+        return self._capacity
 
-        return self.out
 
-    def compute_national_temperature(self, scenario="85_2051_2060"):
-        """
-        Compute capacity-weighted MIN/MAX national temperature for a given scenario.
-        scenario key examples:
-            "45_2051_2060"
-            "85_2051_2060"
-        """
+# -------------------------------------
+# CLASS: StreamingClimateExtractor
+# -------------------------------------
 
-        min_col = f"min_assets_{scenario}"
-        max_col = f"max_assets_{scenario}"
+class StreamingClimateExtractor(BaseClimateExtractor):
+    """
+    Streaming variant for overlays that do not fit in memory.
+    Rows are read in chunks of `chunksize`; per-provinsi running
+    min/max/sum/count and HistogramSketch quantiles are updated per chunk,
+    so peak memory is bounded by the chunk size. compute_minmax() gives the
+    same table as ClimateExtractor (percentiles to within sketch_resolution).
+    """
 
-        if min_col not in self.out.columns:
-            raise ValueError(f"Scenario columns not found: {min_col}")
+    def __init__(self, assets_csv, chunksize=5000, sketch_resolution=0.01):
+        self.assets_csv = assets_csv
+        self.chunksize = chunksize
+        self.sketch_resolution = sketch_resolution
 
-        # Compute total capacity per provinsi
-        cap = self.assets.groupby("provinsi")["daya_mw"].sum().reset_index()
-        cap.columns = ["provinsi", "capacity_mw"]
+        self.all_cols = list(pd.read_csv(assets_csv, nrows=0).columns)
+        self.columns = ColumnIndex(self.all_cols)
+        self.parse_errors = {}
 
-        df = self.out.merge(cap, on="provinsi", how="left")
+        self.provs = []
+        self.out = pd.DataFrame({"provinsi": self.provs})
+        self._capacity = None
+
+    @profiled("climate.compute_minmax_streaming")
+    def compute_minmax(self, mean=False, percentiles=None, windows=None):
+        """Same output as ClimateExtractor.compute_minmax, computed chunk by chunk."""
+        windows = list(self._find_columns(windows).items())
+        colsets = [colset for _, colset in windows]
+        W = len(windows)
+        needed = sorted({c for colset in colsets for c in colset})
+        windows_of = {c: [w for w, colset in enumerate(colsets) if c in colset] for c in needed}
+
+        codes_of = {}   # provinsi -> running code (order of first appearance)
+        acc_min = np.empty((0, W))
+        acc_max = np.empty((0, W))
+        acc_sum = np.empty((0, W))
+        acc_cnt = np.empty((0, W))
+        acc_cap = np.empty(0)
+        sketch = HistogramSketch(0, resolution=self.sketch_resolution) if percentiles else None
+        self.parse_errors = {c: 0 for c in needed}
+
+        reader = pd.read_csv(self.assets_csv, usecols=["provinsi", "daya_mw"] + needed,
+                             chunksize=self.chunksize)
+        for chunk in reader:
+            prov = chunk["provinsi"]
+            for p in prov.dropna().unique():
+                codes_of.setdefault(p, len(codes_of))
+            codes = prov.map(codes_of).fillna(-1).to_numpy(dtype=np.int64)
+
+            n_prov = len(codes_of)
+            if n_prov > acc_min.shape[0]:
+                extra = n_prov - acc_min.shape[0]
+                acc_min = np.vstack([acc_min, np.full((extra, W), np.nan)])
+                acc_max = np.vstack([acc_max, np.full((extra, W), np.nan)])
+                acc_sum = np.vstack([acc_sum, np.zeros((extra, W))])
+                acc_cnt = np.vstack([acc_cnt, np.zeros((extra, W))])
+                acc_cap = np.concatenate([acc_cap, np.zeros(extra)])
+                if sketch is not None:
+                    sketch.grow(n_prov * W)
+
+            stats = {}
+            for c in needed:
+                col, errors = decode_list_column(chunk[c].tolist())
+                self.parse_errors[c] += errors
+                stats[c] = ragged_row_stats(col)
+                if sketch is not None:
+                    rows = np.repeat(np.arange(len(chunk)), np.diff(col.offsets))
+                    for w in windows_of[c]:
+                        g = np.where(codes[rows] >= 0, codes[rows] * W + w, -1)
+                        sketch.update(g, col.values)
+
+            row_min, row_max, row_sum, row_cnt = window_row_stats(len(chunk), colsets, stats.__getitem__)
+            ok = codes >= 0
+            np.fmin.at(acc_min, codes[ok], row_min[ok])
+            np.fmax.at(acc_max, codes[ok], row_max[ok])
+            np.add.at(acc_sum, codes[ok], row_sum[ok])
+            np.add.at(acc_cnt, codes[ok], row_cnt[ok])
+            np.add.at(acc_cap, codes[ok], chunk["daya_mw"].fillna(0.0).to_numpy(dtype=float)[ok])
+
+        # align running accumulators to sorted provinces
+        self.provs = sorted(codes_of)
+        order = np.array([codes_of[p] for p in self.provs], dtype=np.int64)
+        self.out = pd.DataFrame({"provinsi": self.provs})
+        self._capacity = acc_cap[order]
 
-        Tnat_min = capacity_weighted(df[min_col], df["capacity_mw"])
-        Tnat_max = capacity_weighted(df[max_col], df["capacity_mw"])
+        stats = {"min": acc_min[order], "max": acc_max[order], "sum": acc_sum[order], "count": acc_cnt[order]}
+        pct = {}
+        for q in percentiles or []:
+            pct[q] = sketch.quantile(q).reshape(-1, W)[order] if W else np.empty((len(order), 0))
 
-        return {
-            "scenario": scenario,
-            "national_min": round(Tnat_min, 3),
-            "national_max": round(Tnat_max, 3)
-        }
+        n_bad = sum(self.parse_errors.values())
+        if n_bad:
+            print(f"[WARN] {n_bad} malformed list cells in {self.assets_csv} (see .parse_errors)")
 
-    def save(self, output_csv):
-        self.out.to_csv(output_csv, index=False)
-        print(f"[OK] Saved climate min–max table to: {output_csv}")
+        return self._write_out([label for label, _ in windows], stats, mean, pct)
@@ -1,7 +1,230 @@
+import threading
+from collections import namedtuple
+
 import pandas as pd
 import numpy as np
 
-from source_ema.f_derating_registry import DERATING_FUNCTIONS  # lookup ke semua fungsi derating   :contentReference[oaicite:1]{index=1}
+from source_ema.f_derating_registry import (
+    LINEAR_DERATING_LAWS,
+    NO_DERATING_COEFFICIENTS,
+    linear_coefficients,
+    linear_multiplier,
+    registry_fingerprint,
+)
+from source_ema.ema_profiling import count, count_law_evaluations, profiled
+
+
+# ==========================================================
+# MAPPING: kontrak kamu → fungsi derating
+# ==========================================================
+
+def map_derating_function(jenis):
+    """Kode jenis PLN → nama fungsi derating di registry (None = tidak terdampak)."""
+    jenis = str(jenis)
+
+    if "PLTGU" in jenis:
+        return "cc_gas_derating"
+    elif "PLTG" in jenis:
+        return "oc_gas_derating"
+    elif "PLTMG" in jenis:
+        return "diesel_derating"
+    elif "PLTDG" in jenis:
+        return "diesel_derating"
+    elif "PLTD" in jenis:
+        return "diesel_derating"
+    elif "PLTBm" in jenis:
+        return "coal_derating"
+    elif "PLTSa" in jenis:
+        return "coal_derating"
+    elif "PLTU MT" in jenis:
+        return "coal_derating"
+    elif "PLTU" in jenis:
+        return "coal_derating"
+    elif "PLTBg" in jenis:
+        return "oc_gas_derating"
+    elif "PLTS-f" in jenis or "PLTS+BESS" in jenis:
+        return "pv_derating"
+    elif "PLTS" in jenis:
+        return "pv_derating"
+    elif "PLTN" in jenis:
+        return "nuclear_derating"
+    else:
+        return None
+
+
+# ==========================================================
+# PLANT TABLE: versi read-only dari dataframe RUKN
+# ==========================================================
+
+# Koefisien piecewise-linear per pembangkit (lihat linear_coefficients di registry):
+#   multiplier(T) = clip(m_ref - alpha * (clip(T, T_lo, T_hi) - T_ref), m_floor, m_ceil)
+COEFFICIENT_FIELDS = ("m_ref", "alpha", "T_ref", "T_lo", "T_hi", "m_floor", "m_ceil")
+
+PlantTable = namedtuple(
+    "PlantTable",
+    ["nama", "jenis", "daya_mw", "total_mw", "function_id"] + list(COEFFICIENT_FIELDS),
+)
+
+
+def _readonly(arr):
+    arr = np.array(arr)
+    arr.flags.writeable = False
+    return arr
+
+
+def compile_plant_table(df, params=None):
+    """
+    Kompilasi dataframe pembangkit (sudah punya kolom derating_function)
+    menjadi PlantTable yang tidak bisa diubah:
+      - array numpy read-only per kolom
+      - function_id: indeks di LINEAR_DERATING_LAWS, -1 = tidak terdampak derating
+      - koefisien COEFFICIENT_FIELDS per pembangkit, default "glob" sudah di-resolve
+    params = override parameter registry (mis. {"alpha_coal": 0.005}), opsional.
+    Aman dibagi antar thread tanpa lock.
+    """
+    params = params or {}
+    n = len(df)
+
+    function_id = np.array(
+        [LINEAR_DERATING_LAWS.index(f) if f in LINEAR_DERATING_LAWS else -1
+         for f in df["derating_function"]],
+        dtype=np.int16,
+    )
+
+    coef = {k: np.full(n, NO_DERATING_COEFFICIENTS[k], dtype=float) for k in COEFFICIENT_FIELDS}
+    for law_id in np.unique(function_id[function_id >= 0]):
+        mask = function_id == law_id
+        c = linear_coefficients(LINEAR_DERATING_LAWS[law_id], **params)
+        count(f"linear_coefficients.{LINEAR_DERATING_LAWS[law_id]}")
+        for k in COEFFICIENT_FIELDS:
+            coef[k][mask] = c[k]
+
+    daya_mw = _readonly(df["daya_mw"].to_numpy(dtype=float))
+
+    return PlantTable(
+        nama=_readonly(df["Nama"].astype(str)) if "Nama" in df.columns else None,
+        jenis=_readonly(df["jenis"].astype(str)),
+        daya_mw=daya_mw,
+        total_mw=float(daya_mw.sum()),
+        function_id=_readonly(function_id),
+        **{k: _readonly(v) for k, v in coef.items()},
+    )
+
+
+def as_plant_table(plants):
+    """
+    PlantTable dari PlantTable itu sendiri atau dari objek dengan plant_table()
+    (mis. DeratingEngine → tabel terkompilasi terkininya).
+    """
+    if isinstance(plants, PlantTable):
+        return plants
+    return plants.plant_table()
+
+
+def derate_plants(table, T):
+    """
+    Evaluasi piecewise-linear untuk semua pembangkit sekaligus.
+    T = array temperatur yang bisa di-broadcast ke (..., pembangkit), mis. (N x 1).
+    Return derated MW dengan shape hasil broadcast.
+    """
+    m = linear_multiplier(T, *(getattr(table, k) for k in COEFFICIENT_FIELDS))
+    if table.daya_mw.size:
+        count_law_evaluations(table.function_id, m.size // table.daya_mw.size)
+    return table.daya_mw * m
+
+
+def derate_plants_or_full(table, T):
+    """
+    Seperti derate_plants, tetapi temperatur NaN (data hilang) → kapasitas penuh
+    pembangkit tersebut, bukan NaN.
+    """
+    T = np.asarray(T)
+    derated = derate_plants(table, T)
+    nan = np.isnan(T)
+    if nan.any():
+        derated = np.where(nan, table.daya_mw, derated)
+    return derated
+
+
+# ==========================================================
+# LOSS CURVE: loss nasional sebagai fungsi piecewise-linear dari T
+# ==========================================================
+
+class LossCurve:
+    """
+    Kurva loss armada (MW) sebagai fungsi T_nat, dihitung tertutup dari PlantTable.
+    Karena tiap pembangkit piecewise-linear, totalnya juga piecewise-linear dengan
+    breakpoint di T_lo/T_hi tiap hukum (16, 25, 35, 45 °C untuk default registry)
+    dan di titik clamp m_floor/m_ceil. Evaluasi = searchsorted, O(log k) per titik.
+    """
+
+    def __init__(self, table):
+        self.total_mw = table.total_mw
+
+        knots = [table.T_lo, table.T_hi]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for bound in (table.m_floor, table.m_ceil):
+                knots.append(table.T_ref + (table.m_ref - bound) / table.alpha)
+        knots = np.concatenate(knots)
+        knots = np.unique(knots[np.isfinite(knots)])
+        if knots.size == 0:
+            knots = np.array([0.0])
+
+        self.breakpoints = knots
+        self.loss_at_breakpoints = self.total_mw - derate_plants(table, knots[:, None]).sum(axis=1)
+
+        # slope[i] berlaku di [breakpoints[i], breakpoints[i+1]); slope terakhir = ekor kanan
+        ends = np.array([[knots[0] - 1.0], [knots[-1] + 1.0]])
+        tail = self.total_mw - derate_plants(table, ends).sum(axis=1)
+        self.slope_left = self.loss_at_breakpoints[0] - tail[0]
+        self.slopes = np.append(
+            np.diff(self.loss_at_breakpoints) / np.diff(knots),
+            tail[1] - self.loss_at_breakpoints[-1],
+        )
+
+    def loss_mw(self, T):
+        """Loss armada (MW) untuk array temperatur apa pun."""
+        T = np.asarray(T, dtype=float)
+        i = np.searchsorted(self.breakpoints, T, side="right") - 1
+        left = i < 0
+        i = np.where(left, 0, i)
+        slope = np.where(left, self.slope_left, self.slopes[i])
+        return self.loss_at_breakpoints[i] + slope * (T - self.breakpoints[i])
+
+    def loss_percent(self, T):
+        return 100 * self.loss_mw(T) / self.total_mw
+
+    def derated_mw(self, T):
+        return self.total_mw - self.loss_mw(T)
+
+    def temperature_at_loss_mw(self, loss_mw):
+        """
+        Invers eksak: T terkecil dengan loss >= loss_mw.
+        -inf jika loss_mw sudah tercapai di semua T, +inf jika tidak pernah tercapai.
+        """
+        y = self.loss_at_breakpoints
+        if np.any(np.diff(y) < 0) or self.slope_left < 0 or self.slopes[-1] < 0:
+            raise ValueError("Loss curve is not monotonic; inverse is undefined")
+
+        L = np.asarray(loss_mw, dtype=float)
+        x = self.breakpoints
+        j = np.searchsorted(y, L, side="left")
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # di bawah breakpoint pertama: ekor kiri
+            below = np.where(self.slope_left > 0, x[0] - (y[0] - L) / self.slope_left, -np.inf)
+            # di atas breakpoint terakhir: ekor kanan
+            above = np.where(self.slopes[-1] > 0, x[-1] + (L - y[-1]) / self.slopes[-1], np.inf)
+            # di dalam segmen (j-1, j)
+            k = np.clip(j - 1, 0, x.size - 1)
+            inside = x[k] + (L - y[k]) / self.slopes[k]
+
+        T = np.where(j == 0, below, np.where(j >= x.size, above, inside))
+        return T if T.ndim else float(T)
+
+    def temperature_at_loss_percent(self, loss_percent):
+        """T terkecil dengan loss >= loss_percent (%) dari kapasitas total."""
+        return self.temperature_at_loss_mw(np.asarray(loss_percent, dtype=float) / 100 * self.total_mw)
 
 
 class DeratingEngine:
@@ -13,56 +236,89 @@ class DeratingEngine:
                     - jenis (kode PLN: PLTU, PLTG, PLTGU, PLTS, dst.)
                     - daya_mw
         """
-        self.df = pd.read_csv(rukn_csv)
+        self.rukn_csv = rukn_csv
+        self._compile_lock = threading.Lock()
+        self._loss_curve = None
+        self.reload()
+
+
+    def reload(self):
+        """Baca ulang file RUKN dan kompilasi ulang tabel pembangkit."""
+        self.df = pd.read_csv(self.rukn_csv)
         self._assign_derating_function()
 
+        # tabel read-only untuk jalur evaluasi murni (evaluate / apply_derating_batch);
+        # dikompilasi saat pertama dipakai, sehingga load hanya membaca CSV
+        self._compiled = (None, None)
+
+
+    @profiled("engine.compile", rows=lambda r, self: len(self.df))
+    def _compile(self):
+        """
+        Kompilasi ulang PlantTable dari self.df dan nilai GLOBAL_* registry saat ini.
+        Tabel baru dibangun dulu, lalu (fingerprint, tabel) dipublikasikan sekaligus
+        sebagai satu tuple, sehingga pembaca tidak pernah melihat fingerprint baru
+        dengan tabel lama.
+        """
+        fp = registry_fingerprint()
+        plants = compile_plant_table(self.df)
+        self._compiled = (fp, plants)
+        return plants
+
+
+    @property
+    def plants(self):
+        """PlantTable terkini (alias plant_table())."""
+        return self.plant_table()
+
+
+    def plant_table(self):
+        """PlantTable terkini; dikompilasi ulang (di bawah lock) jika GLOBAL_* di registry diubah."""
+        fp, plants = self._compiled
+        if registry_fingerprint() != fp:
+            with self._compile_lock:
+                fp, plants = self._compiled
+                if registry_fingerprint() != fp:
+                    plants = self._compile()
+        return plants
+
 
     # ==========================================================
     # MAPPING: kontrak kamu → fungsi derating
     # ==========================================================
 
     def _map_function(self, jenis):
-        jenis = str(jenis)
-
-        if "PLTGU" in jenis:
-            return "cc_gas_derating"
-        elif "PLTG" in jenis:
-            return "oc_gas_derating"
-        elif "PLTMG" in jenis:
-            return "diesel_derating"
-        elif "PLTDG" in jenis:
-            return "diesel_derating"
-        elif "PLTD" in jenis:
-            return "diesel_derating"
-        elif "PLTBm" in jenis:
-            return "coal_derating"
-        elif "PLTSa" in jenis:
-            return "coal_derating"
-        elif "PLTU MT" in jenis:
-            return "coal_derating"
-        elif "PLTU" in jenis:
-            return "coal_derating"
-        elif "PLTBg" in jenis:
-            return "oc_gas_derating"
-        elif "PLTS-f" in jenis or "PLTS+BESS" in jenis:
-            return "pv_derating"
-        elif "PLTS" in jenis:
-            return "pv_derating"
-        elif "PLTN" in jenis:
-            return "nuclear_derating"
-        else:
-            return None
+        return map_derating_function(jenis)
 
 
+    @profiled("engine.map_functions", rows=lambda r, self: len(self.df))
     def _assign_derating_function(self):
-        """Tambahkan kolom derating_function ke dataframe RUKN."""
-        self.df["derating_function"] = self.df["jenis"].apply(self._map_function)
+        """Tambahkan kolom derating_function ke dataframe RUKN (string matching sekali per kode jenis)."""
+        lookup = {jenis: self._map_function(jenis) for jenis in self.df["jenis"].unique()}
+        self.df["derating_function"] = self.df["jenis"].map(lookup)
+
+
+    def loss_curve(self):
+        """LossCurve analitik untuk armada ini (dihitung sekali, di-cache sampai rekompilasi)."""
+        plants = self.plant_table()
+        cached = self._loss_curve
+        if cached is None or cached[0] is not plants:
+            cached = (plants, LossCurve(plants))
+            self._loss_curve = cached
+        return cached[1]
+
+
+    def excluded_plants(self):
+        """Pembangkit tanpa fungsi derating (mis. PLTA, PLTB, PLTP): kapasitas tetap penuh."""
+        mask = self.plant_table().function_id < 0
+        return self.df.loc[mask, [c for c in ("Nama", "jenis", "daya_mw") if c in self.df.columns]]
 
 
     # ==========================================================
     # CORE: APPLY DERATING TO NATIONAL CAPACITY
     # ==========================================================
 
+    @profiled("engine.apply_derating", rows=lambda r, *a, **k: len(r))
     def apply_derating(self, T_nat):
         """
         T_nat = temperatur nasional satu angka (°C).
@@ -70,34 +326,78 @@ class DeratingEngine:
         Return:
           - dataframe dengan derated MW per pembangkit
           - total_derated_capacity
+
+        Catatan: menulis hasil ke self.df (dipakai summarize()), jadi tidak
+        thread-safe. Untuk eksekusi paralel pakai evaluate().
         """
 
-        T_list = [T_nat]     # semua pembangkit pakai temperatur nasional sama
-        derated_values = []
+        derated, _ = self.apply_derating_batch([T_nat])
 
-        for _, row in self.df.iterrows():
+        self.df["derated_mw"] = derated[0]
+        self.df["loss_mw"] = self.df["daya_mw"] - self.df["derated_mw"]
 
-            func_name = row["derating_function"]
-            P = row["daya_mw"]
+        return self.df
 
-            if func_name is None or func_name not in DERATING_FUNCTIONS:
-                derated = P  # tidak terdampak derating
-            else:
-                func = DERATING_FUNCTIONS[func_name]
-                derated = func(tasmax_values=T_list, daya_mw=P)[0]
 
-            derated_values.append(derated)
+    @profiled("engine.derate_batch", rows=lambda r, *a, **k: r[0].size)
+    def apply_derating_batch(self, T_array):
+        """
+        T_array = N temperatur nasional (°C), satu per skenario.
+                  Semua skenario dihitung sekaligus dari koefisien yang sudah dikompilasi.
+        Return:
+          - derated_mw : ndarray (N x jumlah pembangkit), urutan kolom = urutan baris self.df
+          - summary    : dataframe per skenario, kolom sama dengan summarize() + T_nat
+        """
+        plants = self.plant_table()
+        T = np.asarray(T_array, dtype=float).reshape(-1, 1)
+        derated = derate_plants(plants, T)
 
-        self.df["derated_mw"] = derated_values
-        self.df["loss_mw"] = self.df["daya_mw"] - self.df["derated_mw"]
+        total_before = plants.total_mw
+        total_after = derated.sum(axis=1)
+        loss = total_before - total_after
 
-        return self.df
+        summary = pd.DataFrame({
+            "T_nat": T[:, 0],
+            "total_before_mw": np.round(np.full(T.shape[0], total_before), 2),
+            "total_after_mw": np.round(total_after, 2),
+            "total_loss_mw": np.round(loss, 2),
+            "loss_percent": np.round(100 * loss / total_before, 2),
+        })
+
+        return derated, summary
+
+
+    @profiled("engine.evaluate", rows=lambda r, *a, **k: r["derated_mw"].size)
+    def evaluate(self, T_nat):
+        """
+        Versi murni dari apply_derating() + summarize():
+        tidak mengubah self.df maupun state engine lain, sehingga aman dipanggil
+        bersamaan dari banyak thread / proses (evaluator EMA).
+        Return dict:
+          - derated_mw : ndarray per pembangkit (urutan = self.df)
+          - kunci yang sama dengan summarize()
+        """
+        plants = self.plant_table()
+        derated = derate_plants(plants, float(T_nat))
+
+        total_before = plants.total_mw
+        total_after = derated.sum()
+        loss = total_before - total_after
+
+        return {
+            "derated_mw": derated,
+            "total_before_mw": round(total_before, 2),
+            "total_after_mw": round(float(total_after), 2),
+            "total_loss_mw": round(float(loss), 2),
+            "loss_percent": round(float(100 * loss / total_before), 2),
+        }
 
 
     # ==========================================================
     # SUMMARY
     # ==========================================================
 
+    @profiled("engine.summarize", rows=lambda r, self: len(self.df))
     def summarize(self):
         """
         Summary nasional:
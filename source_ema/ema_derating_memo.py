@@ -0,0 +1,175 @@
+# =======================================================
+# ema_derating_memo.py
+# Optional LRU memo cache in front of DeratingEngine.evaluate().
+#   - key = (fleet hash, parameter overrides, quantized T_nat)
+#   - temperatures are rounded to `resolution` °C before evaluation,
+#     so a cached summary is exact for the quantized temperature;
+#     NaN temperatures share one sentinel key
+#   - invalidated automatically when the RUKN csv or any GLOBAL_*
+#     value in the registry changes
+# =======================================================
+
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from source_ema.ema_derating_calculator import COEFFICIENT_FIELDS, compile_plant_table, derate_plants
+from source_ema.f_derating_registry import registry_fingerprint
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "invalidations", "maxsize", "currsize"])
+
+SUMMARY_KEYS = ("total_before_mw", "total_after_mw", "total_loss_mw", "loss_percent")
+
+# Temperature part of the cache key for NaN (float("nan") never equals itself)
+NAN_KEY = "nan"
+
+
+def fleet_hash(plants):
+    """sha256 of the compiled capacities, law ids and coefficients of a PlantTable."""
+    h = hashlib.sha256()
+    for field in ("daya_mw", "function_id") + COEFFICIENT_FIELDS:
+        h.update(np.ascontiguousarray(getattr(plants, field)).tobytes())
+    return h.hexdigest()
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DeratingMemo:
+    """
+    Memoized DeratingEngine.evaluate() for EMA runs that revisit the same
+    (or nearly the same) temperatures.
+
+        memo = DeratingMemo(eng, maxsize=100_000, resolution=0.01)
+        memo.evaluate(31.2345)                    # -> summary dict at T = 31.23
+        memo.evaluate(31.2345, {"alpha_coal": 0.006})
+        memo.evaluate_many(T_array)               # -> dataframe, misses in one batch
+        memo.cache_info()
+    """
+
+    def __init__(self, engine, maxsize=65_536, resolution=0.01):
+        if resolution <= 0:
+            raise ValueError("resolution must be > 0")
+        self.engine = engine
+        self.maxsize = int(maxsize)
+        self.resolution = float(resolution)
+
+        self._entries = OrderedDict()
+        self._tables = {}
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+        self._state = None
+        self._fleet = None
+
+    # ---------------------------
+    # INTERNAL HELPERS
+    # ---------------------------
+
+    def _check_state(self):
+        """Reload / clear when the RUKN csv or the registry globals changed."""
+        stamp = _file_stamp(getattr(self.engine, "rukn_csv", None))
+        state = (stamp, registry_fingerprint())
+        if state == self._state:
+            return
+
+        if self._state is not None and stamp != self._state[0]:
+            self.engine.reload()
+        self._state = state
+        self._tables = {(): self.engine.plant_table()}
+        new_fleet = fleet_hash(self._tables[()])
+        if self._fleet is not None and new_fleet != self._fleet:
+            self.clear()
+            self._invalidations += 1
+        self._fleet = new_fleet
+
+    def _quantize(self, T):
+        q = np.round(np.asarray(T, dtype=float) / self.resolution) * self.resolution
+        return np.round(q, 10)
+
+    @staticmethod
+    def _t_key(t):
+        return NAN_KEY if np.isnan(t) else float(t)
+
+    def _plants_for(self, params_key):
+        if params_key not in self._tables:
+            self._tables[params_key] = compile_plant_table(self.engine.df, dict(params_key))
+        return self._tables[params_key]
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    @staticmethod
+    def _summaries(plants, T):
+        """Summary tuples (same rounding as engine.evaluate) for a 1-D array of T."""
+        total_before = plants.total_mw
+        total_after = derate_plants(plants, T[:, None]).sum(axis=1)
+        loss = total_before - total_after
+        return [
+            (round(total_before, 2), round(float(a), 2), round(float(l), 2),
+             round(float(100 * l / total_before), 2))
+            for a, l in zip(total_after, loss)
+        ]
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+
+    def evaluate(self, T_nat, params=None):
+        """Summary dict (keys as engine.summarize() + T_nat) for the quantized T_nat."""
+        return self.evaluate_many([T_nat], params).iloc[0].to_dict()
+
+    def evaluate_many(self, T_array, params=None):
+        """
+        Summaries for many temperatures; every distinct quantized T that is not
+        cached is evaluated in one batched kernel call.
+        Return dataframe with columns T_nat + summarize() keys.
+        """
+        self._check_state()
+        params_key = tuple(sorted((params or {}).items()))
+
+        Tq = self._quantize(np.ravel(T_array))
+        uniq, inverse = np.unique(Tq, return_inverse=True)
+
+        rows = [None] * uniq.size
+        missing = []
+        for i, t in enumerate(uniq):
+            key = (self._fleet, params_key, self._t_key(t))
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                rows[i] = self._entries[key]
+            else:
+                missing.append(i)
+
+        if missing:
+            plants = self._plants_for(params_key)
+            for i, row in zip(missing, self._summaries(plants, uniq[missing])):
+                rows[i] = row
+                self._store((self._fleet, params_key, self._t_key(uniq[i])), row)
+
+        # one miss per distinct uncached T; repeats within the call count as hits
+        self._misses += len(missing)
+        self._hits += Tq.size - len(missing)
+
+        table = np.array(rows, dtype=float).reshape(-1, len(SUMMARY_KEYS))[inverse]
+        out = pd.DataFrame(table, columns=list(SUMMARY_KEYS))
+        out.insert(0, "T_nat", Tq)
+        return out
+
+    def cache_info(self):
+        return CacheInfo(self._hits, self._misses, self._evictions, self._invalidations,
+                         self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Drop all cached summaries (statistics are kept)."""
+        self._entries.clear()
@@ -0,0 +1,215 @@
+# =======================================================
+# ema_experiment_store.py
+# Incremental, resumable on-disk store for EMA experiments.
+# Layout of one store directory:
+#   - manifest.json        : model hash, design seed + hash, columns, committed batches
+#   - batch_000000/<col>.npy, batch_000001/<col>.npy, ...
+# A batch becomes visible only after its directory is complete and the
+# manifest is atomically replaced, so a killed run never leaves a
+# half-written batch behind. Rerunning with the same design (seed, size
+# and values) + model hash skips every experiment id already stored.
+# =======================================================
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from source_ema.ema_derating_calculator import as_plant_table
+from source_ema.f_derating_registry import registry_fingerprint
+
+
+ID_COLUMN = "experiment_id"
+
+
+def model_hash(plants, space=None):
+    """sha256 over the compiled plant table, the registry defaults and the uncertainty space."""
+    plants = as_plant_table(plants)
+    h = hashlib.sha256()
+    for field in plants._fields:
+        value = getattr(plants, field)
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            h.update(repr(value if not isinstance(value, np.ndarray) else value.tolist()).encode())
+    h.update(repr(registry_fingerprint()).encode())
+    h.update(repr(space).encode())
+    return h.hexdigest()
+
+
+def design_hash(design):
+    """sha256 over the column names and values of a design dataframe (so also its size)."""
+    design = pd.DataFrame(design)
+    h = hashlib.sha256()
+    h.update(repr((list(design.columns), len(design))).encode())
+    for col in design.columns:
+        h.update(np.ascontiguousarray(design[col].to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()
+
+
+class ExperimentStore:
+    """
+    Append-only columnar store of (experiment_id, uncertainties..., outcomes...).
+    Opening an existing store with a different model_hash, seed or design_hash
+    raises ValueError instead of silently mixing runs.
+    """
+
+    def __init__(self, path, model_hash, seed, design_hash=None, n_experiments=None):
+        self.path = path
+        self.manifest_file = os.path.join(path, "manifest.json")
+
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file) as f:
+                self.manifest = json.load(f)
+            stored = self.manifest
+            if (stored["model_hash"], stored["seed"], stored.get("design_hash")) != (model_hash, seed, design_hash):
+                stored_design = stored.get("design_hash") or "none"
+                raise ValueError(
+                    f"Store {path} belongs to another run "
+                    f"(seed={stored['seed']}, n_experiments={stored.get('n_experiments')}, "
+                    f"model_hash={stored['model_hash'][:12]}..., design_hash={stored_design[:12]}...)"
+                )
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.manifest = {"model_hash": model_hash, "seed": seed, "design_hash": design_hash,
+                             "n_experiments": n_experiments, "columns": None, "batches": []}
+            self._write_manifest()
+
+    # ---------------------------
+    # INTERNAL HELPERS
+    # ---------------------------
+
+    def _write_manifest(self):
+        tmp = self.manifest_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_file)
+
+    def _load_column(self, batch, col):
+        return np.load(os.path.join(self.path, batch["dir"], f"{col}.npy"), mmap_mode="r")
+
+    # ---------------------------
+    # WRITE
+    # ---------------------------
+
+    def append(self, frame):
+        """Append one batch (dataframe with an experiment_id column) and commit it."""
+        frame = pd.DataFrame(frame)
+        if ID_COLUMN not in frame.columns:
+            raise ValueError(f"Batch needs an '{ID_COLUMN}' column")
+
+        columns = list(frame.columns)
+        if self.manifest["columns"] is None:
+            self.manifest["columns"] = columns
+        elif columns != self.manifest["columns"]:
+            raise ValueError(f"Batch columns {columns} differ from store columns {self.manifest['columns']}")
+
+        name = f"batch_{len(self.manifest['batches']):06d}"
+        tmp = os.path.join(self.path, name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for col in columns:
+            np.save(os.path.join(tmp, f"{col}.npy"), frame[col].to_numpy())
+        final = os.path.join(self.path, name)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+        self.manifest["batches"].append({"dir": name, "rows": len(frame)})
+        self._write_manifest()
+
+    # ---------------------------
+    # READ (out-of-core)
+    # ---------------------------
+
+    def __len__(self):
+        return sum(b["rows"] for b in self.manifest["batches"])
+
+    def completed_ids(self):
+        if not self.manifest["batches"]:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.asarray(self._load_column(b, ID_COLUMN)) for b in self.manifest["batches"]])
+
+    def iter_batches(self, columns=None):
+        """Yield one dataframe per stored batch, memory-mapping only the requested columns."""
+        columns = columns or self.manifest["columns"] or []
+        for b in self.manifest["batches"]:
+            yield pd.DataFrame({c: self._load_column(b, c) for c in columns})
+
+    def load(self, columns=None):
+        """Concatenate the requested columns of every batch into one dataframe."""
+        frames = list(self.iter_batches(columns))
+        if not frames:
+            return pd.DataFrame(columns=columns or self.manifest["columns"] or [])
+        return pd.concat(frames, ignore_index=True)
+
+    def histogram(self, column, bins=20, range=None):
+        """Streaming histogram of one column -> (counts, edges)."""
+        if range is None:
+            lo, hi = np.inf, -np.inf
+            for frame in self.iter_batches([column]):
+                lo = min(lo, float(np.nanmin(frame[column])))
+                hi = max(hi, float(np.nanmax(frame[column])))
+            range = (lo, hi)
+        edges = np.histogram_bin_edges([], bins=bins, range=range)
+        counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        for frame in self.iter_batches([column]):
+            counts += np.histogram(frame[column], bins=edges)[0]
+        return counts, edges
+
+    def sample(self, columns=None, n=5000, seed=None):
+        """Uniform random sample of at most n rows (e.g. for scatter plots), read batch by batch."""
+        rng = np.random.default_rng(seed)
+        total = len(self)
+        keep = np.sort(rng.choice(total, size=min(n, total), replace=False)) if total else np.empty(0, int)
+        frames, start = [], 0
+        for frame in self.iter_batches(columns):
+            stop = start + len(frame)
+            idx = keep[(keep >= start) & (keep < stop)] - start
+            frames.append(frame.iloc[idx])
+            start = stop
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+# -------------------------------------
+# RESUMABLE RUN
+# -------------------------------------
+
+def run_resumable(store_path, plants, n, seed, batch_size=10_000, evaluate=None, design=None,
+                  space=None, progress=None):
+    """
+    Evaluate an n-experiment design in batches, appending each batch to the store.
+    Experiments already stored (same seed, design and model hash) are skipped, so a
+    rerun after a crash only computes what is missing. Resuming with a different
+    design (e.g. another n for the Latin hypercube) raises ValueError.
+
+    evaluate: callable(design_batch_df) -> outcomes dataframe; default is
+              ema_uncertainty_model.evaluate_design on a Latin hypercube design.
+    """
+    from source_ema import ema_uncertainty_model as um
+
+    if space is None:
+        space = um.uncertainty_space(plants=plants)
+    if design is None:
+        design = um.latin_hypercube(space, n, seed)
+    if evaluate is None:
+        def evaluate(batch):
+            return um.evaluate_design(plants, batch)
+
+    design = pd.DataFrame(design)
+    store = ExperimentStore(store_path, model_hash(plants, space), seed,
+                            design_hash=design_hash(design), n_experiments=len(design))
+    done = set(store.completed_ids().tolist())
+    pending = np.array([i for i in range(len(design)) if i not in done], dtype=np.int64)
+
+    for start in range(0, pending.size, batch_size):
+        ids = pending[start:start + batch_size]
+        batch = design.iloc[ids].reset_index(drop=True)
+        outcomes = pd.DataFrame(evaluate(batch)).reset_index(drop=True)
+        store.append(pd.concat([pd.DataFrame({ID_COLUMN: ids}), batch, outcomes], axis=1))
+        if progress is not None:
+            progress(len(store), len(design))
+
+    return store
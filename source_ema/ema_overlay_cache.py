@@ -0,0 +1,242 @@
+# =======================================================
+# ema_overlay_cache.py
+# Binary cache for the decoded asset-tasmax overlay
+# Layout of one cache directory (<name>.cache/):
+#   - manifest.json : source size/mtime/sha256, column names, parse errors,
+#                     and the name of the live data directory
+#   - data-*/       : immutable data written by one save
+#       - values.npy     : float32, all list columns concatenated (memory-mapped)
+#       - offsets.npy    : int64 (n_list_cols x n_rows+1), row offsets per column
+#       - asset_<i>.npy  : scalar (non-list) asset column i (no pickles)
+#       - asset_<i>_na.npy : missing-value mask of string column i
+# A save stages its data in a private temp directory and publishes it by
+# atomically replacing manifest.json, so concurrent writers never touch each
+# other's files and readers always see one complete cache.
+# =======================================================
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_VERSION = 2
+
+# files written by CACHE_VERSION 1 directly inside the cache directory
+_LEGACY_FILES = ("assets.pkl", "values.npy", "offsets.npy")
+
+
+# -------------------------------------
+# UTILITIES
+# -------------------------------------
+
+def file_sha256(path, block=1 << 20):
+    """Streaming sha256 of a file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(block)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path_for(source_csv, cache_dir):
+    """Cache directory used for a given overlay CSV."""
+    name = os.path.splitext(os.path.basename(source_csv))[0]
+    return os.path.join(cache_dir, f"{name}.cache")
+
+
+def _source_stat(source_csv):
+    st = os.stat(source_csv)
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def _read_manifest(path):
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == CACHE_VERSION else None
+
+
+def _write_json(path, obj):
+    """Write json to path atomically (private temp file + os.replace)."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".manifest-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(obj, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _save_assets(assets, data_dir):
+    """Scalar asset columns as one .npy per column; strings as unicode + missing mask."""
+    columns = []
+    for i, col in enumerate(assets.columns):
+        s = assets[col]
+        if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            np.save(os.path.join(data_dir, f"asset_{i}.npy"), s.to_numpy(), allow_pickle=False)
+            kind = "numeric"
+        else:
+            na = s.isna().to_numpy()
+            text = s.astype(object).where(~na, "").astype(str).to_numpy(dtype=str)
+            np.save(os.path.join(data_dir, f"asset_{i}.npy"), text, allow_pickle=False)
+            np.save(os.path.join(data_dir, f"asset_{i}_na.npy"), na, allow_pickle=False)
+            kind = "string"
+        columns.append({"name": col, "kind": kind, "dtype": str(s.dtype)})
+    return columns
+
+
+def _load_assets(columns, data_dir):
+    data = {}
+    for i, spec in enumerate(columns):
+        values = np.load(os.path.join(data_dir, f"asset_{i}.npy"), allow_pickle=False)
+        if spec["kind"] == "string":
+            na = np.load(os.path.join(data_dir, f"asset_{i}_na.npy"), allow_pickle=False)
+            s = pd.Series(values.astype(object))
+            s[na] = np.nan
+            data[spec["name"]] = s.astype(spec["dtype"])
+        else:
+            data[spec["name"]] = pd.Series(values)
+    return pd.DataFrame(data, columns=[spec["name"] for spec in columns])
+
+
+def _matches_source(manifest, source_csv):
+    """Size/mtime match is trusted; otherwise the sha256 decides. Return (match, mtime_changed)."""
+    stat = _source_stat(source_csv)
+    if stat["size"] != manifest["size"]:
+        return False, False
+    if stat["mtime"] != manifest["mtime"]:
+        return file_sha256(source_csv) == manifest["sha256"], True
+    return True, False
+
+
+# -------------------------------------
+# LOAD / SAVE
+# -------------------------------------
+
+def load_overlay_cache(source_csv, cache_dir):
+    """
+    Return the cached overlay as a dict (assets, tasmax, all_cols, parse_errors),
+    or None if there is no valid cache for the current source file.
+    A size/mtime match is trusted; otherwise the sha256 decides (and the
+    manifest is refreshed when only the mtime changed).
+    """
+    path = cache_path_for(source_csv, cache_dir)
+    # a concurrent save may retire the data directory we just read the manifest
+    # for; the second read then sees the newer manifest
+    for _ in range(2):
+        manifest = _read_manifest(path)
+        if manifest is None:
+            return None
+        match, mtime_changed = _matches_source(manifest, source_csv)
+        if not match:
+            return None
+        try:
+            cached = _load_data(manifest, os.path.join(path, manifest["data"]))
+        except FileNotFoundError:
+            continue
+        if mtime_changed:
+            manifest["mtime"] = _source_stat(source_csv)["mtime"]
+            _write_json(os.path.join(path, "manifest.json"), manifest)
+        return cached
+    return None
+
+
+def _load_data(manifest, data_dir):
+    values = np.load(os.path.join(data_dir, "values.npy"), mmap_mode="r")
+    offsets = np.load(os.path.join(data_dir, "offsets.npy"), mmap_mode="r")
+
+    tasmax = {}
+    for i, (col, start) in enumerate(zip(manifest["list_cols"], manifest["value_starts"])):
+        off = np.asarray(offsets[i])
+        tasmax[col] = (values[start:start + off[-1]], off)
+
+    return {
+        "assets": _load_assets(manifest["asset_columns"], data_dir),
+        "tasmax": tasmax,
+        "all_cols": manifest["all_cols"],
+        "parse_errors": manifest["parse_errors"],
+    }
+
+
+def save_overlay_cache(source_csv, cache_dir, assets, tasmax, all_cols, parse_errors):
+    """
+    Write the decoded overlay next to a manifest keyed on the source file.
+    Safe to call from several processes at once: each writer stages privately,
+    and a writer that finds a complete cache of the same source already
+    published discards its own copy.
+    """
+    path = cache_path_for(source_csv, cache_dir)
+    os.makedirs(path, exist_ok=True)
+    prefix = os.path.basename(path) + "."
+    stage = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=prefix, suffix=".tmp")
+    data_name = "data-" + os.path.basename(stage)[len(prefix):-len(".tmp")]
+
+    try:
+        list_cols = list(tasmax)
+        n_rows = len(assets)
+        offsets = np.zeros((len(list_cols), n_rows + 1), dtype=np.int64)
+        value_starts = []
+        start = 0
+        for i, col in enumerate(list_cols):
+            offsets[i] = tasmax[col][1]
+            value_starts.append(start)
+            start += int(tasmax[col][1][-1])
+
+        values = np.lib.format.open_memmap(os.path.join(stage, "values.npy"), mode="w+",
+                                           dtype=np.float32, shape=(start,))
+        for col, s0 in zip(list_cols, value_starts):
+            v = tasmax[col][0]
+            values[s0:s0 + len(v)] = v
+        values.flush()
+        del values
+
+        np.save(os.path.join(stage, "offsets.npy"), offsets)
+        asset_columns = _save_assets(assets, stage)
+
+        manifest = {
+            "version": CACHE_VERSION,
+            "source": os.path.abspath(source_csv),
+            "sha256": file_sha256(source_csv),
+            **_source_stat(source_csv),
+            "data": data_name,
+            "all_cols": list(all_cols),
+            "list_cols": list_cols,
+            "value_starts": value_starts,
+            "asset_columns": asset_columns,
+            "parse_errors": {k: int(v) for k, v in parse_errors.items()},
+        }
+
+        # lost the race to a writer that already published this source: done
+        current = _read_manifest(path)
+        if current is not None and current["sha256"] == manifest["sha256"] \
+                and os.path.isdir(os.path.join(path, current["data"])):
+            return path
+
+        # data directory first (unique name, atomic rename), then the manifest
+        os.rename(stage, os.path.join(path, data_name))
+        stage = None
+        _write_json(os.path.join(path, "manifest.json"), manifest)
+    finally:
+        if stage is not None:
+            shutil.rmtree(stage, ignore_errors=True)
+
+    # retire what the replaced manifest pointed to (never the live directory)
+    if current is not None and current["data"] != data_name:
+        shutil.rmtree(os.path.join(path, current["data"]), ignore_errors=True)
+    for name in _LEGACY_FILES:
+        legacy = os.path.join(path, name)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+    return path
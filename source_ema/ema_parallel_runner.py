@@ -0,0 +1,124 @@
+# =======================================================
+# ema_parallel_runner.py
+# Process-pool runner for large EMA temperature sweeps.
+#   - compiled plant/coefficient arrays are written ONCE to a
+#     memory-mapped file that every worker maps read-only
+#   - scenarios are fanned out in batches over a process pool
+#   - workers write straight into preallocated, memory-mapped
+#     outcome arrays (no pickling of results, no pandas in workers)
+# =======================================================
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from source_ema.f_derating_registry import linear_multiplier
+
+
+# Rows of the packed plant table (fields x plants, float64)
+PLANT_FIELDS = ("daya_mw", "m_ref", "alpha", "T_ref", "T_lo", "T_hi", "m_floor", "m_ceil")
+OUTCOMES = ("loss_mw", "loss_percent")
+
+# Upper bound on scenarios x plants elements evaluated at once inside a worker
+BLOCK_ELEMENTS = 4_000_000
+
+
+# -------------------------------------
+# WORKER SIDE
+# -------------------------------------
+
+_worker = {}
+
+
+def _init_worker(workdir):
+    """Map the shared plant table, scenarios and outcome arrays once per worker."""
+    _worker["plants"] = np.load(os.path.join(workdir, "plants.npy"), mmap_mode="r")
+    _worker["T"] = np.load(os.path.join(workdir, "T.npy"), mmap_mode="r")
+    for name in OUTCOMES:
+        _worker[name] = np.load(os.path.join(workdir, f"{name}.npy"), mmap_mode="r+")
+
+
+def evaluate_block(packed, T):
+    """Fleet loss (MW, %) for a 1-D array of national temperatures."""
+    P = packed[0]
+    coef = packed[1:]
+    total = P.sum()
+    step = max(1, BLOCK_ELEMENTS // max(1, P.size))
+
+    loss = np.empty(T.size)
+    for i in range(0, T.size, step):
+        m = linear_multiplier(T[i:i + step, None], *coef)
+        loss[i:i + step] = total - (P * m).sum(axis=1)
+    return loss, 100 * loss / total
+
+
+def _run_batch(start, stop):
+    loss_mw, loss_percent = evaluate_block(_worker["plants"], np.asarray(_worker["T"][start:stop]))
+    _worker["loss_mw"][start:stop] = loss_mw
+    _worker["loss_percent"][start:stop] = loss_percent
+    return start, stop
+
+
+# -------------------------------------
+# MAIN SIDE
+# -------------------------------------
+
+def pack_plant_table(plants):
+    """PlantTable -> float64 array (len(PLANT_FIELDS) x plants)."""
+    return np.vstack([np.asarray(getattr(plants, f), dtype=float) for f in PLANT_FIELDS])
+
+
+def run_experiments(plants, T_values, n_workers=None, batch_size=50_000,
+                    workdir=None, mp_context=None, progress=None):
+    """
+    Evaluate fleet loss for every national temperature in T_values on a process pool.
+
+    plants    : PlantTable or DeratingEngine (its current compiled table is used)
+    T_values  : 1-D array of T_nat scenarios
+    workdir   : directory for the memory-mapped arrays (default: temp dir in
+                /dev/shm when available, removed afterwards)
+    progress  : optional callback(n_done, n_total) called as batches finish
+
+    Return dict {"loss_mw": ndarray, "loss_percent": ndarray}.
+    """
+    # imported here so worker processes (which import this module) stay free of pandas
+    from source_ema.ema_derating_calculator import as_plant_table
+
+    plants = as_plant_table(plants)
+
+    T_values = np.ascontiguousarray(T_values, dtype=float).ravel()
+    n = T_values.size
+
+    keep = workdir is not None
+    if workdir is None:
+        workdir = tempfile.mkdtemp(prefix="ema_runner_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    os.makedirs(workdir, exist_ok=True)
+
+    try:
+        np.save(os.path.join(workdir, "plants.npy"), pack_plant_table(plants))
+        np.save(os.path.join(workdir, "T.npy"), T_values)
+        for name in OUTCOMES:
+            out = np.lib.format.open_memmap(os.path.join(workdir, f"{name}.npy"), mode="w+",
+                                            dtype=np.float64, shape=(n,))
+            out.flush()
+            del out
+
+        batches = [(i, min(i + batch_size, n)) for i in range(0, n, batch_size)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context,
+                                 initializer=_init_worker, initargs=(workdir,)) as pool:
+            futures = [pool.submit(_run_batch, start, stop) for start, stop in batches]
+            for fut in as_completed(futures):
+                start, stop = fut.result()
+                done += stop - start
+                if progress is not None:
+                    progress(done, n)
+
+        return {name: np.array(np.load(os.path.join(workdir, f"{name}.npy"), mmap_mode="r"))
+                for name in OUTCOMES}
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,356 @@
+# =======================================================
+# ema_pipeline.py
+# Cached DAG runner for the overlay csv -> EMA outcomes workflow:
+#
+#   climate  (ClimateExtractor -> compute_minmax -> save + national T)
+#   derating (DeratingEngine -> compiled per-plant coefficients)
+#   ema      (T_nat design over the national range -> loss outcomes)
+#   plots    (scatter / histogram pngs)
+#
+# Every stage has a content key = sha256 of its parameters, input file
+# hashes, the source of its stage function, the source files of the code
+# modules it declares (e.g. ema_derating_calculator + f_derating_registry
+# for derating), an optional extra fingerprint (registry_fingerprint for
+# derating) and the output hashes of its dependencies. A stage reruns only when its key changed or an output is
+# missing/modified, and independent stages run concurrently.
+# State is kept in <output_dir>/pipeline_manifest.json.
+# =======================================================
+
+import argparse
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from source_ema.ema_overlay_cache import file_sha256
+from source_ema.f_derating_registry import registry_fingerprint
+
+
+Stage = namedtuple("Stage", ["name", "func", "inputs", "outputs", "deps", "params", "fingerprint", "code"],
+                   defaults=({}, {}, (), {}, None, ()))
+Stage.__doc__ = """
+    name        : unique stage name
+    func        : callable(inputs, outputs, params); inputs = own files + dependency outputs
+    inputs      : {key: file path} read by the stage
+    outputs     : {key: file path} written by the stage
+    deps        : names of upstream stages
+    params      : json-serializable parameters
+    fingerprint : optional callable() -> json-serializable extra state
+    code        : names of the modules whose source the stage depends on
+                  (its own function's source is always included)
+"""
+
+
+def _json_key(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def _func_source_hash(func):
+    try:
+        return hashlib.sha256(inspect.getsource(func).encode()).hexdigest()
+    except (OSError, TypeError):
+        return None
+
+
+def module_path(name):
+    """Source file of a module, located without importing it (None if not found)."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec is not None and spec.has_location else None
+
+
+# -------------------------------------
+# CLASS: Pipeline
+# -------------------------------------
+
+class Pipeline:
+
+    def __init__(self, stages, manifest_path):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        for s in stages:
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {s.name} depends on unknown stages {missing}")
+        self.order = self._toposort()
+        self.manifest_path = manifest_path
+        self.manifest = self._load_manifest()
+        self._file_hashes = {}
+
+    # ---------------------------
+    # INTERNAL HELPERS
+    # ---------------------------
+
+    def _toposort(self):
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "active":
+                raise ValueError(f"Cycle in pipeline at stage {name}")
+            state[name] = "active"
+            for d in self.stages[name].deps:
+                visit(d)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _hash_file(self, path):
+        """sha256 of a file, memoized on (size, mtime) for this run."""
+        st = os.stat(path)
+        stamp = (path, st.st_size, st.st_mtime_ns)
+        if stamp not in self._file_hashes:
+            self._file_hashes[stamp] = file_sha256(path)
+        return self._file_hashes[stamp]
+
+    def _code_hashes(self, modules):
+        """{module: sha256 of its source file} for the stage's declared code modules."""
+        out = {}
+        for m in modules:
+            path = module_path(m)
+            out[m] = self._hash_file(path) if path and os.path.exists(path) else None
+        return out
+
+    def stage_key(self, name):
+        s = self.stages[name]
+        return _json_key({
+            "stage": name,
+            "params": s.params,
+            "inputs": {k: self._hash_file(p) for k, p in sorted(s.inputs.items())},
+            "source": _func_source_hash(s.func),
+            "code": self._code_hashes(s.code),
+            "fingerprint": s.fingerprint() if s.fingerprint else None,
+            "deps": {d: self.manifest.get(d, {}).get("outputs") for d in s.deps},
+        })
+
+    def _up_to_date(self, name, key):
+        entry = self.manifest.get(name)
+        if not entry or entry.get("key") != key:
+            return False
+        for k, path in self.stages[name].outputs.items():
+            if not os.path.exists(path) or self._hash_file(path) != entry["outputs"].get(k):
+                return False
+        return True
+
+    def _run_stage(self, name):
+        s = self.stages[name]
+        inputs = dict(s.inputs)
+        for d in s.deps:
+            inputs.update(self.stages[d].outputs)
+        for path in s.outputs.values():
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        t0 = time.perf_counter()
+        s.func(inputs, dict(s.outputs), dict(s.params))
+        return time.perf_counter() - t0
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+
+    def run(self, targets=None, force=(), max_workers=None):
+        """
+        Run the stages needed for targets (default: all), skipping stages whose key
+        and outputs are unchanged. force = stage names to rerun regardless.
+        Return {stage: "ran" | "cached"} in execution order.
+        """
+        needed = set()
+
+        def collect(name):
+            if name not in needed:
+                needed.add(name)
+                for d in self.stages[name].deps:
+                    collect(d)
+
+        for t in targets or self.order:
+            collect(t)
+
+        status, done, running = {}, set(), {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while len(done) < len(needed):
+                for name in self.order:
+                    if name in needed and name not in done and name not in running \
+                            and all(d in done for d in self.stages[name].deps):
+                        key = self.stage_key(name)
+                        if name not in force and self._up_to_date(name, key):
+                            status[name] = "cached"
+                            done.add(name)
+                            continue
+                        running[name] = (pool.submit(self._run_stage, name), key)
+
+                if not running:
+                    continue
+                finished, _ = wait([f for f, _ in running.values()], return_when=FIRST_COMPLETED)
+                for name, (fut, key) in list(running.items()):
+                    if fut not in finished:
+                        continue
+                    seconds = fut.result()
+                    del running[name]
+                    self.manifest[name] = {
+                        "key": key,
+                        "outputs": {k: self._hash_file(p) for k, p in self.stages[name].outputs.items()},
+                        "seconds": round(seconds, 3),
+                        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    }
+                    self._save_manifest()
+                    status[name] = "ran"
+                    done.add(name)
+        return status
+
+
+# -------------------------------------
+# DEFAULT EMA PIPELINE
+# -------------------------------------
+
+def climate_stage(inputs, outputs, params):
+    from source_ema.ema_climate_extractor import ClimateExtractor
+
+    ce = ClimateExtractor(inputs["overlay_csv"], cache_dir=params.get("cache_dir"))
+    ce.compute_minmax()
+    ce.save(outputs["province_minmax"])
+    ce.compute_national_temperatures().to_csv(outputs["national"], index=False)
+
+
+def derating_stage(inputs, outputs, params):
+    import pandas as pd
+    from source_ema.ema_derating_calculator import COEFFICIENT_FIELDS, DeratingEngine
+
+    eng = DeratingEngine(inputs["rukn_csv"])
+    plants = eng.plants
+    table = pd.DataFrame({f: getattr(plants, f) for f in ("jenis", "daya_mw", "function_id") + COEFFICIENT_FIELDS})
+    table.to_csv(outputs["plants"], index=False)
+
+
+def ema_stage(inputs, outputs, params):
+    import pandas as pd
+    from source_ema.ema_derating_calculator import COEFFICIENT_FIELDS, PlantTable
+    from source_ema.ema_uncertainty_model import evaluate_design, latin_hypercube
+
+    national = pd.read_csv(inputs["national"]).set_index("scenario")
+    lo = float(national.loc[params["T_min_scenario"], "national_min"])
+    hi = float(national.loc[params["T_max_scenario"], "national_max"])
+
+    table = pd.read_csv(inputs["plants"])
+    daya = table["daya_mw"].to_numpy(dtype=float)
+    plants = PlantTable(
+        nama=None,
+        jenis=table["jenis"].to_numpy(),
+        daya_mw=daya,
+        total_mw=float(daya.sum()),
+        function_id=table["function_id"].to_numpy(),
+        **{f: table[f].to_numpy(dtype=float) for f in COEFFICIENT_FIELDS},
+    )
+
+    design = latin_hypercube([("T_nat", lo, hi)], params["n_experiments"], params["seed"])
+    out = evaluate_design(plants, design)
+    pd.concat([design, out.round(2)], axis=1).to_csv(outputs["experiments"], index=False)
+
+
+def plots_stage(inputs, outputs, params):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    df = pd.read_csv(inputs["experiments"])
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+    axes[0].scatter(df["T_nat"], df["loss_percent"], alpha=0.6)
+    axes[0].set_xlabel("National Temperature (°C)")
+    axes[0].set_ylabel("Loss Percent (%)")
+    axes[1].scatter(df["T_nat"], df["loss_mw"], alpha=0.6)
+    axes[1].set_xlabel("National Temperature (°C)")
+    axes[1].set_ylabel("Loss (MW)")
+    axes[2].hist(df["T_nat"], bins=20, edgecolor="black")
+    axes[2].set_xlabel("T_nat (°C)")
+    axes[2].set_ylabel("Frequency")
+    for ax in axes:
+        ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(outputs["figure"], dpi=120)
+    plt.close(fig)
+
+
+# Code modules each default stage depends on (hashed into its key)
+CLIMATE_CODE = ("source_ema.ema_climate_extractor", "source_ema.ema_overlay_cache")
+DERATING_CODE = ("source_ema.ema_derating_calculator", "source_ema.f_derating_registry")
+EMA_CODE = ("source_ema.ema_uncertainty_model",) + DERATING_CODE
+
+
+def default_pipeline(overlay_csv, rukn_csv, output_dir, n_experiments=1000, seed=0,
+                     T_min_scenario="ERA5_2024", T_max_scenario="85_2051_2060", cache_dir=None,
+                     plots=True):
+    """The notebook workflow as a Pipeline writing into output_dir."""
+    out = lambda name: os.path.join(output_dir, name)
+
+    stages = [
+        Stage("climate", climate_stage,
+              inputs={"overlay_csv": overlay_csv},
+              outputs={"province_minmax": out("temperature_province_MINMAX_ASSETS.csv"),
+                       "national": out("national_temperatures.csv")},
+              params={"cache_dir": cache_dir},
+              code=CLIMATE_CODE),
+        Stage("derating", derating_stage,
+              inputs={"rukn_csv": rukn_csv},
+              outputs={"plants": out("derating_plants.csv")},
+              fingerprint=registry_fingerprint,
+              code=DERATING_CODE),
+        Stage("ema", ema_stage,
+              outputs={"experiments": out("ema_experiments.csv")},
+              deps=("climate", "derating"),
+              params={"n_experiments": n_experiments, "seed": seed,
+                      "T_min_scenario": T_min_scenario, "T_max_scenario": T_max_scenario},
+              code=EMA_CODE),
+    ]
+    if plots:
+        stages.append(Stage("plots", plots_stage, outputs={"figure": out("ema_loss_plots.png")}, deps=("ema",)))
+    return Pipeline(stages, out("pipeline_manifest.json"))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run the cached EMA pipeline.")
+    p.add_argument("overlay_csv")
+    p.add_argument("--rukn-csv", default="data/ruptl_rukn/rukn_2060_Indonesia_capacity.csv")
+    p.add_argument("--output-dir", default="output_ema/pipeline")
+    p.add_argument("--experiments", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--t-min-scenario", default="ERA5_2024")
+    p.add_argument("--t-max-scenario", default="85_2051_2060")
+    p.add_argument("--cache-dir", default=None)
+    p.add_argument("--no-plots", action="store_true")
+    p.add_argument("--force", nargs="*", default=[], help="stages to rerun regardless of cache")
+    p.add_argument("--workers", type=int, default=None)
+    args = p.parse_args(argv)
+
+    pipe = default_pipeline(args.overlay_csv, args.rukn_csv, args.output_dir, args.experiments, args.seed,
+                            args.t_min_scenario, args.t_max_scenario, args.cache_dir, not args.no_plots)
+    status = pipe.run(force=set(args.force), max_workers=args.workers)
+    for name, st in status.items():
+        print(f"[{st.upper():6s}] {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# =======================================================
+# ema_profiling.py
+# Opt-in, lightweight profiling for the EMA pipeline.
+#   - stage("name") context manager and @profiled("name") decorator
+#     record wall time, call count and rows processed per stage
+#   - nested stages are kept as call paths ("a;b;c") for a flame-style view
+#   - counters for what the engines actually execute:
+#       compiled.<law>             plant x temperature evaluations of the
+#                                  compiled piecewise-linear coefficients
+#       linear_coefficients.<law>  coefficient compilations
+#       DERATING_FUNCTIONS.<name> / ARRAY_DERATING_FUNCTIONS.<name>
+#                                  direct registry calls (list API / kernels)
+# Disabled by default: a disabled stage or counter costs one attribute check.
+#
+#   from source_ema import ema_profiling as prof
+#   prof.enable()
+#   ... run extractor / engine / EMA ...
+#   print(prof.summary())
+#   prof.dump_json("profile.json"); prof.dump_collapsed("profile.folded")
+# =======================================================
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from source_ema import f_derating_registry as registry
+
+# Registry dicts whose entries are wrapped with call counters
+REGISTRY_TABLES = ("DERATING_FUNCTIONS", "ARRAY_DERATING_FUNCTIONS")
+
+
+class _Profiler:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {}          # path -> [calls, seconds, rows]
+        self.counters = {}       # name -> count
+        self._originals = None
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def record(self, path, seconds, rows):
+        with self._lock:
+            s = self.stats.setdefault(path, [0, 0.0, 0])
+            s[0] += 1
+            s[1] += seconds
+            s[2] += rows
+
+
+PROFILER = _Profiler()
+
+
+# -------------------------------------
+# SWITCHES
+# -------------------------------------
+
+def enable(registry_calls=True):
+    """Start recording (and, by default, counting direct registry calls)."""
+    PROFILER.enabled = True
+    if registry_calls:
+        count_registry_calls()
+
+
+def disable():
+    """Stop recording and restore the original registry functions."""
+    PROFILER.enabled = False
+    restore_registry()
+
+
+def reset():
+    with PROFILER._lock:
+        PROFILER.stats.clear()
+        PROFILER.counters.clear()
+
+
+def is_enabled():
+    return PROFILER.enabled
+
+
+# -------------------------------------
+# STAGES
+# -------------------------------------
+
+class _Stage:
+    """Handle yielded by stage(); add_rows() attributes processed rows to it."""
+
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = 0
+
+    def add_rows(self, n):
+        self.rows += int(n)
+
+
+@contextmanager
+def stage(name, rows=0):
+    """Time a block as one call of `name`, nested under any enclosing stage."""
+    if not PROFILER.enabled:
+        yield _Stage()
+        return
+
+    stack = PROFILER._stack()
+    stack.append(name)
+    handle = _Stage()
+    handle.rows = int(rows)
+    t0 = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        elapsed = time.perf_counter() - t0
+        PROFILER.record(";".join(stack), elapsed, handle.rows)
+        stack.pop()
+
+
+def profiled(name=None, rows=None):
+    """
+    Decorator form of stage().
+    rows: optional callable(result, *args, **kwargs) -> number of rows processed.
+    """
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with stage(label) as s:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    s.add_rows(rows(result, *args, **kwargs))
+                return result
+        return wrapper
+    return decorator
+
+
+# -------------------------------------
+# COUNTERS
+# -------------------------------------
+
+def count(name, n=1):
+    """Add n to counter `name` (no-op while disabled)."""
+    if PROFILER.enabled:
+        with PROFILER._lock:
+            PROFILER.counters[name] = PROFILER.counters.get(name, 0) + int(n)
+
+
+def count_law_evaluations(function_id, n_steps, laws=registry.LINEAR_DERATING_LAWS):
+    """
+    Count compiled evaluations per law: plants with each function_id x n_steps
+    temperatures (function_id -1 -> "no_derating").
+    """
+    if not PROFILER.enabled or n_steps <= 0:
+        return
+    ids, n = np.unique(np.asarray(function_id), return_counts=True)
+    for law_id, k in zip(ids, n):
+        law = laws[law_id] if law_id >= 0 else "no_derating"
+        count(f"compiled.{law}", int(k) * int(n_steps))
+
+
+def _counting(name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        count(name)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def count_registry_calls():
+    """Wrap every DERATING_FUNCTIONS / ARRAY_DERATING_FUNCTIONS entry with a call counter (idempotent)."""
+    if PROFILER._originals is not None:
+        return
+    PROFILER._originals = {t: dict(getattr(registry, t)) for t in REGISTRY_TABLES}
+    for table, originals in PROFILER._originals.items():
+        funcs = getattr(registry, table)
+        for name, fn in originals.items():
+            funcs[name] = _counting(f"{table}.{name}", fn)
+
+
+def restore_registry():
+    if PROFILER._originals is not None:
+        for table, originals in PROFILER._originals.items():
+            getattr(registry, table).update(originals)
+        PROFILER._originals = None
+
+
+# -------------------------------------
+# OUTPUT
+# -------------------------------------
+
+def report():
+    """Dict with per-path stats (calls, total/self seconds, rows) and counters."""
+    with PROFILER._lock:
+        stats = {p: list(v) for p, v in PROFILER.stats.items()}
+        counters = dict(PROFILER.counters)
+
+    # self time = total time minus time of direct children
+    child_time = {}
+    for path, (_, seconds, _) in stats.items():
+        if ";" in path:
+            parent = path.rsplit(";", 1)[0]
+            child_time[parent] = child_time.get(parent, 0.0) + seconds
+
+    stages = []
+    for path, (n, seconds, rows) in sorted(stats.items()):
+        stages.append({
+            "path": path,
+            "stage": path.rsplit(";", 1)[-1],
+            "calls": n,
+            "total_s": seconds,
+            "self_s": max(seconds - child_time.get(path, 0.0), 0.0),
+            "rows": rows,
+            "rows_per_s": rows / seconds if rows and seconds > 0 else None,
+        })
+    return {"stages": stages, "counters": counters}
+
+
+def dump_json(path):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+def collapsed():
+    """Collapsed-stack lines ("a;b;c <self microseconds>") for flamegraph.pl / speedscope."""
+    return "\n".join(f"{s['path']} {int(round(s['self_s'] * 1e6))}" for s in report()["stages"])
+
+
+def dump_collapsed(path):
+    with open(path, "w") as f:
+        f.write(collapsed() + "\n")
+
+
+def summary():
+    """Indented text tree of stages with total time, share of root time, calls and rows."""
+    rep = report()
+    roots = sum(s["total_s"] for s in rep["stages"] if ";" not in s["path"]) or 1.0
+    lines = [f"{'stage':50s} {'total ms':>10s} {'%':>6s} {'calls':>8s} {'rows':>10s}"]
+    for s in rep["stages"]:
+        depth = s["path"].count(";")
+        label = "  " * depth + s["stage"]
+        lines.append(f"{label:50s} {s['total_s'] * 1e3:10.2f} {100 * s['total_s'] / roots:6.1f} "
+                     f"{s['calls']:8d} {s['rows']:10d}")
+    if rep["counters"]:
+        lines.append("")
+        lines.append("Counters (evaluations / calls):")
+        for name, n in sorted(rep["counters"].items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:48s} {n:12d}")
+    return "\n".join(lines)
@@ -0,0 +1,140 @@
+# =======================================================
+# ema_quantile_sketch.py
+# Mergeable fixed-resolution histogram sketch for streaming quantiles.
+# One histogram per group (e.g. provinsi x window). Bins lie on a fixed
+# grid (bin k = [k * resolution, (k+1) * resolution)) but only the span of
+# bins actually observed is stored, growing as new values arrive, so memory
+# follows the data range rather than a preset [lo, hi).
+# Quantile error: at most resolution / 2 (values are taken at bin centres).
+# =======================================================
+
+import numpy as np
+
+
+class HistogramSketch:
+    """
+    Streaming quantile sketch over n_groups independent groups.
+
+    counts has shape (n_groups, n_bins) and covers the grid bins
+    first_bin .. first_bin + n_bins - 1 seen so far (n_groups x span / resolution
+    int64 values; e.g. tasmax 15-45 degC at 0.01 -> 3,000 bins per group).
+    update() never needs more scratch memory than the chunk it is given;
+    merge() adds counts, so per-chunk or per-worker sketches combine exactly.
+
+    Every value is represented by the centre of its bin, so quantile() is within
+    resolution / 2 of np.percentile on the raw values; exceedance(t) counts the
+    values in t's bin and above (exact when t is a bin edge).
+    lo / hi optionally pre-size the range; values outside it still extend it.
+    """
+
+    def __init__(self, n_groups=0, lo=None, hi=None, resolution=0.01):
+        self.resolution = float(resolution)
+        self.first_bin = 0
+        self.counts = np.zeros((n_groups, 0), dtype=np.int64)
+        if lo is not None and hi is not None:
+            self._cover(self._bin_of(lo), self._bin_of(hi) - 1)
+
+    @property
+    def n_groups(self):
+        return self.counts.shape[0]
+
+    @property
+    def n_bins(self):
+        return self.counts.shape[1]
+
+    @property
+    def lo(self):
+        """Left edge of the first stored bin."""
+        return self.first_bin * self.resolution
+
+    @property
+    def hi(self):
+        """Right edge of the last stored bin."""
+        return (self.first_bin + self.n_bins) * self.resolution
+
+    def _bin_of(self, values):
+        return np.floor(np.asarray(values, dtype=np.float64) / self.resolution).astype(np.int64)
+
+    def bin_centres(self):
+        return (self.first_bin + np.arange(self.n_bins) + 0.5) * self.resolution
+
+    def grow(self, n_groups):
+        """Add empty groups until there are n_groups."""
+        if n_groups > self.n_groups:
+            extra = np.zeros((n_groups - self.n_groups, self.n_bins), dtype=np.int64)
+            self.counts = np.vstack([self.counts, extra])
+
+    def _cover(self, b_lo, b_hi):
+        """Extend the stored bins to include grid bins b_lo..b_hi."""
+        if self.n_bins == 0:
+            self.first_bin = int(b_lo)
+            self.counts = np.zeros((self.n_groups, int(b_hi - b_lo) + 1), dtype=np.int64)
+            return
+        left = max(0, self.first_bin - int(b_lo))
+        right = max(0, int(b_hi) - (self.first_bin + self.n_bins - 1))
+        if left or right:
+            self.counts = np.pad(self.counts, ((0, 0), (left, right)))
+            self.first_bin -= left
+
+    def update(self, groups, values):
+        """Add values (NaN ignored) to their groups."""
+        groups = np.asarray(groups, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(values) & (groups >= 0)
+        if not ok.any():
+            return
+        groups = groups[ok]
+        bins = self._bin_of(values[ok])
+        b_lo, b_hi = int(bins.min()), int(bins.max())
+        self._cover(b_lo, b_hi)
+
+        # histogram over (touched groups x bins spanned by this chunk) when that is
+        # no larger than the chunk itself, otherwise sort-and-count the flat keys
+        present = np.bincount(groups, minlength=self.n_groups) > 0
+        touched = np.flatnonzero(present)
+        span = b_hi - b_lo + 1
+        if touched.size * span <= groups.size:
+            local = (np.cumsum(present) - 1)[groups]
+            hist = np.bincount(local * span + (bins - b_lo), minlength=touched.size * span)
+            start = b_lo - self.first_bin
+            self.counts[touched, start:start + span] += hist.reshape(touched.size, span)
+        else:
+            keys, n = np.unique(groups * self.n_bins + (bins - self.first_bin), return_counts=True)
+            self.counts.reshape(-1)[keys] += n
+
+    def merge(self, other):
+        if other.resolution != self.resolution:
+            raise ValueError("Cannot merge sketches with different bins")
+        self.grow(other.n_groups)
+        if other.n_bins == 0:
+            return
+        self._cover(other.first_bin, other.first_bin + other.n_bins - 1)
+        start = other.first_bin - self.first_bin
+        self.counts[:other.n_groups, start:start + other.n_bins] += other.counts
+
+    def count(self):
+        return self.counts.sum(axis=1)
+
+    def quantile(self, q):
+        """
+        q in [0, 100] (scalar) -> array (n_groups,) of bin-centre quantiles,
+        using the same rank convention as np.percentile; NaN for empty groups.
+        """
+        n = self.count()
+        cum = np.cumsum(self.counts, axis=1)
+        pos = q / 100.0 * (n - 1)          # fractional 0-based rank
+        centres = self.bin_centres()
+        out = np.full(self.n_groups, np.nan)
+        for g in np.flatnonzero(n > 0):
+            r0 = int(np.floor(pos[g]))
+            r1 = min(r0 + 1, int(n[g]) - 1)
+            b0, b1 = np.searchsorted(cum[g], [r0, r1], side="right")
+            out[g] = centres[b0] + (pos[g] - r0) * (centres[b1] - centres[b0])
+        return out
+
+    def exceedance(self, threshold):
+        """Fraction of values >= threshold per group (bins from the threshold's bin up)."""
+        b = int(np.clip(self._bin_of(threshold) - self.first_bin, 0, self.n_bins))
+        n = self.count()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.counts[:, b:].sum(axis=1) / n
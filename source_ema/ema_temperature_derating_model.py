@@ -1,34 +1,161 @@
-from ema_workbench import Model, RealParameter, ScalarOutcome
-from ema_workbench import perform_experiments
-from source_ema.ema_derating_calculator import DeratingEngine
+# =======================================================
+# ema_temperature_derating_model.py
+# Entry point for the single-uncertainty EMA temperature derating model.
+#   - build_model(config) factory: nothing heavy happens at import time
+#   - ema_workbench and the RUKN csv are only loaded when a model is built
+#   - CLI: python -m source_ema.ema_temperature_derating_model --help
+# For backward compatibility `eng`, `model_function` and `ema_model` are
+# still importable; they are built on first access with DEFAULT_CONFIG.
+# =======================================================
 
-# === 1. INIT ENGINE ===
-eng = DeratingEngine("rukn_2060_Indonesia_capacity.csv")
+import argparse
+import json
+import os
+import sys
+import time
 
-# === 2. DEFINE EMA MODEL FUNCTION ===
-def model_function(experiment):
-    Tnat = experiment["T_nat_2060"]   # uncertainty dari EMA
+_T_IMPORT = time.perf_counter()
 
-    # apply derating
-    eng.apply_derating(Tnat)
-    summary = eng.summarize()
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    return {
-        "loss_percent": summary["loss_percent"],
-        "loss_mw": summary["total_loss_mw"],
-    }
+DEFAULT_CONFIG = {
+    "rukn_csv": os.path.join(_REPO_ROOT, "data", "ruptl_rukn", "rukn_2060_Indonesia_capacity.csv"),
+    "model_name": "Temperature_Derating_Test",
+    "uncertainty": "T_nat_2060",
+    "T_range": (22.93, 38.91),   # range dari Option2
+}
 
-# === 3. CREATE MODEL WRAPPER ===
-ema_model = Model("Temperature_Derating_Test", function=model_function)
+# Cold-start timings (seconds) filled in as stages run
+TIMINGS = {}
 
-# === 4. UNCERTAINTY SPACE ===
-ema_model.uncertainties = [
-    RealParameter("T_nat_2060", 22.93, 38.91)  # range dari Option2
-]
 
-# === 5. OUTCOMES ===
-ema_model.outcomes = [
-    ScalarOutcome("loss_percent"),
-    ScalarOutcome("loss_mw")
-]
+def resolve_config(config=None):
+    """DEFAULT_CONFIG updated with config; relative csv paths are taken from the working directory."""
+    cfg = dict(DEFAULT_CONFIG)
+    cfg.update(config or {})
+    cfg["rukn_csv"] = os.path.abspath(cfg["rukn_csv"])
+    return cfg
 
+
+def load_engine(config=None):
+    from source_ema.ema_derating_calculator import DeratingEngine
+
+    cfg = resolve_config(config)
+    t0 = time.perf_counter()
+    eng = DeratingEngine(cfg["rukn_csv"])
+    TIMINGS["engine_load_s"] = time.perf_counter() - t0
+    return eng
+
+
+def make_model_function(eng, uncertainty=DEFAULT_CONFIG["uncertainty"]):
+    """EMA model function over one engine (pure evaluate(): safe for parallel evaluators)."""
+    def model_function(**experiment):
+        Tnat = experiment[uncertainty]   # uncertainty dari EMA
+
+        summary = eng.evaluate(Tnat)
+
+        return {
+            "loss_percent": summary["loss_percent"],
+            "loss_mw": summary["total_loss_mw"],
+        }
+    return model_function
+
+
+def build_model(config=None, engine=None):
+    """
+    Build the ema_workbench Model.
+    config: dict overriding DEFAULT_CONFIG (rukn_csv, model_name, uncertainty, T_range)
+    engine: optional already-loaded DeratingEngine
+    Return (model, engine).
+    """
+    cfg = resolve_config(config)
+
+    t0 = time.perf_counter()
+    from ema_workbench import Model, RealParameter, ScalarOutcome
+    TIMINGS["workbench_import_s"] = time.perf_counter() - t0
+
+    eng = engine if engine is not None else load_engine(cfg)
+
+    model = Model(cfg["model_name"], function=make_model_function(eng, cfg["uncertainty"]))
+    lo, hi = cfg["T_range"]
+    model.uncertainties = [RealParameter(cfg["uncertainty"], lo, hi)]
+    model.outcomes = [
+        ScalarOutcome("loss_percent"),
+        ScalarOutcome("loss_mw"),
+    ]
+    TIMINGS["build_model_s"] = time.perf_counter() - t0
+    return model, eng
+
+
+# -------------------------------------
+# BACKWARD COMPATIBLE MODULE ATTRIBUTES
+# -------------------------------------
+
+_LAZY = {}
+
+_LAZY_BUILDERS = {
+    "eng": lambda: load_engine(),
+    "model_function": lambda: make_model_function(__getattr__("eng")),
+    "ema_model": lambda: build_model(engine=__getattr__("eng"))[0],
+}
+
+
+def __getattr__(name):
+    """eng / model_function / ema_model are built from DEFAULT_CONFIG on first access, once each."""
+    if name in _LAZY:
+        return _LAZY[name]
+    builder = _LAZY_BUILDERS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _LAZY[name] = builder()
+    return _LAZY[name]
+
+
+# -------------------------------------
+# CLI
+# -------------------------------------
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Run the EMA temperature derating model.")
+    p.add_argument("--rukn-csv", default=DEFAULT_CONFIG["rukn_csv"])
+    p.add_argument("--scenarios", type=int, default=1000)
+    p.add_argument("--t-min", type=float, default=DEFAULT_CONFIG["T_range"][0])
+    p.add_argument("--t-max", type=float, default=DEFAULT_CONFIG["T_range"][1])
+    p.add_argument("--out", default=None, help="csv with T_nat, loss_percent, loss_mw per experiment")
+    p.add_argument("--build-only", action="store_true", help="build the model and report timings only")
+    p.add_argument("--timing", action="store_true", help="print cold-start timings as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {"rukn_csv": args.rukn_csv, "T_range": (args.t_min, args.t_max)}
+
+    model, _ = build_model(config)
+
+    if not args.build_only:
+        import pandas as pd
+        from ema_workbench import perform_experiments
+
+        t0 = time.perf_counter()
+        experiments, outcomes = perform_experiments(model, scenarios=args.scenarios)
+        TIMINGS["experiments_s"] = time.perf_counter() - t0
+
+        df = pd.DataFrame({
+            "T_nat": experiments[DEFAULT_CONFIG["uncertainty"]],
+            "loss_percent": outcomes["loss_percent"],
+            "loss_mw": outcomes["loss_mw"],
+        })
+        if args.out:
+            df.to_csv(args.out, index=False)
+            print(f"[OK] Saved experiments to: {args.out}")
+        else:
+            print(df.describe())
+
+    TIMINGS["total_since_import_s"] = time.perf_counter() - _T_IMPORT
+    if args.timing:
+        print(json.dumps(TIMINGS, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
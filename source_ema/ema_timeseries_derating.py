@@ -0,0 +1,178 @@
+# =======================================================
+# ema_timeseries_derating.py
+# Time-resolved derating: a (time x asset) tasmax array, e.g. daily
+# ERA5 2000-2024 or a CMIP 2051-2060 window, -> available fleet MW
+# per timestep, plus rolling statistics:
+#   - worst-day loss
+#   - N-day minimum capacity (lowest N-step rolling mean)
+#   - exceedance curve of loss
+# Time is processed in chunks of chunk_steps rows, so only
+# chunk_steps x assets float64 values are live at once.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+
+from source_ema.ema_derating_calculator import as_plant_table, derate_plants_or_full
+
+
+# -------------------------------------
+# KERNELS
+# -------------------------------------
+
+def iter_fleet_capacity(plants, chunks):
+    """
+    Fleet MW for each temperature chunk of an iterator.
+    Each chunk is (steps,) national temperatures or (steps x plants);
+    NaN temperature -> that plant keeps full capacity.
+    """
+    for T in chunks:
+        T = np.asarray(T)
+        if T.ndim == 1:
+            T = T[:, None]
+        yield derate_plants_or_full(plants, T).sum(axis=1)
+
+
+def fleet_capacity(plants, T, chunk_steps=366):
+    """Available fleet MW per timestep for T = (time,) or (time x plants); works on memmaps."""
+    n = len(T)
+    chunks = (T[t0:t0 + chunk_steps] for t0 in range(0, n, chunk_steps))
+    parts = list(iter_fleet_capacity(plants, chunks))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def rolling_mean(x, n):
+    """Mean over every window of n consecutive steps (len(x) - n + 1 values), via cumsum."""
+    x = np.asarray(x, dtype=float)
+    if n > x.size:
+        return np.empty(0)
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    return (c[n:] - c[:-n]) / n
+
+
+def rolling_min(x, n):
+    """Minimum over every window of n consecutive steps."""
+    x = np.asarray(x, dtype=float)
+    if n > x.size:
+        return np.empty(0)
+    return np.lib.stride_tricks.sliding_window_view(x, n).min(axis=1)
+
+
+def exceedance_curve(values):
+    """
+    One sort -> dataframe (value, exceedance_probability) with
+    P(X >= value) for every observed value, largest first.
+    """
+    v = np.asarray(values, dtype=float)
+    v = np.sort(v[~np.isnan(v)])[::-1]
+    p = np.arange(1, v.size + 1) / v.size
+    return pd.DataFrame({"value": v, "exceedance_probability": p})
+
+
+# -------------------------------------
+# CLASS: CapacitySeries
+# -------------------------------------
+
+class CapacitySeries:
+    """
+    Available fleet capacity over time with rolling statistics.
+
+        cs = CapacitySeries.from_temperature(eng, T_daily, index=dates)
+        cs = CapacitySeries.from_chunks(asset_eng.plants,
+                                        (T for _, T in asset_eng.iter_temperature(cols)))
+        cs.worst_step()            # largest single-step loss
+        cs.min_capacity(7)         # lowest 7-step mean capacity
+        cs.exceedance()            # loss exceedance curve
+        cs.summary(n_steps=(1, 3, 7, 30))
+    """
+
+    def __init__(self, capacity_mw, total_mw, index=None):
+        self.capacity_mw = np.asarray(capacity_mw, dtype=float)
+        self.total_mw = float(total_mw)
+        self.index = pd.RangeIndex(self.capacity_mw.size, name="step") if index is None else pd.Index(index)
+        if len(self.index) != self.capacity_mw.size:
+            raise ValueError("index length does not match the number of timesteps")
+
+    @classmethod
+    def from_temperature(cls, plants, T, index=None, chunk_steps=366):
+        """plants = PlantTable / DeratingEngine; T = (time,) or (time x plants)."""
+        plants = as_plant_table(plants)
+        return cls(fleet_capacity(plants, T, chunk_steps), plants.total_mw, index)
+
+    @classmethod
+    def from_chunks(cls, plants, chunks, index=None):
+        """Same as from_temperature for an iterator of time chunks (e.g. a streamed overlay)."""
+        plants = as_plant_table(plants)
+        parts = list(iter_fleet_capacity(plants, chunks))
+        return cls(np.concatenate(parts) if parts else np.empty(0), plants.total_mw, index)
+
+    # ---------------------------
+    # SERIES
+    # ---------------------------
+
+    @property
+    def loss_mw(self):
+        return self.total_mw - self.capacity_mw
+
+    @property
+    def loss_percent(self):
+        return 100 * self.loss_mw / self.total_mw
+
+    def to_frame(self):
+        return pd.DataFrame({
+            "capacity_mw": self.capacity_mw,
+            "loss_mw": self.loss_mw,
+            "loss_percent": self.loss_percent,
+        }, index=self.index)
+
+    # ---------------------------
+    # ROLLING STATISTICS
+    # ---------------------------
+
+    def worst_step(self):
+        """(index label, loss_mw) of the single worst timestep; (None, nan) for an empty series."""
+        if self.capacity_mw.size == 0:
+            return None, np.nan
+        i = int(np.argmax(self.loss_mw))
+        return self.index[i], float(self.loss_mw[i])
+
+    def min_capacity(self, n_steps):
+        """(label of window start, MW) of the lowest n_steps rolling-mean capacity."""
+        r = rolling_mean(self.capacity_mw, n_steps)
+        if r.size == 0:
+            return None, np.nan
+        i = int(np.argmin(r))
+        return self.index[i], float(r[i])
+
+    def rolling_min_capacity(self, n_steps):
+        """Series: lowest single-step capacity within each n_steps window (labelled by window start)."""
+        r = rolling_min(self.capacity_mw, n_steps)
+        return pd.Series(r, index=self.index[:r.size], name=f"min_capacity_{n_steps}")
+
+    def exceedance(self, thresholds_mw=None):
+        """
+        Loss exceedance: full curve (thresholds_mw=None) or
+        P(loss >= threshold) for the given thresholds via one sorted search.
+        """
+        if thresholds_mw is None:
+            curve = exceedance_curve(self.loss_mw)
+            return curve.rename(columns={"value": "loss_mw"})
+        loss = np.sort(self.loss_mw)
+        t = np.asarray(thresholds_mw, dtype=float)
+        p = (loss.size - np.searchsorted(loss, t, side="left")) / max(loss.size, 1)
+        return pd.DataFrame({"loss_mw": t, "exceedance_probability": p})
+
+    def summary(self, n_steps=(1, 3, 7, 30)):
+        """Dict of headline numbers (worst step and N-step minimum capacities)."""
+        label, worst = self.worst_step()
+        out = {
+            "total_mw": round(self.total_mw, 2),
+            "mean_capacity_mw": round(float(self.capacity_mw.mean()), 2) if self.capacity_mw.size else np.nan,
+            "worst_step": label,
+            "worst_loss_mw": round(worst, 2),
+            "worst_loss_percent": round(100 * worst / self.total_mw, 2),
+        }
+        for n in n_steps:
+            _, mw = self.min_capacity(n)
+            out[f"min_capacity_{n}_mw"] = round(mw, 2)
+        return out
@@ -0,0 +1,135 @@
+# =======================================================
+# ema_transmission_rating.py
+# Dynamic line rating (DLR) for overhead conductors, built on
+# transmission_derating_array (net heat balance per metre):
+#
+#   I_dyn = I_static * sqrt(Q_net(v, T_air) / Q_net(static conditions))
+#
+# The conductor resistance cancels out, so each segment only needs its
+# diameter and rated (static) ampacity. Every segment x timestep is
+# evaluated in one array operation, chunked over time, and rolled up to
+# SYSTEM_MAP systems.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+
+from source.region_index import get_region_index
+from source.region_maps import SYSTEM_MAP
+from source_ema.ema_asset_derating import UNMAPPED_SYSTEM, membership_matrix
+from source_ema.f_derating_registry import transmission_derating_array
+
+
+# Static rating reference conditions (typical planning assumptions, IEEE 738 style)
+STATIC_WIND_SPEED = 0.61   # m/s (2 ft/s, perpendicular)
+STATIC_T_AIR = 35.0        # Celsius
+
+# Optional per-segment overrides of the registry "glob" defaults
+SEGMENT_PARAMS = ("emissivity", "absorptivity", "T_conductor", "solar_rad")
+
+
+def system_of_region(region):
+    """Segment region (SYSTEM_MAP system or provinsi) -> SYSTEM_MAP system, else UNMAPPED."""
+    if region in SYSTEM_MAP:
+        return region
+    regions = get_region_index()
+    code = regions.group_codes([region], "system")[0]
+    return regions.groups["system"][code] if code >= 0 else UNMAPPED_SYSTEM
+
+
+# -------------------------------------
+# CLASS: LineRatingEngine
+# -------------------------------------
+
+class LineRatingEngine:
+    """
+    Vectorized dynamic ratings for a table of line segments.
+
+    segments: dataframe with columns
+        - diameter_mm
+        - rated_ampacity_a   (static rating at STATIC_WIND_SPEED / STATIC_T_AIR)
+        - region             (SYSTEM_MAP system or provinsi)
+        - optional emissivity / absorptivity / T_conductor / solar_rad
+    """
+
+    def __init__(self, segments, static_wind_speed=STATIC_WIND_SPEED, static_T_air=STATIC_T_AIR):
+        self.segments = segments.reset_index(drop=True)
+        self.diameter_mm = self.segments["diameter_mm"].to_numpy(dtype=float)
+        self.rated_a = self.segments["rated_ampacity_a"].to_numpy(dtype=float)
+        self.params = {k: self.segments[k].to_numpy(dtype=float) for k in SEGMENT_PARAMS if k in self.segments}
+
+        self.q_static = transmission_derating_array(static_wind_speed, static_T_air, self.diameter_mm, **self.params)
+        if np.any(self.q_static <= 0):
+            raise ValueError("Static reference conditions give no cooling margin for some segments")
+
+        region_system = [system_of_region(r) for r in self.segments["region"]]
+        self.systems = list(SYSTEM_MAP)
+        unmapped = sorted({r for r, s in zip(self.segments["region"], region_system) if s == UNMAPPED_SYSTEM})
+        if unmapped:
+            self.systems.append(UNMAPPED_SYSTEM)
+            print(f"[WARN] segment regions not in SYSTEM_MAP: {unmapped}")
+        codes = np.array([self.systems.index(s) for s in region_system], dtype=np.int64)
+        self._to_system = membership_matrix(codes, len(self.systems))
+        self.static_system_a = self.rated_a @ self._to_system
+
+    # ---------------------------
+    # KERNELS
+    # ---------------------------
+
+    def rating_ratio(self, wind_speed, T_air):
+        """
+        I_dyn / I_static per (timestep x segment); inputs broadcast as
+        (time,) -> same weather for every segment, or (time x segments).
+        A non-positive heat margin gives a rating of 0.
+        """
+        v = np.asarray(wind_speed, dtype=float)
+        T = np.asarray(T_air, dtype=float)
+        v = v[:, None] if v.ndim == 1 else v
+        T = T[:, None] if T.ndim == 1 else T
+        q = transmission_derating_array(v, T, self.diameter_mm, **self.params)
+        return np.sqrt(np.maximum(q, 0.0) / self.q_static)
+
+    def iter_ratings(self, wind_speed, T_air, chunk_steps=366):
+        """Yield (t0, dynamic ampacity A (steps x segments)) chunks."""
+        n = max([len(x) for x in (wind_speed, T_air) if np.ndim(x)] or [1])
+        for t0 in range(0, n, chunk_steps):
+            v = wind_speed[t0:t0 + chunk_steps] if np.ndim(wind_speed) else np.full(1, wind_speed)
+            T = T_air[t0:t0 + chunk_steps] if np.ndim(T_air) else np.full(1, T_air)
+            yield t0, self.rated_a * self.rating_ratio(v, T)
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+
+    def dynamic_ratings(self, wind_speed, T_air, index=None, chunk_steps=366, keep_segments=True):
+        """
+        Dynamic ratings for every segment x timestep.
+        Return dict:
+          - "segment_a"            : dataframe (time x segments) of ampacity (A), if keep_segments
+          - "segment_loss_percent" : % of static rating lost, clipped at 0, if keep_segments
+          - "system_a"             : dataframe (time x systems), summed ampacity
+          - "system_loss_percent"  : % of summed static rating lost per system
+        """
+        seg, system = [], []
+        for _, amp in self.iter_ratings(wind_speed, T_air, chunk_steps):
+            system.append(amp @ self._to_system)
+            if keep_segments:
+                seg.append(amp.astype(np.float32))
+
+        system = np.vstack(system) if system else np.empty((0, len(self.systems)))
+        index = pd.RangeIndex(system.shape[0], name="step") if index is None else pd.Index(index)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sys_loss = 100 * (1 - system / self.static_system_a)
+
+        out = {
+            "system_a": pd.DataFrame(system, index=index, columns=self.systems),
+            "system_loss_percent": pd.DataFrame(sys_loss, index=index, columns=self.systems),
+        }
+        if keep_segments:
+            amp = np.vstack(seg) if seg else np.empty((0, self.rated_a.size), dtype=np.float32)
+            out["segment_a"] = pd.DataFrame(amp, index=index, columns=self.segments.index)
+            out["segment_loss_percent"] = pd.DataFrame(
+                np.maximum(0.0, 100 * (1 - amp / self.rated_a)), index=index, columns=self.segments.index
+            )
+        return out
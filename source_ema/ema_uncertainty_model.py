@@ -0,0 +1,226 @@
+# =======================================================
+# ema_uncertainty_model.py
+# Multi-uncertainty EMA model for the RUKN fleet:
+#   - registry coefficients (alpha_coal, T_ref_ocgt, epsilon, ...) as uncertainties
+#   - one temperature uncertainty per ISLAND_MAP island (or a single T_nat)
+#   - a whole design (e.g. a Latin hypercube) evaluated as one array operation
+# =======================================================
+
+import numpy as np
+import pandas as pd
+
+from source.region_index import get_region_index
+from source.region_maps import ISLAND_MAP
+from source_ema import f_derating_registry as registry
+from source_ema.ema_derating_calculator import COEFFICIENT_FIELDS, as_plant_table
+from source_ema.ema_profiling import count, count_law_evaluations
+from source_ema.f_derating_registry import (
+    LINEAR_DERATING_LAWS,
+    LINEAR_LAW_PARAMETERS,
+    linear_coefficients,
+    linear_multiplier,
+)
+
+
+# Range used for every temperature uncertainty (same as the original T_nat_2060)
+DEFAULT_T_RANGE = (22.93, 38.91)
+
+# Upper bound on experiments x plants elements evaluated at once
+BLOCK_ELEMENTS = 4_000_000
+
+
+def default_coefficient_ranges(laws=None):
+    """
+    (lower, upper) per registry parameter, around the current GLOBAL_* defaults:
+    alphas 0.5x-1.5x, reference temperatures +-2 °C, plus literature-based bounds.
+    laws: only keep parameters of these LINEAR_DERATING_LAWS (None = all), so laws
+    absent from the fleet do not add inert dimensions.
+    """
+    r = registry
+
+    def rel(x):
+        return (0.5 * x, 1.5 * x)
+
+    def pm(x, d=2.0):
+        return (x - d, x + d)
+
+    ranges = {
+        "alpha_coal": (r.GLOBAL_ALPHA_COAL, 0.006),        # this repo vs Petrakopoulou 2020
+        "T_ref_coal": pm(r.GLOBAL_TREF_COAL),
+        "alpha_ocgt": rel(r.GLOBAL_ALPHA_OCGT),
+        "T_ref_ocgt": pm(r.GLOBAL_TREF_OCGT),
+        "alpha_ccgt": rel(r.GLOBAL_ALPHA_CCGT),
+        "T_ref_ccgt": pm(r.GLOBAL_TREF_CCGT),
+        "alpha_nuclear": rel(r.GLOBAL_ALPHA_NUCLEAR),
+        "T_ref_nuclear": pm(r.GLOBAL_TREF_NUCLEAR),
+        "epsilon": (0.003, 0.005),                         # c-Si temperature coefficients
+        "T_ref": pm(r.GLOBAL_TREF),
+        "irradiance": (800.0, r.GLOBAL_IRRADIANCE),
+        "alpha_amb": rel(r.GLOBAL_ALPHA_DIESEL_AMB),
+        "T_ref_diesel": pm(r.GLOBAL_TREF_DIESEL),
+        "altitude_m": (0.0, 500.0),
+        "T_ref_diesel_cummins": pm(r.GLOBAL_TREF_DIESEL_CUMMINS),
+        "m_min_diesel_cummins": (0.6, 0.8),
+    }
+    if laws is None:
+        return ranges
+    keep = {p for law in laws for p in LINEAR_LAW_PARAMETERS[law]}
+    return {k: v for k, v in ranges.items() if k in keep}
+
+
+def fleet_laws(plants):
+    """LINEAR_DERATING_LAWS used by at least one plant of a PlantTable / DeratingEngine."""
+    fid = np.asarray(as_plant_table(plants).function_id)
+    return [LINEAR_DERATING_LAWS[i] for i in np.unique(fid[fid >= 0])]
+
+
+def island_parameter(island):
+    """ISLAND_MAP key -> uncertainty name, e.g. "Bali-Nusa" -> "T_Bali_Nusa"."""
+    return "T_" + island.replace("-", "_").replace(" ", "_")
+
+
+def island_shares_from_extractor(extractor):
+    """
+    Capacity share per ISLAND_MAP island from a loaded ClimateExtractor.
+    Provinces that are not in ISLAND_MAP are reported and left out.
+    """
+    regions = get_region_index()
+    provs = list(extractor.provs)
+    cap = np.nan_to_num(extractor.capacity_weights())
+
+    missing = sorted(p for p, c in zip(provs, regions.group_codes(provs, "island")) if c < 0)
+    if missing:
+        print(f"[WARN] provinces not in ISLAND_MAP (excluded from island shares): {missing}")
+
+    mw = regions.aggregate_by_name(cap, provs, "island")
+    return {isl: float(m / mw.sum()) for isl, m in zip(regions.groups["island"], mw) if m > 0}
+
+
+# -------------------------------------
+# DESIGN
+# -------------------------------------
+
+def uncertainty_space(coefficients=None, island_shares=None, T_range=DEFAULT_T_RANGE, plants=None):
+    """
+    List of (name, lower, upper).
+    coefficients : dict name -> (lower, upper); None -> default_coefficient_ranges()
+                   restricted to the laws of plants (all laws if plants is None)
+    island_shares: dict island -> share; None -> a single "T_nat" uncertainty
+    """
+    if coefficients is None:
+        coefficients = default_coefficient_ranges(None if plants is None else fleet_laws(plants))
+    space = [(name, float(lo), float(hi)) for name, (lo, hi) in coefficients.items()]
+    if island_shares:
+        space += [(island_parameter(isl), *T_range) for isl in island_shares]
+    else:
+        space.append(("T_nat", *T_range))
+    return space
+
+
+def latin_hypercube(space, n, seed=None):
+    """Latin hypercube sample of the (name, lower, upper) space -> dataframe (n x dims)."""
+    rng = np.random.default_rng(seed)
+    design = {}
+    for name, lo, hi in space:
+        u = (rng.permutation(n) + rng.random(n)) / n
+        design[name] = lo + u * (hi - lo)
+    return pd.DataFrame(design)
+
+
+# -------------------------------------
+# VECTORIZED EVALUATION
+# -------------------------------------
+
+def _law_coefficients(plants, law_id, mask, params):
+    """
+    COEFFICIENT_FIELDS of one law: per-experiment (block x 1) columns when the design
+    varies its parameters, otherwise the compiled per-plant values of that law.
+    Both broadcast against the (block x plants-of-law) temperatures.
+    """
+    law = LINEAR_DERATING_LAWS[law_id]
+    own = {k: v for k, v in params.items() if k in LINEAR_LAW_PARAMETERS[law]}
+    if not own:
+        return [np.asarray(getattr(plants, k))[mask] for k in COEFFICIENT_FIELDS]
+    c = linear_coefficients(law, **own)
+    count(f"linear_coefficients.{law}")
+    return [np.asarray(c[k], dtype=float) for k in COEFFICIENT_FIELDS]
+
+
+def evaluate_design(plants, design, island_shares=None):
+    """
+    Evaluate every experiment of a design in one array pass.
+
+    plants       : PlantTable or DeratingEngine
+    design       : dataframe / dict of equal-length arrays; columns named like
+                   registry parameters override the "glob" defaults, and
+                   T_nat or one T_<island> column per island give temperatures
+    island_shares: dict island -> capacity share (fleet split across islands)
+
+    Return dataframe with loss_mw and loss_percent per experiment.
+    """
+    plants = as_plant_table(plants)
+
+    design = {k: np.asarray(v, dtype=float).ravel() for k, v in dict(design).items()}
+    n = len(next(iter(design.values())))
+
+    if island_shares:
+        temps = [(design[island_parameter(isl)], share) for isl, share in island_shares.items()]
+    else:
+        temps = [(design["T_nat"], 1.0)]
+
+    temp_names = {"T_nat"} | {island_parameter(isl) for isl in ISLAND_MAP}
+    params = {k: v for k, v in design.items() if k not in temp_names}
+
+    P = np.asarray(plants.daya_mw)
+    total = plants.total_mw
+    fid = np.asarray(plants.function_id)
+    laws = [(law_id, fid == law_id) for law_id in np.unique(fid[fid >= 0])]
+    step = max(1, BLOCK_ELEMENTS // max(1, P.size))
+
+    # plants without a derating law keep full capacity in every experiment
+    derated = np.full(n, P[fid < 0].sum() * sum(share for _, share in temps))
+    for i in range(0, n, step):
+        block = slice(i, min(i + step, n))
+        block_params = {k: v[block, None] for k, v in params.items()}
+        for law_id, mask in laws:
+            args = _law_coefficients(plants, law_id, mask, block_params)
+            P_law = P[mask]
+            for T, share in temps:
+                derated[block] += share * (P_law * linear_multiplier(T[block, None], *args)).sum(axis=1)
+
+    count_law_evaluations(plants.function_id, n * len(temps))
+    loss = total - derated
+    return pd.DataFrame({"loss_mw": loss, "loss_percent": 100 * loss / total})
+
+
+def run_lhs(plants, n, seed=None, coefficients=None, island_shares=None, T_range=DEFAULT_T_RANGE):
+    """Sample a Latin hypercube and evaluate it in one pass -> (design, outcomes)."""
+    space = uncertainty_space(coefficients, island_shares, T_range, plants)
+    design = latin_hypercube(space, n, seed)
+    return design, evaluate_design(plants, design, island_shares)
+
+
+# -------------------------------------
+# EMA WORKBENCH MODEL
+# -------------------------------------
+
+def build_uncertainty_model(engine, coefficients=None, island_shares=None, T_range=DEFAULT_T_RANGE,
+                            name="TemperatureDeratingMulti"):
+    """ema_workbench Model exposing the coefficient and temperature uncertainties."""
+    from ema_workbench import Model, RealParameter, ScalarOutcome
+
+    def model_function(**experiment):
+        out = evaluate_design(engine, {k: [v] for k, v in experiment.items()}, island_shares)
+        return {
+            "loss_percent": round(float(out["loss_percent"].iloc[0]), 2),
+            "loss_mw": round(float(out["loss_mw"].iloc[0]), 2),
+        }
+
+    model = Model(name, function=model_function)
+    model.uncertainties = [RealParameter(n, lo, hi)
+                           for n, lo, hi in uncertainty_space(coefficients, island_shares, T_range, engine)]
+    model.outcomes = [
+        ScalarOutcome("loss_percent"),
+        ScalarOutcome("loss_mw"),
+    ]
+    return model
@@ -1,4 +1,3 @@
-
 # f_derating_registry.py
 # this is the place of every derating registries defined
 # will be called by f2 functions for assigning parameters to gen/trans assets.
@@ -56,12 +55,151 @@ GLOBAL_SOLAR_RAD = 500  # W/m2
 GLOBAL_T_CONDUCTOR = 90  # Celsius
 GLOBAL_SIGMA = 5.67e-8  # Stefan–Boltzmann constant
 
+# === ARRAY KERNELS ===
+# Array-native versions of every derating function below.
+# tasmax_values may be any array-like (scalar, (T,), (T, plants), ...);
+# daya_mw and the tunable parameters broadcast against it.
+# Return: np.ndarray of derated capacity (MW), or net heat balance for transmission.
+
+def gas_derating_array(tasmax_values, daya_mw, alpha, **kwargs):
+    alpha = _glob(alpha, GLOBAL_ALPHA)
+    T = np.asarray(tasmax_values, dtype=float)
+    return np.asarray(daya_mw, dtype=float) * (-np.asarray(alpha) * T + 1.15)
+
+def oc_gas_derating_array(tasmax_values, daya_mw, alpha_ocgt="glob", T_ref_ocgt="glob", **kwargs):
+    alpha_ocgt = _glob(alpha_ocgt, GLOBAL_ALPHA_OCGT)
+    T_ref_ocgt = _glob(T_ref_ocgt, GLOBAL_TREF_OCGT)
+    return _linear_above_ref(tasmax_values, daya_mw, alpha_ocgt, T_ref_ocgt)
+
+def cc_gas_derating_array(tasmax_values, daya_mw, alpha_ccgt="glob", T_ref_ccgt="glob", **kwargs):
+    alpha_ccgt = _glob(alpha_ccgt, GLOBAL_ALPHA_CCGT)
+    T_ref_ccgt = _glob(T_ref_ccgt, GLOBAL_TREF_CCGT)
+    return _linear_above_ref(tasmax_values, daya_mw, alpha_ccgt, T_ref_ccgt)
+
+def pv_derating_array(tasmax_values, daya_mw, epsilon="glob", T_ref="glob", irradiance="glob", **kwargs):
+    epsilon = _glob(epsilon, GLOBAL_EPSILON)
+    T_ref = _glob(T_ref, GLOBAL_TREF)
+    irradiance = _glob(irradiance, GLOBAL_IRRADIANCE)
+    T = np.asarray(tasmax_values, dtype=float)
+    irr = np.asarray(irradiance, dtype=float)
+    return np.asarray(daya_mw, dtype=float) * (irr / 1000) * (1 - np.asarray(epsilon) * (T - np.asarray(T_ref)))
+
+def coal_derating_array(tasmax_values, daya_mw, alpha_coal="glob", T_ref_coal="glob", **kwargs):
+    alpha_coal = _glob(alpha_coal, GLOBAL_ALPHA_COAL)
+    T_ref_coal = _glob(T_ref_coal, GLOBAL_TREF_COAL)
+    return _linear_above_ref(tasmax_values, daya_mw, alpha_coal, T_ref_coal)
+
+def nuclear_derating_array(tasmax_values, daya_mw, alpha_nuclear="glob", T_ref_nuclear="glob", **kwargs):
+    alpha_nuclear = _glob(alpha_nuclear, GLOBAL_ALPHA_NUCLEAR)
+    T_ref_nuclear = _glob(T_ref_nuclear, GLOBAL_TREF_NUCLEAR)
+    return _linear_above_ref(tasmax_values, daya_mw, alpha_nuclear, T_ref_nuclear)
+
+def diesel_derating_cummins_array(tasmax_values, daya_mw,
+                                  T_ref_diesel_cummins="glob",
+                                  T_max_diesel_cummins="glob",
+                                  m_min_diesel_cummins="glob",
+                                  **kwargs):
+    T_ref_diesel_cummins = _glob(T_ref_diesel_cummins, GLOBAL_TREF_DIESEL_CUMMINS)
+    T_max_diesel_cummins = _glob(T_max_diesel_cummins, GLOBAL_TMAX_DIESEL_CUMMINS)
+    m_min_diesel_cummins = _glob(m_min_diesel_cummins, GLOBAL_MMIN_DIESEL_CUMMINS)
+
+    T = np.asarray(tasmax_values, dtype=float)
+    T_ref = np.asarray(T_ref_diesel_cummins, dtype=float)
+    T_max = np.asarray(T_max_diesel_cummins, dtype=float)
+    m_min = np.asarray(m_min_diesel_cummins, dtype=float)
+
+    slope = (1.0 - m_min) / (T_max - T_ref)
+    multiplier = np.where(
+        T <= T_ref, 1.0,
+        np.where(T >= T_max, m_min, 1.0 - slope * (T - T_ref)),
+    )
+    return np.asarray(daya_mw, dtype=float) * multiplier
+
+def diesel_derating_array(
+    tasmax_values,
+    daya_mw,
+    altitude_m=1.0,
+    alpha_amb="glob",
+    T_ref_diesel="glob",
+    alpha_alt_per_m="glob",
+    alt_ref_m="glob",
+    alpha_cac="glob",
+    T_ref_cac="glob",
+    cac_temp_values=None,
+    use_cac_equals_ambient=False,
+    **kwargs
+):
+    alpha_amb = _glob(alpha_amb, GLOBAL_ALPHA_DIESEL_AMB)
+    T_ref_diesel = _glob(T_ref_diesel, GLOBAL_TREF_DIESEL)
+    alpha_alt_per_m = _glob(alpha_alt_per_m, GLOBAL_ALPHA_ALT_PER_M)
+    alt_ref_m = _glob(alt_ref_m, GLOBAL_ALT_REF_DIESEL)
+    alpha_cac = _glob(alpha_cac, GLOBAL_ALPHA_DIESEL_CAC)
+    T_ref_cac = _glob(T_ref_cac, GLOBAL_TREF_CAC)
+
+    T = np.asarray(tasmax_values, dtype=float)
+
+    a = np.asarray(alpha_amb) * np.maximum(0.0, T - np.asarray(T_ref_diesel))
+    b = np.maximum(0.0, np.asarray(altitude_m, dtype=float) - np.asarray(alt_ref_m)) * np.asarray(alpha_alt_per_m)
+
+    if cac_temp_values is not None:
+        T_cac = np.asarray(cac_temp_values, dtype=float)
+    elif use_cac_equals_ambient:
+        T_cac = T
+    else:
+        T_cac = None
+    c = np.asarray(alpha_cac) * np.maximum(0.0, T_cac - np.asarray(T_ref_cac)) if T_cac is not None else 0.0
+
+    multiplier = np.clip(1.0 - (a + b + c), 0.0, 1.0)
+    return np.asarray(daya_mw, dtype=float) * multiplier
+
+def transmission_derating_array(
+    wind_speed_list,
+    T_air_list,
+    diameter_mm,
+    emissivity="glob",
+    absorptivity="glob",
+    T_conductor="glob",
+    solar_rad="glob",
+    **kwargs
+):
+    emissivity = _glob(emissivity, GLOBAL_EMISSIVITY)
+    absorptivity = _glob(absorptivity, GLOBAL_ABSORPTIVITY)
+    T_conductor = _glob(T_conductor, GLOBAL_T_CONDUCTOR)
+    solar_rad = _glob(solar_rad, GLOBAL_SOLAR_RAD)
+
+    v = np.asarray(wind_speed_list, dtype=float)
+    T_a = np.asarray(T_air_list, dtype=float)
+    diameter_m = np.asarray(diameter_mm, dtype=float) / 1000
+    T_conductor = np.asarray(T_conductor, dtype=float)
+    sigma = GLOBAL_SIGMA
+
+    T_k = T_a + 273.15
+    T_c = T_conductor + 273.15
+
+    Q_r = np.pi * diameter_m * emissivity * sigma * ((T_c**4) - (T_k**4))
+    Q_s = absorptivity * solar_rad * np.pi * diameter_m
+    Q_c = np.pi * diameter_m * 10.45 * (1 + 10 * np.sqrt(v)) * (T_conductor - T_a)
+
+    return Q_c + Q_r - Q_s
+
+def _glob(value, default):
+    """Resolve the "glob" sentinel; safe when value is an ndarray."""
+    if isinstance(value, str) and value == "glob":
+        return default
+    return value
+
+def _linear_above_ref(tasmax_values, daya_mw, alpha, T_ref):
+    """Shared kernel: daya_mw * (1 - alpha * max(0, T - T_ref))."""
+    T = np.asarray(tasmax_values, dtype=float)
+    excess = np.maximum(0.0, T - np.asarray(T_ref, dtype=float))
+    return np.asarray(daya_mw, dtype=float) * (1 - np.asarray(alpha) * excess)
+
+
 # === DERATING FUNCTIONS ===
+# List API: thin wrappers over the array kernels above.
 
 def gas_derating(tasmax_values, daya_mw, alpha, **kwargs):
-    if alpha == "glob":
-        alpha = GLOBAL_ALPHA
-    return [daya_mw * (-alpha * t + 1.15) for t in tasmax_values]
+    return gas_derating_array(tasmax_values, daya_mw, alpha).tolist()
 
 def oc_gas_derating(tasmax_values, daya_mw, alpha_ocgt="glob", T_ref_ocgt="glob", **kwargs):
     """
@@ -69,12 +207,7 @@ def oc_gas_derating(tasmax_values, daya_mw, alpha_ocgt="glob", T_ref_ocgt="glob"
     Power decreases linearly with temperature above reference temperature.
     Source: Handayani 2019, Bartos, and Chester (2017)
     """
-    if alpha_ocgt == "glob":
-        alpha_ocgt = GLOBAL_ALPHA_OCGT
-    if T_ref_ocgt == "glob":
-        T_ref_ocgt = GLOBAL_TREF_OCGT
-
-    return [daya_mw * (1 - alpha_ocgt * max(0, T - T_ref_ocgt)) for T in tasmax_values]
+    return oc_gas_derating_array(tasmax_values, daya_mw, alpha_ocgt, T_ref_ocgt).tolist()
 
 def cc_gas_derating(tasmax_values, daya_mw, alpha_ccgt="glob", T_ref_ccgt="glob", **kwargs):
     """
@@ -82,21 +215,10 @@ def cc_gas_derating(tasmax_values, daya_mw, alpha_ccgt="glob", T_ref_ccgt="glob"
     Power decreases linearly with temperature above reference temperature.
     Source: Handayani 2019, Bartos, and Chester (2017)
     """
-    if alpha_ccgt == "glob":
-        alpha_ccgt = GLOBAL_ALPHA_CCGT
-    if T_ref_ccgt == "glob":
-        T_ref_ccgt = GLOBAL_TREF_CCGT
-
-    return [daya_mw * (1 - alpha_ccgt * max(0, T - T_ref_ccgt)) for T in tasmax_values]
+    return cc_gas_derating_array(tasmax_values, daya_mw, alpha_ccgt, T_ref_ccgt).tolist()
 
 def pv_derating(tasmax_values, daya_mw, epsilon="glob", T_ref="glob", irradiance="glob", **kwargs):
-    if epsilon == "glob":
-        epsilon = GLOBAL_EPSILON
-    if T_ref == "glob":
-        T_ref = GLOBAL_TREF
-    if irradiance == "glob":
-        irradiance = [GLOBAL_IRRADIANCE] * len(tasmax_values)
-    return [daya_mw * (irr / 1000) * (1 - epsilon * (T - T_ref)) for T, irr in zip(tasmax_values, irradiance)]
+    return pv_derating_array(tasmax_values, daya_mw, epsilon, T_ref, irradiance).tolist()
 
 def coal_derating(tasmax_values, daya_mw, alpha_coal="glob", T_ref_coal="glob", **kwargs):
     """
@@ -112,12 +234,7 @@ def coal_derating(tasmax_values, daya_mw, alpha_coal="glob", T_ref_coal="glob",
     Returns:
     - List of derated capacity values (MW)
     """
-    if alpha_coal == "glob":
-        alpha_coal = GLOBAL_ALPHA_COAL
-    if T_ref_coal == "glob":
-        T_ref_coal = GLOBAL_TREF_COAL
-
-    return [daya_mw * (1 - alpha_coal * max(0, T - T_ref_coal)) for T in tasmax_values]
+    return coal_derating_array(tasmax_values, daya_mw, alpha_coal, T_ref_coal).tolist()
 
 def nuclear_derating(tasmax_values, daya_mw, alpha_nuclear="glob", T_ref_nuclear="glob", **kwargs):
     """
@@ -133,12 +250,7 @@ def nuclear_derating(tasmax_values, daya_mw, alpha_nuclear="glob", T_ref_nuclear
     Returns:
     - List of derated capacity values (MW)
     """
-    if alpha_nuclear == "glob":
-        alpha_nuclear = GLOBAL_ALPHA_NUCLEAR
-    if T_ref_nuclear == "glob":
-        T_ref_nuclear = GLOBAL_TREF_NUCLEAR
-
-    return [daya_mw * (1 - alpha_nuclear * max(0, T - T_ref_nuclear)) for T in tasmax_values]
+    return nuclear_derating_array(tasmax_values, daya_mw, alpha_nuclear, T_ref_nuclear).tolist()
 
 def diesel_derating_cummins(tasmax_values, daya_mw,
                     T_ref_diesel_cummins="glob",
@@ -162,29 +274,10 @@ def diesel_derating_cummins(tasmax_values, daya_mw,
     Returns:
     - List of derated capacity values (MW)
     """
-    # --- Load global defaults if still set to "glob" ---
-    if T_ref_diesel_cummins == "glob":
-        T_ref_diesel_cummins = GLOBAL_TREF_DIESEL_CUMMINS
-    if T_max_diesel_cummins == "glob":
-        T_max_diesel_cummins = GLOBAL_TMAX_DIESEL_CUMMINS
-    if m_min_diesel_cummins == "glob":
-        m_min_diesel_cummins = GLOBAL_MMIN_DIESEL_CUMMINS
-
-    # --- Compute slope for linear derating ---
-    slope = (1.0 - m_min_diesel_cummins) / (T_max_diesel_cummins - T_ref_diesel_cummins)
-    derated_values = []
-
-    # --- Apply linear derating with clamping ---
-    for T in tasmax_values:
-        if T <= T_ref_diesel_cummins:
-            multiplier = 1.0
-        elif T >= T_max_diesel_cummins:
-            multiplier = m_min_diesel_cummins
-        else:
-            multiplier = 1.0 - slope * (T - T_ref_diesel_cummins)
-        derated_values.append(daya_mw * multiplier)
-
-    return derated_values
+    return diesel_derating_cummins_array(
+        tasmax_values, daya_mw,
+        T_ref_diesel_cummins, T_max_diesel_cummins, m_min_diesel_cummins,
+    ).tolist()
 
 
 
@@ -211,46 +304,18 @@ def diesel_derating(
 
     Returns: list of derated capacities (MW), same length as tasmax_values.
     """
-    # ---- load globals ----
-    if alpha_amb == "glob":
-        alpha_amb = GLOBAL_ALPHA_DIESEL_AMB      # e.g., 0.005  (0.5%/°C)
-    if T_ref_diesel == "glob":
-        T_ref_diesel = GLOBAL_TREF_DIESEL        # e.g., 25.0 °C
-
-    if alpha_alt_per_m == "glob":
-        alpha_alt_per_m = GLOBAL_ALPHA_ALT_PER_M # e.g., 0.0001 per m (1%/100 m)
-    if alt_ref_m == "glob":
-        alt_ref_m = GLOBAL_ALT_REF_DIESEL        # e.g., 0.0 m
-
-    if alpha_cac == "glob":
-        alpha_cac = GLOBAL_ALPHA_DIESEL_CAC      # e.g., 0.004 (0.4%/°C)
-    if T_ref_cac == "glob":
-        T_ref_cac = GLOBAL_TREF_CAC              # e.g., 25.0 °C
-
-    # altitude term (scalar)
-    b = max(0.0, altitude_m - alt_ref_m) * alpha_alt_per_m  # fractional (e.g., 0.001 = 0.1%)
-
-    derated = []
-    for i, T in enumerate(tasmax_values):
-        # ambient term
-        a = alpha_amb * max(0.0, T - T_ref_diesel)
-
-        # CAC term (optional)
-        if cac_temp_values is not None:
-            T_cac = cac_temp_values[i]
-        elif use_cac_equals_ambient:
-            T_cac = T
-        else:
-            T_cac = None
-
-        c = alpha_cac * max(0.0, T_cac - T_ref_cac) if T_cac is not None else 0.0
-
-        reduction = a + b + c                 # total fractional reduction
-        multiplier = max(0.0, min(1.0, 1.0 - reduction))  # clamp 0..1
-
-        derated.append(daya_mw * multiplier)
-
-    return derated
+    return diesel_derating_array(
+        tasmax_values, daya_mw,
+        altitude_m=altitude_m,
+        alpha_amb=alpha_amb,
+        T_ref_diesel=T_ref_diesel,
+        alpha_alt_per_m=alpha_alt_per_m,
+        alt_ref_m=alt_ref_m,
+        alpha_cac=alpha_cac,
+        T_ref_cac=T_ref_cac,
+        cac_temp_values=cac_temp_values,
+        use_cac_equals_ambient=use_cac_equals_ambient,
+    ).tolist()
 
 
 
@@ -264,31 +329,10 @@ def transmission_derating(
     solar_rad="glob",
     **kwargs
 ):
-    if emissivity == "glob":
-        emissivity = GLOBAL_EMISSIVITY
-    if absorptivity == "glob":
-        absorptivity = GLOBAL_ABSORPTIVITY
-    if T_conductor == "glob":
-        T_conductor = GLOBAL_T_CONDUCTOR
-    if solar_rad == "glob":
-        solar_rad = GLOBAL_SOLAR_RAD
-
-    diameter_m = diameter_mm / 1000
-    sigma = GLOBAL_SIGMA
-    results = []
-
-    for v, T_a in zip(wind_speed_list, T_air_list):
-        T_k = T_a + 273.15
-        T_c = T_conductor + 273.15
-
-        Q_r = np.pi * diameter_m * emissivity * sigma * ((T_c**4) - (T_k**4))
-        Q_s = absorptivity * solar_rad * np.pi * diameter_m
-        Q_c = np.pi * diameter_m * 10.45 * (1 + 10 * np.sqrt(v)) * (T_conductor - T_a)
-
-        net_heat = Q_c + Q_r - Q_s
-        results.append(net_heat)
-
-    return results
+    return transmission_derating_array(
+        wind_speed_list, T_air_list, diameter_mm,
+        emissivity, absorptivity, T_conductor, solar_rad,
+    ).tolist()
 
 # === FUNCTION LOOKUP ===
 
@@ -303,3 +347,123 @@ DERATING_FUNCTIONS = {
     "oc_gas_derating": oc_gas_derating,
     "cc_gas_derating": cc_gas_derating,
 }
+
+# Same keys as DERATING_FUNCTIONS, pointing to the array kernels.
+ARRAY_DERATING_FUNCTIONS = {
+    "gas_derating": gas_derating_array,
+    "pv_derating": pv_derating_array,
+    "coal_derating": coal_derating_array,
+    "transmission_derating": transmission_derating_array,
+    "nuclear_derating": nuclear_derating_array,
+    "diesel_derating_cummins": diesel_derating_cummins_array,
+    "diesel_derating": diesel_derating_array,
+    "oc_gas_derating": oc_gas_derating_array,
+    "cc_gas_derating": cc_gas_derating_array,
+}
+
+
+# === PIECEWISE-LINEAR COEFFICIENTS ===
+# Every capacity derating law above can be written as one clamped linear term:
+#   multiplier(T) = clip(m_ref - alpha * (clip(T, T_lo, T_hi) - T_ref), m_floor, m_ceil)
+# linear_coefficients() resolves the "glob" defaults once and returns these
+# coefficients, so engines can evaluate a whole fleet with linear_multiplier()
+# instead of dispatching to each function per call.
+
+# Stable ids for compiled plant tables (-1 = no derating).
+LINEAR_DERATING_LAWS = (
+    "coal_derating",
+    "oc_gas_derating",
+    "cc_gas_derating",
+    "pv_derating",
+    "nuclear_derating",
+    "diesel_derating",
+    "diesel_derating_cummins",
+    "gas_derating",
+)
+
+# Tunable parameters each law reads in linear_coefficients().
+LINEAR_LAW_PARAMETERS = {
+    "coal_derating": ("alpha_coal", "T_ref_coal"),
+    "oc_gas_derating": ("alpha_ocgt", "T_ref_ocgt"),
+    "cc_gas_derating": ("alpha_ccgt", "T_ref_ccgt"),
+    "pv_derating": ("epsilon", "T_ref", "irradiance"),
+    "nuclear_derating": ("alpha_nuclear", "T_ref_nuclear"),
+    "diesel_derating": ("alpha_amb", "T_ref_diesel", "alpha_alt_per_m", "alt_ref_m", "altitude_m"),
+    "diesel_derating_cummins": ("T_ref_diesel_cummins", "T_max_diesel_cummins", "m_min_diesel_cummins"),
+    "gas_derating": ("alpha",),
+}
+
+NO_DERATING_COEFFICIENTS = {
+    "m_ref": 1.0, "alpha": 0.0, "T_ref": 0.0,
+    "T_lo": -np.inf, "T_hi": np.inf, "m_floor": -np.inf, "m_ceil": np.inf,
+}
+
+
+def linear_coefficients(func_name, **params):
+    """
+    Return the piecewise-linear coefficients of a registry derating law.
+    params use the same names/defaults as the registry function and may be
+    arrays (broadcast together), e.g. alpha_coal=np.array([...]).
+    """
+    c = dict(NO_DERATING_COEFFICIENTS)
+
+    if func_name in ("coal_derating", "oc_gas_derating", "cc_gas_derating", "nuclear_derating"):
+        suffix = {
+            "coal_derating": "coal",
+            "oc_gas_derating": "ocgt",
+            "cc_gas_derating": "ccgt",
+            "nuclear_derating": "nuclear",
+        }[func_name]
+        defaults = {
+            "coal": (GLOBAL_ALPHA_COAL, GLOBAL_TREF_COAL),
+            "ocgt": (GLOBAL_ALPHA_OCGT, GLOBAL_TREF_OCGT),
+            "ccgt": (GLOBAL_ALPHA_CCGT, GLOBAL_TREF_CCGT),
+            "nuclear": (GLOBAL_ALPHA_NUCLEAR, GLOBAL_TREF_NUCLEAR),
+        }[suffix]
+        alpha = _glob(params.get(f"alpha_{suffix}", "glob"), defaults[0])
+        T_ref = _glob(params.get(f"T_ref_{suffix}", "glob"), defaults[1])
+        c.update(alpha=alpha, T_ref=T_ref, T_lo=T_ref)
+
+    elif func_name == "pv_derating":
+        epsilon = _glob(params.get("epsilon", "glob"), GLOBAL_EPSILON)
+        T_ref = _glob(params.get("T_ref", "glob"), GLOBAL_TREF)
+        scale = np.asarray(_glob(params.get("irradiance", "glob"), GLOBAL_IRRADIANCE), dtype=float) / 1000
+        c.update(m_ref=scale, alpha=scale * np.asarray(epsilon), T_ref=T_ref)
+
+    elif func_name == "diesel_derating_cummins":
+        T_ref = np.asarray(_glob(params.get("T_ref_diesel_cummins", "glob"), GLOBAL_TREF_DIESEL_CUMMINS), dtype=float)
+        T_max = np.asarray(_glob(params.get("T_max_diesel_cummins", "glob"), GLOBAL_TMAX_DIESEL_CUMMINS), dtype=float)
+        m_min = np.asarray(_glob(params.get("m_min_diesel_cummins", "glob"), GLOBAL_MMIN_DIESEL_CUMMINS), dtype=float)
+        c.update(alpha=(1.0 - m_min) / (T_max - T_ref), T_ref=T_ref, T_lo=T_ref, T_hi=T_max,
+                 m_floor=m_min, m_ceil=1.0)
+
+    elif func_name == "diesel_derating":
+        if params.get("cac_temp_values") is not None or params.get("use_cac_equals_ambient", False):
+            raise ValueError("diesel_derating with a CAC term is not a single-hinge law")
+        alpha_amb = _glob(params.get("alpha_amb", "glob"), GLOBAL_ALPHA_DIESEL_AMB)
+        T_ref = _glob(params.get("T_ref_diesel", "glob"), GLOBAL_TREF_DIESEL)
+        alpha_alt = _glob(params.get("alpha_alt_per_m", "glob"), GLOBAL_ALPHA_ALT_PER_M)
+        alt_ref = _glob(params.get("alt_ref_m", "glob"), GLOBAL_ALT_REF_DIESEL)
+        altitude_m = np.asarray(params.get("altitude_m", 1.0), dtype=float)
+        b = np.maximum(0.0, altitude_m - np.asarray(alt_ref)) * np.asarray(alpha_alt)
+        c.update(m_ref=1.0 - b, alpha=alpha_amb, T_ref=T_ref, T_lo=T_ref, m_floor=0.0, m_ceil=1.0)
+
+    elif func_name == "gas_derating":
+        alpha = _glob(params.get("alpha", "glob"), GLOBAL_ALPHA)
+        c.update(m_ref=1.15, alpha=alpha)
+
+    else:
+        raise ValueError(f"No piecewise-linear form for derating function: {func_name}")
+
+    return c
+
+
+def linear_multiplier(tasmax_values, m_ref, alpha, T_ref, T_lo, T_hi, m_floor, m_ceil):
+    """Evaluate clip(m_ref - alpha * (clip(T, T_lo, T_hi) - T_ref), m_floor, m_ceil)."""
+    T = np.clip(np.asarray(tasmax_values, dtype=float), T_lo, T_hi)
+    return np.clip(m_ref - alpha * (T - T_ref), m_floor, m_ceil)
+
+
+def registry_fingerprint():
+    """Snapshot of all GLOBAL_* defaults; changes whenever a global is edited."""
+    return tuple(sorted((k, v) for k, v in globals().items() if k.startswith("GLOBAL_")))
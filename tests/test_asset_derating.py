@@ -0,0 +1,85 @@
+# =======================================================
+# test_asset_derating.py
+# Per-asset derating and provinsi / system / nation rollups vs a
+# per-asset loop over the registry list API.
+# =======================================================
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source_ema import f_derating_registry as reg
+from source_ema.ema_asset_derating import UNMAPPED_SYSTEM, AssetDeratingEngine, ragged_to_dense
+from source_ema.ema_climate_extractor import ClimateExtractor, decode_list_column, parse_list
+from source_ema.ema_derating_calculator import map_derating_function
+
+
+COLUMN = "tasmax_rcp85_205101-206012"
+ASSETS = [
+    # Nama, jenis, daya_mw, provinsi, tasmax list
+    ("A", "PLTU", 100.0, "BANTEN", "[30.0, 36.0, 41.0]"),
+    ("B", "PLTGU", 50.0, "BANTEN", "[20.0, None, 33.0]"),
+    ("C", "PLTS", 20.0, "ACEH", "[27.0, 45.0]"),
+    ("D", "PLTD", 10.0, "KALIMANTAN BARAT", "[38.0, 39.0, 40.0]"),
+    ("E", "PLTA", 70.0, "ACEH", "[44.0, 44.0, 44.0]"),
+    ("F", "PLTU", 30.0, "ATLANTIS", "[35.0, 35.0, 35.0]"),
+]
+
+
+@pytest.fixture
+def asset_engine(tmp_path):
+    path = tmp_path / "overlay.csv"
+    pd.DataFrame(ASSETS, columns=["Nama", "jenis", "daya_mw", "provinsi", COLUMN]).to_csv(path, index=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return AssetDeratingEngine(ClimateExtractor(str(path)))
+
+
+def _reference():
+    """(steps x assets) derated MW: each asset's own temperature, missing step = full capacity."""
+    # parse_list drops None items, so later values move up one step
+    out = np.empty((3, len(ASSETS)))
+    for j, (_, jenis, daya, _, cell) in enumerate(ASSETS):
+        func = map_derating_function(jenis)
+        series = parse_list(cell)
+        for t in range(3):
+            T = series[t] if t < len(series) else None
+            out[t, j] = daya if func is None or T is None else reg.DERATING_FUNCTIONS[func]([T], daya)[0]
+    return out
+
+
+def test_ragged_to_dense_pads_with_nan():
+    col, _ = decode_list_column(["[1, 2, 3]", "[4]", "[]"])
+    dense = ragged_to_dense(col, 1, 3)
+    np.testing.assert_array_equal(dense[:, 0], [2, 3])
+    assert np.isnan(dense[:, 1:]).all()
+
+
+def test_derate_regions_matches_per_asset_loop(asset_engine):
+    expected = _reference()
+    result = asset_engine.derate_regions(scenario="rcp85", start=2051)
+
+    np.testing.assert_allclose(result["nation"].to_numpy(), expected.sum(axis=1), rtol=1e-6)
+    prov = result["provinsi"]
+    for p in prov.columns:
+        cols = [j for j, a in enumerate(ASSETS) if a[3] == p]
+        np.testing.assert_allclose(prov[p].to_numpy(), expected[:, cols].sum(axis=1), rtol=1e-6)
+
+    system = result["system"]
+    np.testing.assert_allclose(system["Jamali"], expected[:, [0, 1]].sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(system["Sumatera"], expected[:, [2, 4]].sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(system["Khatulistiwa"], expected[:, 3], rtol=1e-6)
+    np.testing.assert_allclose(system[UNMAPPED_SYSTEM], expected[:, 5], rtol=1e-6)
+
+    cap = result["capacity_mw"]
+    assert cap["nation"] == sum(a[2] for a in ASSETS)
+    assert cap["system"]["Jamali"] == 150.0
+    assert list(result["nation"].index.get_level_values("column").unique()) == [COLUMN]
+
+
+def test_chunking_does_not_change_results(asset_engine):
+    a = asset_engine.derate_regions([COLUMN], chunk_steps=1)
+    b = asset_engine.derate_regions([COLUMN], chunk_steps=366)
+    pd.testing.assert_frame_equal(a["system"], b["system"])
@@ -0,0 +1,62 @@
+# =======================================================
+# test_benchmarks.py
+# Benchmark harness helpers and a tiny end-to-end run / compare.
+# =======================================================
+
+import json
+
+import pytest
+
+from benchmarks import compare, run_benchmarks
+
+
+def test_measure_runs_setup_untimed():
+    calls = []
+    result, stats = run_benchmarks.measure(lambda x: x * 2, repeat=3, setup=lambda: calls.append(1) or 21)
+    assert result == 42
+    assert len(calls) == 4                      # 3 timed runs + 1 traced run
+    assert stats["repeat"] == 3
+    assert 0 <= stats["best_s"] <= stats["median_s"]
+    assert stats["peak_mb"] >= 0
+
+
+def test_accepts():
+    def f(a, percentiles=None):
+        pass
+    assert run_benchmarks._accepts(f, "percentiles")
+    assert not run_benchmarks._accepts(f, "mean")
+    assert not run_benchmarks._accepts(object(), "x")
+
+
+def test_run_and_compare(tmp_path, capsys):
+    args = run_benchmarks.parse_args([
+        "--plants", "60", "--assets", "80", "--provinces", "5", "--columns", "10",
+        "--list-len", "12", "--scenarios", "20", "--registry-values", "200", "--repeat", "1",
+        "--workdir", str(tmp_path / "work"),
+    ])
+    report = run_benchmarks.run(args)
+    stages = {r["stage"] for r in report["results"]}
+    assert {"engine.load", "engine.loss_curve", "climate.load", "climate.load+compute_minmax",
+            "climate.compute_national_temperatures"} <= stages
+    assert report["skipped"] == []              # this tree has every optional API
+    assert "workdir" not in report["config"]
+
+    base = tmp_path / "base.json"
+    base.write_text(json.dumps(report))
+    slow = json.loads(json.dumps(report))
+    slow["results"][0]["best_s"] = slow["results"][0]["best_s"] * 2 + 1.0
+    new = tmp_path / "new.json"
+    new.write_text(json.dumps(slow))
+
+    assert compare.main([str(base), str(base)]) == 0
+    assert compare.main([str(base), str(new)]) == 1
+    assert "regression" in capsys.readouterr().out
+
+
+def test_compare_skips_missing_stages():
+    base = {"a": {"best_s": 1.0, "peak_mb": 1.0}, "b": {"best_s": 1.0, "peak_mb": 1.0}}
+    new = {"a": {"best_s": 0.5, "peak_mb": 2.0}}
+    (row,) = compare.compare(base, new)
+    assert row[0] == "a"
+    assert row[3] == pytest.approx(2.0)
+    assert row[-1] is False
@@ -0,0 +1,108 @@
+# =======================================================
+# test_capacity_analytics.py
+# Exact loss statistics and the streaming LossAnalytics sketch vs
+# np.percentile / direct counts on the derated series.
+# =======================================================
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_inputs
+from source_ema.ema_asset_derating import AssetDeratingEngine
+from source_ema.ema_capacity_analytics import LossAnalytics, exact_loss_statistics, loss_duration_curve
+from source_ema.ema_climate_extractor import ClimateExtractor
+
+
+WINDOW = dict(scenario="rcp85", start=2051)
+
+
+@pytest.fixture(scope="module")
+def asset_engine(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("analytics")
+    _, overlay = write_inputs(str(workdir), 10, 300, 8, 4, 24, seed=5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return AssetDeratingEngine(ClimateExtractor(overlay))
+
+
+def _loss_percent(asset_engine):
+    """(steps x regions) loss % in LossAnalytics region order, from derate_regions."""
+    r = asset_engine.derate_regions(**WINDOW)
+    cap = r["capacity_mw"]
+    parts = [1 - r["provinsi"] / pd.Series(cap["provinsi"]),
+             1 - r["system"] / pd.Series(cap["system"]),
+             (1 - r["nation"] / cap["nation"]).to_frame("INDONESIA")]
+    return 100 * pd.concat(parts, axis=1).to_numpy()
+
+
+def test_exact_loss_statistics():
+    loss = pd.DataFrame({"a": [1.0, 5.0, 3.0, np.nan, 2.0], "b": [np.nan] * 5, "c": [4.0, 4.0, 0.0, 1.0, 9.0]})
+    out = exact_loss_statistics(loss, percentiles=(50, 90), thresholds=(3.0,), steps_per_year=12)
+    assert list(out.index) == ["a", "b", "c"]
+    assert out.loc["a", "p90"] == pytest.approx(np.percentile([1, 5, 3, 2], 90))
+    assert out.loc["c", "p50"] == pytest.approx(4.0)
+    assert out.loc["a", "exceed_3"] == pytest.approx(0.5)
+    assert out.loc["c", "rp_3_years"] == pytest.approx(1 / (0.6 * 12))
+    assert out.loc["b"].isna().all()
+
+    with pytest.raises(ValueError):
+        exact_loss_statistics(loss, thresholds=(3.0,))
+
+
+def test_loss_duration_curve():
+    curve = loss_duration_curve([2.0, np.nan, 5.0, 1.0])
+    assert curve["loss"].tolist() == [5.0, 2.0, 1.0]
+    np.testing.assert_allclose(curve["duration_fraction"], [1 / 3, 2 / 3, 1.0])
+
+
+def test_streaming_matches_exact(asset_engine):
+    ana = LossAnalytics(asset_engine).accumulate(chunk_steps=7, **WINDOW)
+    loss = _loss_percent(asset_engine)
+    exact = exact_loss_statistics(loss, percentiles=(50, 90, 99))
+    assert ana.n_steps == loss.shape[0] == 24
+
+    pct = ana.percentiles([50, 90, 99])
+    for q in (50, 90, 99):
+        np.testing.assert_allclose(pct[f"p{q}_loss_percent"], exact[f"p{q}"], atol=0.006, equal_nan=True)
+    np.testing.assert_allclose(pct["p90_loss_mw"], pct["p90_loss_percent"] / 100 * ana.capacity_mw)
+
+    # one 10-year window spread over 24 monthly-style items
+    assert ana.steps_per_year == pytest.approx(2.4)
+    rp = ana.return_periods([1.0, 3.0])
+    valid = ~np.isnan(loss).all(axis=0)         # regions without capacity stay NaN
+    for x in (1.0, 3.0):
+        expected = np.where(valid, (loss >= x).mean(axis=0), np.nan)
+        np.testing.assert_allclose(rp[f"exceed_{x:g}"], expected, atol=1 / 24, equal_nan=True)
+    with np.errstate(divide="ignore"):
+        np.testing.assert_allclose(rp["rp_1_years"], 1 / (rp["exceed_1"] * 2.4))
+
+
+def test_return_periods_need_steps_per_year(asset_engine):
+    ana = LossAnalytics(asset_engine)
+    assert np.isnan(ana.steps_per_year)
+    with pytest.raises(ValueError):
+        ana.return_periods([1.0])
+    assert "exceed_1" in ana.return_periods([1.0], steps_per_year=12)
+
+
+def test_merge_equals_single_pass(asset_engine):
+    columns = asset_engine.window_columns(start=2051)
+    assert len(columns) == 2
+    single = LossAnalytics(asset_engine).accumulate(columns)
+    left = LossAnalytics(asset_engine).accumulate(columns[:1])
+    right = LossAnalytics(asset_engine).accumulate(columns[1:])
+    left.merge(right)
+
+    assert (left.n_steps, left.n_years) == (single.n_steps, single.n_years)
+    pd.testing.assert_frame_equal(left.percentiles([50, 99]), single.percentiles([50, 99]))
+
+
+def test_loss_duration_curve_from_sketch(asset_engine):
+    ana = LossAnalytics(asset_engine).accumulate(**WINDOW)
+    curve = ana.loss_duration_curve("system", "Jamali", n_points=5)
+    assert curve["loss_percent"].is_monotonic_decreasing
+    nation = ana.loss_duration_curve("nation", "INDONESIA", n_points=3)
+    assert nation["loss_percent"].iloc[-1] == pytest.approx(ana.percentiles([0])["p0_loss_percent"].iloc[-1])
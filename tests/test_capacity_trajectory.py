@@ -0,0 +1,87 @@
+# =======================================================
+# test_capacity_trajectory.py
+# Trajectory parsing and year x scenario derating vs DeratingEngine
+# evaluated one year at a time.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source_ema.ema_capacity_trajectory import CapacityTrajectory, read_trajectory, window_for_year
+from source_ema.ema_derating_calculator import DeratingEngine
+
+
+WIDE = pd.DataFrame({
+    "Nama": ["U1", "G1", "S1", "H1"],
+    "jenis": ["PLTU", "PLTGU", "PLTS", "PLTA"],
+    "2040": [500.0, 200.0, 300.0, 100.0],
+    "2024": [400.0, 150.0, np.nan, 100.0],
+    "2031": [450.0, 180.0, 100.0, 100.0],
+})
+
+NATIONAL = pd.DataFrame({
+    "scenario": ["85_2024", "85_2031_2040", "85_2051_2060", "45_2024", "45_2031_2040", "45_2051_2060"],
+    "national_min": [25.0, 26.0, 27.0, 24.0, 25.0, 26.0],
+    "national_max": [34.0, 36.5, 38.0, 33.0, 35.0, 36.0],
+})
+
+
+def _long(wide):
+    long = wide.melt(id_vars=["Nama", "jenis"], var_name="year", value_name="daya_mw").dropna()
+    return long.sample(frac=1.0, random_state=0)
+
+
+def test_wide_long_and_path_inputs_agree(tmp_path):
+    plants, years, capacity = read_trajectory(WIDE)
+    assert years.tolist() == [2024, 2031, 2040]
+    assert capacity.shape == (3, 4)
+    assert capacity[0].tolist() == [400.0, 150.0, 0.0, 100.0]
+
+    path = tmp_path / "trajectory.csv"
+    _long(WIDE).to_csv(path, index=False)
+    for source in (path, str(path)):          # pathlib.Path and str
+        p2, y2, c2 = read_trajectory(source)
+        order = [p2["Nama"].tolist().index(n) for n in plants["Nama"]]
+        assert y2.tolist() == years.tolist()
+        np.testing.assert_array_equal(c2[:, order], capacity)
+
+    with pytest.raises(ValueError):
+        read_trajectory(pd.DataFrame({"jenis": ["PLTU"], "daya_mw": [1.0]}))
+
+
+def test_window_for_year():
+    assert window_for_year(2024) == "2024"
+    assert window_for_year(2035) == "2031_2040"
+    assert window_for_year(2045) == "2051_2060"
+    with pytest.raises(ValueError):
+        window_for_year(2070)
+
+
+def test_loss_by_year_matches_engine(tmp_path):
+    traj = CapacityTrajectory(WIDE)
+    T = traj.window_temperatures(NATIONAL, scenarios=["45", "85"])
+    assert T.loc["85"].tolist() == [34.0, 36.5, 36.5]
+
+    table = traj.loss_by_year(T).set_index(["scenario", "year"])
+    for j, year in enumerate(traj.years):
+        path = tmp_path / f"fleet_{year}.csv"
+        WIDE[["Nama", "jenis"]].assign(daya_mw=traj.capacity[j]).to_csv(path, index=False)
+        eng = DeratingEngine(str(path))
+        for sc in ("45", "85"):
+            expected = eng.evaluate(T.loc[sc, year])
+            row = table.loc[(sc, year)]
+            assert row["total_loss_mw"] == pytest.approx(expected["total_loss_mw"], abs=0.011)
+            assert row["total_before_mw"] == pytest.approx(expected["total_before_mw"])
+
+    by_tech = traj.loss_by_technology(T)
+    np.testing.assert_allclose(by_tech.sum(axis=1).to_numpy(), table["total_loss_mw"].to_numpy(), atol=0.05)
+    assert (by_tech["PLTA"] == 0).all()
+
+
+def test_errors():
+    traj = CapacityTrajectory(WIDE)
+    with pytest.raises(ValueError):
+        traj.window_temperatures(NATIONAL, scenarios=["26"])
+    with pytest.raises(ValueError):
+        traj.derate([30.0, 31.0])
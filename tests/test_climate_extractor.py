@@ -0,0 +1,205 @@
+# =======================================================
+# test_climate_extractor.py
+# List decoding, column indexing and window statistics of the climate
+# extractors, checked against the original per-cell / per-column logic
+# on a synthetic overlay.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_inputs
+from source_ema.ema_climate_extractor import (
+    ClimateExtractor,
+    ColumnIndex,
+    ColumnKey,
+    StreamingClimateExtractor,
+    decode_list_column,
+    parse_column_name,
+    parse_list,
+)
+
+
+def _rows(col):
+    return [col.values[a:b].tolist() for a, b in zip(col.offsets[:-1], col.offsets[1:])]
+
+
+def _assert_matches_parse_list(cells):
+    col, errors = decode_list_column(cells)
+    expected = [np.float32(parse_list(c)).tolist() for c in cells]
+    assert _rows(col) == expected
+    return errors
+
+
+def test_decode_fast_path():
+    cells = ["[31.5, 32.25, 30.0]", "[]", "", "  [1e1, -2.5] ", "[28.125]"]
+    assert _assert_matches_parse_list(cells) == 0
+
+
+def test_decode_slow_path_mixed_cells():
+    # list objects and None items force the per-cell path
+    cells = ["[31.5, None, 30.0]", [29.0, 33.5], np.array([27.25]), "[None]", None, 3.5]
+    assert _assert_matches_parse_list(cells) == 0
+
+
+def test_decode_counts_malformed_cells():
+    cells = ["[31.5, 30.0]", "not a list", "[1, 2", "[abc, 1.0]", "[32.0]"]
+    assert _assert_matches_parse_list(cells) == 3
+
+
+@pytest.fixture(scope="module")
+def overlay_csv(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("overlay")
+    _, overlay = write_inputs(str(workdir), 50, 600, 12, 10, 40, seed=7)
+    return overlay
+
+
+def test_extractor_decodes_every_list_column(overlay_csv):
+    raw = pd.read_csv(overlay_csv)
+    ce = ClimateExtractor(overlay_csv)
+    list_cols = [c for c in raw.columns if c.startswith(("tasmax_", "tmax_"))]
+    assert sorted(ce.tasmax) == sorted(list_cols)
+    assert "tasmax_rcp85_203101-204012" not in ce.assets.columns
+    for c in list_cols:
+        expected = [np.float32(parse_list(cell)).tolist() for cell in raw[c]]
+        assert _rows(ce.tasmax[c]) == expected
+    assert sum(ce.parse_errors.values()) == 0
+
+
+# baseline substring rules: output label -> predicate on the column name
+BASELINE_WINDOWS = {
+    "assets_45_2031_2040": lambda c: "rcp45" in c and "203101" in c,
+    "assets_85_2031_2040": lambda c: "rcp85" in c and "203101" in c,
+    "assets_45_2051_2060": lambda c: "rcp45" in c and "205101" in c,
+    "assets_85_2051_2060": lambda c: "rcp85" in c and "205101" in c,
+    "assets_45_2024": lambda c: "rcp45" in c and "202401-202412" in c,
+    "assets_85_2024": lambda c: "rcp85" in c and "202401-202412" in c,
+    **{f"ERA5_{yr}": (lambda c, yr=yr: c.startswith(f"tmax_ERA5_{yr}")) for yr in ClimateExtractor.ERA5_YEARS},
+}
+
+
+def _reference_stats(raw, qs=(10, 50, 90)):
+    """Per-provinsi window stats the original way: flatten parse_list per province group."""
+    rows = {}
+    for label, match in BASELINE_WINDOWS.items():
+        colset = [c for c in raw.columns if match(c)]
+        for prov, group in raw.groupby("provinsi"):
+            vals = np.array([x for cell in group[colset].to_numpy().ravel() for x in parse_list(cell)])
+            stats = rows.setdefault(prov, {})
+            if vals.size == 0:
+                continue
+            stats[f"min_{label}"] = vals.min()
+            stats[f"max_{label}"] = vals.max()
+            stats[f"mean_{label}"] = vals.mean()
+            for q in qs:
+                stats[f"p{q}_{label}"] = np.percentile(vals, q)
+    return pd.DataFrame.from_dict(rows, orient="index").sort_index()
+
+
+def test_compute_minmax_matches_per_province_flatten(overlay_csv):
+    raw = pd.read_csv(overlay_csv)
+    ce = ClimateExtractor(overlay_csv)
+    out = ce.compute_minmax(mean=True, percentiles=[10, 50, 90]).set_index("provinsi").sort_index()
+    expected = _reference_stats(raw)
+
+    assert set(expected.columns) <= set(out.columns)
+    assert list(out.index) == list(expected.index)
+    np.testing.assert_allclose(out[expected.columns].to_numpy(float), expected.to_numpy(float), atol=1.5e-3)
+    # ERA5 years missing from the overlay stay NaN
+    assert out["min_ERA5_2023"].isna().all()
+
+
+# -------------------------------------
+# Column index
+# -------------------------------------
+
+@pytest.mark.parametrize("name, key", [
+    ("tasmax_rcp85_203101-204012", ColumnKey("CMIP", "rcp85", 203101, 204012)),
+    ("tasmax_rcp85_20310101-20401231", ColumnKey("CMIP", "rcp85", 203101, 204012)),
+    ("tasmax_day_SSP2-4.5_2051-2060", ColumnKey("CMIP", "ssp245", 205101, 206012)),
+    ("tasmax_rcp45_ERA5bc_202401-202412", ColumnKey("CMIP", "rcp45", 202401, 202412)),
+    ("tmax_ERA5_2024", ColumnKey("ERA5", None, 202401, 202412)),
+    ("tmax_ERA5_201001-201012", ColumnKey("ERA5", None, 201001, 201012)),
+    ("daya_mw", None),
+])
+def test_parse_column_name(name, key):
+    assert parse_column_name(name) == key
+
+
+def test_column_index_lookup_and_unparsed():
+    cols = ["tasmax_rcp85_20310101-20401231", "tasmax_ssp585_203101-204012",
+            "tmax_ERA5_2024", "tasmax_rcp85_future", "provinsi"]
+    with pytest.warns(UserWarning, match="tasmax_rcp85_future"):
+        index = ColumnIndex(cols)
+    assert index.unparsed == ["tasmax_rcp85_future"]
+    assert index.lookup(scenario="RCP8.5", start=2031) == ["tasmax_rcp85_20310101-20401231"]
+    assert index.lookup(scenario="SSP5-8.5") == ["tasmax_ssp585_203101-204012"]
+    assert index.lookup(source="ERA5", start=2024, end=2024) == ["tmax_ERA5_2024"]
+
+
+def test_default_windows_match_baseline_substrings(overlay_csv):
+    ce = ClimateExtractor(overlay_csv)
+    found = ce._find_columns()
+    for label, match in BASELINE_WINDOWS.items():
+        assert sorted(found[label]) == sorted(c for c in ce.all_cols if match(c))
+
+
+# -------------------------------------
+# National temperatures
+# -------------------------------------
+
+def test_national_temperatures_match_baseline_merge(overlay_csv):
+    ce = ClimateExtractor(overlay_csv)
+    out = ce.compute_minmax()
+    weights = ce.capacity_weights()
+    assert ce.capacity_weights() is weights
+
+    cap = ce.assets.groupby("provinsi")["daya_mw"].sum().reset_index()
+    cap.columns = ["provinsi", "capacity_mw"]
+    df = out.merge(cap, on="provinsi", how="left")
+
+    table = ce.compute_national_temperatures().set_index("scenario")
+    for scenario in ["45_2031_2040", "85_2051_2060", "85_2024"]:
+        expected_min = round(float(np.average(df[f"min_assets_{scenario}"], weights=df["capacity_mw"])), 3)
+        expected_max = round(float(np.average(df[f"max_assets_{scenario}"], weights=df["capacity_mw"])), 3)
+        single = ce.compute_national_temperature(scenario)
+        assert single == {"scenario": scenario, "national_min": expected_min, "national_max": expected_max}
+        assert table.loc[scenario, "national_min"] == expected_min
+        assert table.loc[scenario, "national_max"] == expected_max
+
+    with pytest.raises(ValueError):
+        ce.compute_national_temperature("85_2099")
+
+
+# -------------------------------------
+# Streaming vs in-memory
+# -------------------------------------
+
+def test_streaming_matches_in_memory(overlay_csv):
+    kwargs = dict(mean=True, percentiles=[10, 50, 90])
+    full = ClimateExtractor(overlay_csv).compute_minmax(**kwargs)
+    streamed = StreamingClimateExtractor(overlay_csv, chunksize=97).compute_minmax(**kwargs)
+
+    full = full.set_index("provinsi").sort_index()
+    streamed = streamed.set_index("provinsi").sort_index()
+    assert list(streamed.columns) == list(full.columns)
+    assert list(streamed.index) == list(full.index)
+
+    # percentiles come from the sketch: within resolution / 2, plus output rounding
+    exact = [c for c in full.columns if not c.startswith("p")]
+    approx = [c for c in full.columns if c.startswith("p")]
+    assert exact and approx
+    pd.testing.assert_frame_equal(streamed[exact], full[exact], check_exact=False, rtol=1e-9)
+    np.testing.assert_allclose(streamed[approx].to_numpy(float), full[approx].to_numpy(float), atol=0.006)
+
+
+def test_streaming_national_temperatures_match(overlay_csv):
+    full = ClimateExtractor(overlay_csv)
+    full.compute_minmax()
+    streamed = StreamingClimateExtractor(overlay_csv, chunksize=97)
+    streamed.compute_minmax()
+
+    a = full.compute_national_temperatures().set_index("scenario").sort_index()
+    b = streamed.compute_national_temperatures().set_index("scenario").sort_index()
+    pd.testing.assert_frame_equal(b, a, check_exact=False, rtol=1e-9)
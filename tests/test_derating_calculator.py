@@ -0,0 +1,131 @@
+# =======================================================
+# test_derating_calculator.py
+# DeratingEngine batch / pure evaluation paths, compiled plant table
+# and the closed-form LossCurve.
+# =======================================================
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema import f_derating_registry as reg
+from source_ema.ema_derating_calculator import DeratingEngine, LossCurve, compile_plant_table
+
+
+T_VALUES = np.round(np.arange(-5.0, 60.0, 0.37), 2)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(400, seed=3).to_csv(path, index=False)
+    return DeratingEngine(str(path))
+
+
+def _list_api_derated(df, T):
+    """Per-plant derated MW through the registry list API (the original path)."""
+    out = []
+    for daya, func in zip(df["daya_mw"], df["derating_function"]):
+        out.append(reg.DERATING_FUNCTIONS[func]([T], daya)[0] if isinstance(func, str) else daya)
+    return np.array(out)
+
+
+def test_batch_matches_list_api_and_single_calls(engine):
+    T = np.array([20.0, 27.5, 36.0, 48.0])
+    derated, summary = engine.apply_derating_batch(T)
+    assert derated.shape == (T.size, len(engine.df))
+    assert list(summary["T_nat"]) == list(T)
+
+    for i, t in enumerate(T):
+        np.testing.assert_allclose(derated[i], _list_api_derated(engine.df, t), rtol=1e-12)
+        engine.apply_derating(t)
+        single = engine.summarize()
+        row = summary.iloc[i]
+        for k, v in single.items():
+            assert row[k] == pytest.approx(v)
+
+
+def test_evaluate_is_pure(engine):
+    before = engine.df.copy()
+    result = engine.evaluate(38.0)
+    assert engine.df.equals(before)
+    assert "derated_mw" not in engine.df.columns
+
+    engine.apply_derating(38.0)
+    np.testing.assert_allclose(result["derated_mw"], engine.df["derated_mw"], rtol=1e-12)
+    assert {k: v for k, v in result.items() if k != "derated_mw"} == engine.summarize()
+
+
+def test_plant_table_recompiles_once_after_registry_edit(engine, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    old = engine.plant_table()
+    assert engine.plant_table() is old
+    old_loss = engine.evaluate(40.0)["total_loss_mw"]
+
+    monkeypatch.setattr(reg, "GLOBAL_ALPHA_COAL", reg.GLOBAL_ALPHA_COAL * 2)
+    with ThreadPoolExecutor(8) as pool:
+        tables = list(pool.map(lambda _: engine.plant_table(), range(64)))
+    assert all(t is tables[0] for t in tables)
+    assert tables[0] is not old
+
+    coal = np.asarray(tables[0].function_id) == reg.LINEAR_DERATING_LAWS.index("coal_derating")
+    assert coal.any()
+    np.testing.assert_allclose(tables[0].alpha[coal], reg.GLOBAL_ALPHA_COAL)
+    with ThreadPoolExecutor(8) as pool:
+        losses = list(pool.map(lambda _: engine.evaluate(40.0)["total_loss_mw"], range(32)))
+    assert len(set(losses)) == 1
+    assert losses[0] > old_loss
+
+
+def test_compiled_table_maps_every_jenis(engine):
+    table = engine.plant_table()
+    for jenis, fid in zip(table.jenis, table.function_id):
+        func = engine._map_function(jenis)
+        assert fid == (reg.LINEAR_DERATING_LAWS.index(func) if func else -1)
+    assert not table.daya_mw.flags.writeable
+    assert set(engine.excluded_plants()["jenis"]) == {j for j in table.jenis if engine._map_function(j) is None}
+
+
+def test_compile_params_override(engine):
+    table = compile_plant_table(engine.df, {"alpha_coal": 0.01})
+    coal = np.asarray(table.function_id) == reg.LINEAR_DERATING_LAWS.index("coal_derating")
+    np.testing.assert_allclose(table.alpha[coal], 0.01)
+    np.testing.assert_allclose(table.alpha[~coal], engine.plant_table().alpha[~coal])
+
+
+# -------------------------------------
+# LossCurve
+# -------------------------------------
+
+def test_loss_curve_matches_batch(engine):
+    T = np.concatenate([T_VALUES, [16.0, 25.0, 35.0, 45.0]])
+    derated, summary = engine.apply_derating_batch(T)
+    expected = engine.plants.total_mw - derated.sum(axis=1)
+
+    curve = LossCurve(engine.plant_table())
+    np.testing.assert_allclose(curve.loss_mw(T), expected, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(curve.loss_percent(T), summary["loss_percent"], atol=0.006)
+
+
+def test_loss_curve_inverse_round_trip(engine):
+    # without gas_derating the fleet loss is non-decreasing in T
+    df = engine.df[engine.df["derating_function"] != "gas_derating"]
+    curve = LossCurve(compile_plant_table(df))
+
+    T = np.linspace(26.0, 44.0, 37)
+    loss = curve.loss_mw(T)
+    np.testing.assert_allclose(curve.loss_mw(curve.temperature_at_loss_mw(loss)), loss, rtol=1e-9, atol=1e-6)
+
+    pct = curve.loss_percent(T)
+    back = curve.temperature_at_loss_percent(pct)
+    np.testing.assert_allclose(curve.loss_percent(back), pct, rtol=1e-9, atol=1e-9)
+    assert np.all(back <= T + 1e-9)
+
+
+def test_engine_loss_curve_follows_recompile(engine, monkeypatch):
+    curve = engine.loss_curve()
+    assert engine.loss_curve() is curve
+    monkeypatch.setattr(reg, "GLOBAL_ALPHA_COAL", reg.GLOBAL_ALPHA_COAL * 2)
+    assert engine.loss_curve() is not curve
+    assert engine.loss_curve().loss_mw(40.0) == pytest.approx(engine.evaluate(40.0)["total_loss_mw"], abs=0.01)
@@ -0,0 +1,87 @@
+# =======================================================
+# test_derating_memo.py
+# DeratingMemo vs DeratingEngine.evaluate, LRU bookkeeping and invalidation.
+# =======================================================
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema import f_derating_registry as reg
+from source_ema.ema_derating_calculator import DeratingEngine
+from source_ema.ema_derating_memo import SUMMARY_KEYS, DeratingMemo
+
+
+@pytest.fixture
+def fleet_csv(tmp_path):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(150, seed=2).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def engine(fleet_csv):
+    return DeratingEngine(fleet_csv)
+
+
+def _expected(engine, T):
+    return {k: engine.evaluate(T)[k] for k in SUMMARY_KEYS}
+
+
+def test_matches_engine_at_quantized_temperature(engine):
+    memo = DeratingMemo(engine, resolution=0.01)
+    out = memo.evaluate(31.2345)
+    assert out["T_nat"] == pytest.approx(31.23)
+    assert {k: out[k] for k in SUMMARY_KEYS} == pytest.approx(_expected(engine, 31.23))
+
+    df = memo.evaluate_many([30.0, 30.001, 35.5, 30.0])
+    assert memo.cache_info().misses == 3        # 31.23, 30.00, 35.50
+    assert df["total_loss_mw"].tolist() == pytest.approx([_expected(engine, t)["total_loss_mw"]
+                                                          for t in (30.0, 30.0, 35.5, 30.0)])
+
+
+def test_params_are_part_of_the_key(engine):
+    memo = DeratingMemo(engine)
+    base = memo.evaluate(38.0)["total_loss_mw"]
+    steeper = memo.evaluate(38.0, {"alpha_coal": 0.01})["total_loss_mw"]
+    assert steeper > base
+    assert memo.cache_info().misses == 2
+
+
+def test_lru_eviction(engine):
+    memo = DeratingMemo(engine, maxsize=3)
+    memo.evaluate_many([20.0, 21.0, 22.0])
+    memo.evaluate(20.0)                         # refresh 20.0
+    memo.evaluate(23.0)                         # evicts 21.0
+    info = memo.cache_info()
+    assert (info.evictions, info.currsize) == (1, 3)
+    memo.evaluate(20.0)
+    assert memo.cache_info().hits == info.hits + 1
+
+
+def test_nan_temperatures_share_one_entry(engine):
+    memo = DeratingMemo(engine)
+    memo.evaluate_many([np.nan, 30.0, np.nan])
+    memo.evaluate(np.nan)
+    info = memo.cache_info()
+    assert (info.misses, info.currsize) == (2, 2)
+    assert np.isnan(memo.evaluate(np.nan)["total_loss_mw"])
+
+
+def test_registry_edit_invalidates(engine, monkeypatch):
+    memo = DeratingMemo(engine)
+    before = memo.evaluate(40.0)["total_loss_mw"]
+    monkeypatch.setattr(reg, "GLOBAL_ALPHA_COAL", reg.GLOBAL_ALPHA_COAL * 2)
+    after = memo.evaluate(40.0)
+    assert memo.cache_info().invalidations == 1
+    assert after["total_loss_mw"] > before
+    assert after["total_loss_mw"] == pytest.approx(_expected(engine, 40.0)["total_loss_mw"])
+
+
+def test_csv_edit_reloads_engine(engine, fleet_csv):
+    memo = DeratingMemo(engine)
+    before = memo.evaluate(40.0)["total_before_mw"]
+    synthetic_fleet(150, seed=3).to_csv(fleet_csv, index=False)
+    after = memo.evaluate(40.0)["total_before_mw"]
+    assert after != before
+    assert after == pytest.approx(round(DeratingEngine(fleet_csv).plants.total_mw, 2))
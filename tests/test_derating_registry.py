@@ -0,0 +1,101 @@
+# =======================================================
+# test_derating_registry.py
+# Registry list API, array kernels and compiled linear coefficients vs the
+# original per-value formulas.
+# =======================================================
+
+import numpy as np
+import pytest
+
+from source_ema import f_derating_registry as reg
+
+
+T_VALUES = np.round(np.arange(-5.0, 60.0, 0.37), 2)
+DAYA_MW = 123.4
+
+
+def _linear(alpha, T_ref):
+    return lambda T, P: P * (1 - alpha * max(0, T - T_ref))
+
+
+def _cummins(T, P):
+    T_ref, T_max, m_min = reg.GLOBAL_TREF_DIESEL_CUMMINS, reg.GLOBAL_TMAX_DIESEL_CUMMINS, reg.GLOBAL_MMIN_DIESEL_CUMMINS
+    if T <= T_ref:
+        return P
+    if T >= T_max:
+        return P * m_min
+    return P * (1.0 - (1.0 - m_min) / (T_max - T_ref) * (T - T_ref))
+
+
+def _diesel(T, P, altitude_m=1.0):
+    a = reg.GLOBAL_ALPHA_DIESEL_AMB * max(0.0, T - reg.GLOBAL_TREF_DIESEL)
+    b = max(0.0, altitude_m - reg.GLOBAL_ALT_REF_DIESEL) * reg.GLOBAL_ALPHA_ALT_PER_M
+    return P * max(0.0, min(1.0, 1.0 - (a + b)))
+
+
+# scalar formulas of the original list API, one value at a time
+REFERENCE = {
+    "gas_derating": lambda T, P: P * (-reg.GLOBAL_ALPHA * T + 1.15),
+    "oc_gas_derating": _linear(reg.GLOBAL_ALPHA_OCGT, reg.GLOBAL_TREF_OCGT),
+    "cc_gas_derating": _linear(reg.GLOBAL_ALPHA_CCGT, reg.GLOBAL_TREF_CCGT),
+    "coal_derating": _linear(reg.GLOBAL_ALPHA_COAL, reg.GLOBAL_TREF_COAL),
+    "nuclear_derating": _linear(reg.GLOBAL_ALPHA_NUCLEAR, reg.GLOBAL_TREF_NUCLEAR),
+    "pv_derating": lambda T, P: P * (reg.GLOBAL_IRRADIANCE / 1000) * (1 - reg.GLOBAL_EPSILON * (T - reg.GLOBAL_TREF)),
+    "diesel_derating_cummins": _cummins,
+    "diesel_derating": _diesel,
+}
+
+
+def _call(func, name):
+    if name == "gas_derating":
+        return func(T_VALUES.tolist(), DAYA_MW, alpha="glob")
+    return func(T_VALUES.tolist(), DAYA_MW)
+
+
+@pytest.mark.parametrize("name", sorted(REFERENCE))
+def test_list_and_array_api_match_reference(name):
+    expected = [REFERENCE[name](T, DAYA_MW) for T in T_VALUES.tolist()]
+
+    listed = _call(reg.DERATING_FUNCTIONS[name], name)
+    assert isinstance(listed, list)
+    np.testing.assert_allclose(listed, expected, rtol=1e-12, atol=1e-9)
+
+    arrayed = _call(reg.ARRAY_DERATING_FUNCTIONS[name], name)
+    np.testing.assert_allclose(arrayed, expected, rtol=1e-12, atol=1e-9)
+
+
+def test_transmission_matches_reference():
+    wind = np.linspace(0.0, 12.0, T_VALUES.size)
+    d_m = 28.1 / 1000
+    T_c = reg.GLOBAL_T_CONDUCTOR
+    expected = []
+    for v, T_a in zip(wind.tolist(), T_VALUES.tolist()):
+        Q_r = np.pi * d_m * reg.GLOBAL_EMISSIVITY * reg.GLOBAL_SIGMA * ((T_c + 273.15) ** 4 - (T_a + 273.15) ** 4)
+        Q_s = reg.GLOBAL_ABSORPTIVITY * reg.GLOBAL_SOLAR_RAD * np.pi * d_m
+        Q_c = np.pi * d_m * 10.45 * (1 + 10 * np.sqrt(v)) * (T_c - T_a)
+        expected.append(Q_c + Q_r - Q_s)
+
+    listed = reg.DERATING_FUNCTIONS["transmission_derating"](wind.tolist(), T_VALUES.tolist(), 28.1)
+    np.testing.assert_allclose(listed, expected, rtol=1e-12)
+    arrayed = reg.ARRAY_DERATING_FUNCTIONS["transmission_derating"](wind, T_VALUES, 28.1)
+    np.testing.assert_allclose(arrayed, expected, rtol=1e-12)
+
+
+def test_array_kernels_broadcast_per_plant():
+    # (steps x plants) temperatures against per-plant capacity and parameters
+    T = T_VALUES[:, None]
+    daya = np.array([10.0, 20.0, 30.0])
+    alpha = np.array([0.002, 0.0034, 0.005])
+    out = reg.coal_derating_array(T, daya, alpha_coal=alpha)
+    assert out.shape == (T_VALUES.size, 3)
+    for j in range(3):
+        expected = reg.coal_derating(T_VALUES.tolist(), daya[j], alpha_coal=alpha[j])
+        np.testing.assert_allclose(out[:, j], expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("name", reg.LINEAR_DERATING_LAWS)
+def test_linear_coefficients_match_reference(name):
+    c = reg.linear_coefficients(name)
+    m = reg.linear_multiplier(T_VALUES, **c)
+    expected = [REFERENCE[name](T, DAYA_MW) for T in T_VALUES.tolist()]
+    np.testing.assert_allclose(DAYA_MW * m, expected, rtol=1e-12, atol=1e-9)
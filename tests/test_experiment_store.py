@@ -0,0 +1,78 @@
+# =======================================================
+# test_experiment_store.py
+# Resumable experiment store: resume after a crash, run identity checks,
+# out-of-core reads.
+# =======================================================
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema import ema_uncertainty_model as um
+from source_ema.ema_derating_calculator import DeratingEngine
+from source_ema.ema_experiment_store import ID_COLUMN, run_resumable
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(200, seed=6).to_csv(path, index=False)
+    return DeratingEngine(str(path))
+
+
+def test_resume_after_crash_matches_one_shot(engine, tmp_path):
+    calls = []
+
+    def crashing(batch):
+        if len(calls) == 2:
+            raise RuntimeError("killed")
+        calls.append(len(batch))
+        return um.evaluate_design(engine, batch)
+
+    store_path = str(tmp_path / "store")
+    with pytest.raises(RuntimeError):
+        run_resumable(store_path, engine, 50, seed=3, batch_size=10, evaluate=crashing)
+    with open(os.path.join(store_path, "manifest.json")) as f:
+        assert [b["rows"] for b in json.load(f)["batches"]] == [10, 10]
+
+    resumed_calls = []
+
+    def counting(batch):
+        resumed_calls.append(len(batch))
+        return um.evaluate_design(engine, batch)
+
+    store = run_resumable(store_path, engine, 50, seed=3, batch_size=10, evaluate=counting)
+    assert sum(resumed_calls) == 30
+    assert len(store) == 50
+
+    full = run_resumable(str(tmp_path / "one_shot"), engine, 50, seed=3, batch_size=50)
+    a = store.load().sort_values(ID_COLUMN).reset_index(drop=True)
+    b = full.load().sort_values(ID_COLUMN).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a, b)
+    assert sorted(store.completed_ids()) == list(range(50))
+
+
+def test_rejects_another_run(engine, tmp_path):
+    store_path = str(tmp_path / "store")
+    run_resumable(store_path, engine, 25, seed=3, batch_size=10)
+    with pytest.raises(ValueError, match="another run"):
+        run_resumable(store_path, engine, 40, seed=3, batch_size=10)   # other design size
+    with pytest.raises(ValueError, match="another run"):
+        run_resumable(store_path, engine, 25, seed=4, batch_size=10)   # other seed
+    assert len(run_resumable(store_path, engine, 25, seed=3, batch_size=10)) == 25
+
+
+def test_out_of_core_reads(engine, tmp_path):
+    store = run_resumable(str(tmp_path / "store"), engine, 60, seed=1, batch_size=16)
+    df = store.load()
+    counts, edges = store.histogram("loss_percent", bins=5)
+    np.testing.assert_array_equal(counts, np.histogram(df["loss_percent"], bins=edges)[0])
+    sample = store.sample(["loss_mw"], n=20, seed=0)
+    assert len(sample) == 20 and set(sample["loss_mw"]) <= set(df["loss_mw"])
+
+    with pytest.raises(ValueError):
+        store.append(pd.DataFrame({ID_COLUMN: [99], "other": [1.0]}))
@@ -0,0 +1,84 @@
+# =======================================================
+# test_overlay_cache.py
+# Round-trip, invalidation and concurrent writers of the overlay cache.
+# =======================================================
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_inputs
+from source_ema.ema_climate_extractor import ClimateExtractor
+from source_ema.ema_overlay_cache import cache_path_for, load_overlay_cache, save_overlay_cache
+
+
+@pytest.fixture
+def overlay_csv(tmp_path):
+    _, overlay = write_inputs(str(tmp_path), 5, 300, 8, 10, 20, seed=11)
+    df = pd.read_csv(overlay)
+    df.loc[3, "Nama"] = np.nan
+    df.to_csv(overlay, index=False)
+    return overlay
+
+
+def _assert_same(a, b):
+    pd.testing.assert_frame_equal(a.assets, b.assets)
+    assert list(a.tasmax) == list(b.tasmax)
+    for c in a.tasmax:
+        np.testing.assert_array_equal(a.tasmax[c].values, b.tasmax[c].values)
+        np.testing.assert_array_equal(a.tasmax[c].offsets, b.tasmax[c].offsets)
+    assert a.parse_errors == b.parse_errors
+
+
+def test_round_trip_without_pickles(overlay_csv, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    fresh = ClimateExtractor(overlay_csv, cache_dir=cache_dir)
+    cached = ClimateExtractor(overlay_csv, cache_dir=cache_dir)
+    _assert_same(fresh, cached)
+    assert cached.assets["Nama"].isna().sum() == 1
+    pd.testing.assert_frame_equal(fresh.compute_minmax(), cached.compute_minmax())
+
+    files = [os.path.join(root, f) for root, _, names in os.walk(cache_dir) for f in names]
+    assert not any(f.endswith((".pkl", ".tmp")) for f in files)
+    for f in files:
+        if f.endswith(".npy"):
+            np.load(f, allow_pickle=False)
+
+
+def _data_dir(overlay_csv, cache_dir):
+    path = cache_path_for(overlay_csv, cache_dir)
+    return [d for d in os.listdir(path) if d.startswith("data-")][0]
+
+
+def test_changed_source_invalidates_and_retires_old_data(overlay_csv, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    ce = ClimateExtractor(overlay_csv, cache_dir=cache_dir)
+    old = _data_dir(overlay_csv, cache_dir)
+
+    df = pd.read_csv(overlay_csv)
+    df.loc[0, "daya_mw"] += 1.0
+    df.to_csv(overlay_csv, index=False)
+    assert load_overlay_cache(overlay_csv, cache_dir) is None
+
+    ClimateExtractor(overlay_csv, cache_dir=cache_dir)
+    path = cache_path_for(overlay_csv, cache_dir)
+    assert [d for d in os.listdir(path) if d.startswith("data-")] != [old]
+    assert load_overlay_cache(overlay_csv, cache_dir)["assets"]["daya_mw"][0] == ce.assets["daya_mw"][0] + 1.0
+
+
+def test_concurrent_writers_leave_one_complete_cache(overlay_csv, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    ce = ClimateExtractor(overlay_csv)
+
+    def save(_):
+        return save_overlay_cache(overlay_csv, cache_dir, ce.assets, ce.tasmax, ce.all_cols, ce.parse_errors)
+
+    with ThreadPoolExecutor(8) as pool:
+        paths = set(pool.map(save, range(16)))
+    assert paths == {cache_path_for(overlay_csv, cache_dir)}
+
+    assert os.listdir(cache_dir) == [os.path.basename(cache_path_for(overlay_csv, cache_dir))]
+    _assert_same(ce, ClimateExtractor(overlay_csv, cache_dir=cache_dir))
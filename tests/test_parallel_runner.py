@@ -0,0 +1,46 @@
+# =======================================================
+# test_parallel_runner.py
+# Process-pool runner vs the in-process engine.
+# =======================================================
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema.ema_derating_calculator import DeratingEngine
+from source_ema.ema_parallel_runner import PLANT_FIELDS, evaluate_block, pack_plant_table, run_experiments
+from source_ema.ema_uncertainty_model import evaluate_design
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(300, seed=8).to_csv(path, index=False)
+    return DeratingEngine(str(path))
+
+
+def test_runner_matches_engine_batch(engine, tmp_path):
+    T = np.linspace(20.0, 50.0, 257)
+    derated, _ = engine.apply_derating_batch(T)
+    expected = engine.plants.total_mw - derated.sum(axis=1)
+
+    seen = []
+    out = run_experiments(engine, T, n_workers=2, batch_size=40, workdir=str(tmp_path / "work"),
+                          progress=lambda done, total: seen.append((done, total)))
+    np.testing.assert_allclose(out["loss_mw"], expected, rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(out["loss_percent"], 100 * expected / engine.plants.total_mw, rtol=1e-12)
+    assert seen[-1] == (T.size, T.size)
+    design = evaluate_design(engine, {"T_nat": T})
+    np.testing.assert_allclose(design["loss_mw"], out["loss_mw"], rtol=1e-9, atol=1e-9)
+    assert sorted(d for d, _ in seen) == [d for d, _ in seen]
+
+
+def test_evaluate_block_and_packing(engine):
+    table = engine.plant_table()
+    packed = pack_plant_table(table)
+    assert packed.shape == (len(PLANT_FIELDS), table.daya_mw.size)
+
+    T = np.array([25.0, 35.0, 45.0])
+    loss, pct = evaluate_block(packed, T)
+    np.testing.assert_allclose(loss, [engine.evaluate(t)["total_loss_mw"] for t in T], atol=0.005)
+    np.testing.assert_allclose(pct, [engine.evaluate(t)["loss_percent"] for t in T], atol=0.005)
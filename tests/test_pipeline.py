@@ -0,0 +1,108 @@
+# =======================================================
+# test_pipeline.py
+# Stage keys, caching and reruns of the DAG runner and the default
+# EMA pipeline.
+# =======================================================
+
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_inputs
+from source_ema import f_derating_registry as reg
+from source_ema.ema_pipeline import Pipeline, Stage, default_pipeline
+
+
+RUNS = []
+
+
+def copy_upper(inputs, outputs, params):
+    RUNS.append("upper")
+    with open(inputs["src"]) as f, open(outputs["out"], "w") as g:
+        g.write(f.read().upper() + params.get("suffix", ""))
+
+
+def count_chars(inputs, outputs, params):
+    RUNS.append("count")
+    with open(inputs["out"]) as f, open(outputs["n"], "w") as g:
+        g.write(str(len(f.read())))
+
+
+def _toy(tmp_path, suffix=""):
+    src = tmp_path / "src.txt"
+    if not src.exists():
+        src.write_text("abc")
+    stages = [
+        Stage("upper", copy_upper, inputs={"src": str(src)}, outputs={"out": str(tmp_path / "up.txt")},
+              params={"suffix": suffix}),
+        Stage("count", count_chars, outputs={"n": str(tmp_path / "n.txt")}, deps=("upper",)),
+    ]
+    return Pipeline(stages, str(tmp_path / "manifest.json"))
+
+
+@pytest.fixture(autouse=True)
+def _clear_runs():
+    RUNS.clear()
+
+
+def test_reruns_only_what_changed(tmp_path):
+    assert _toy(tmp_path).run() == {"upper": "ran", "count": "ran"}
+    assert _toy(tmp_path).run() == {"upper": "cached", "count": "cached"}
+
+    (tmp_path / "src.txt").write_text("xyz")
+    assert _toy(tmp_path).run() == {"upper": "ran", "count": "ran"}
+    assert (tmp_path / "n.txt").read_text() == "3"
+
+    os.remove(tmp_path / "n.txt")
+    assert _toy(tmp_path).run() == {"upper": "cached", "count": "ran"}
+
+    assert _toy(tmp_path, suffix="!").run(targets=["upper"]) == {"upper": "ran"}
+    # a forced rerun with identical output leaves downstream keys unchanged
+    assert _toy(tmp_path).run(force={"upper"}) == {"upper": "ran", "count": "cached"}
+    assert RUNS.count("count") == 3
+
+
+def test_stage_key_depends_on_params_and_inputs(tmp_path):
+    a = _toy(tmp_path).stage_key("upper")
+    assert _toy(tmp_path).stage_key("upper") == a
+    assert _toy(tmp_path, suffix="!").stage_key("upper") != a
+    (tmp_path / "src.txt").write_text("changed")
+    assert _toy(tmp_path).stage_key("upper") != a
+
+
+def test_invalid_graphs(tmp_path):
+    manifest = str(tmp_path / "m.json")
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", copy_upper), Stage("a", copy_upper)], manifest)
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", copy_upper, deps=("missing",))], manifest)
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", copy_upper, deps=("b",)), Stage("b", copy_upper, deps=("a",))], manifest)
+
+
+def test_default_pipeline_registry_edit_reruns_derating_and_ema(tmp_path, monkeypatch):
+    fleet, overlay = write_inputs(str(tmp_path), 80, 200, 10, 10, 24, seed=8)
+    out_dir = str(tmp_path / "out")
+    make = lambda: default_pipeline(overlay, fleet, out_dir, n_experiments=50, plots=False)
+
+    assert make().run() == {"climate": "ran", "derating": "ran", "ema": "ran"}
+    assert set(make().run().values()) == {"cached"}
+    before = pd.read_csv(os.path.join(out_dir, "ema_experiments.csv"))
+
+    monkeypatch.setattr(reg, "GLOBAL_ALPHA_COAL", reg.GLOBAL_ALPHA_COAL * 2)
+    status = make().run()
+    assert status == {"climate": "cached", "derating": "ran", "ema": "ran"}
+    after = pd.read_csv(os.path.join(out_dir, "ema_experiments.csv"))
+    pd.testing.assert_series_equal(after["T_nat"], before["T_nat"])
+    assert (after["loss_mw"] >= before["loss_mw"]).all()
+    assert (after["loss_mw"] > before["loss_mw"]).any()
+
+
+def test_plots_stage(tmp_path):
+    pytest.importorskip("matplotlib")
+    fleet, overlay = write_inputs(str(tmp_path), 40, 100, 8, 10, 12, seed=9)
+    out_dir = str(tmp_path / "out")
+    status = default_pipeline(overlay, fleet, out_dir, n_experiments=20).run(targets=["plots"])
+    assert status["plots"] == "ran"
+    assert os.path.getsize(os.path.join(out_dir, "ema_loss_plots.png")) > 0
@@ -0,0 +1,85 @@
+# =======================================================
+# test_profiling.py
+# Stages, counters and registry call counting of ema_profiling.
+# =======================================================
+
+import numpy as np
+import pytest
+
+from source_ema import ema_profiling as prof
+from source_ema import f_derating_registry as reg
+
+
+@pytest.fixture
+def profiler():
+    prof.reset()
+    yield prof
+    prof.disable()
+    prof.reset()
+
+
+def test_disabled_records_nothing(profiler):
+    with prof.stage("outer", rows=5):
+        prof.count("x")
+    prof.count_law_evaluations([0, 1], 10)
+    assert prof.report() == {"stages": [], "counters": {}}
+
+
+def test_nested_stages_and_self_time(profiler):
+    prof.enable(registry_calls=False)
+
+    @prof.profiled("inner", rows=lambda r, n: n)
+    def inner(n):
+        return n
+
+    with prof.stage("outer") as s:
+        inner(3)
+        inner(4)
+        s.add_rows(2)
+
+    stages = {s["path"]: s for s in prof.report()["stages"]}
+    assert set(stages) == {"outer", "outer;inner"}
+    assert (stages["outer;inner"]["calls"], stages["outer;inner"]["rows"]) == (2, 7)
+    assert stages["outer"]["rows"] == 2
+    assert stages["outer"]["self_s"] <= stages["outer"]["total_s"]
+    assert [line.split()[0] for line in prof.collapsed().splitlines()] == ["outer", "outer;inner"]
+    assert "inner" in prof.summary()
+
+
+def test_count_law_evaluations(profiler):
+    prof.enable(registry_calls=False)
+    fid = np.array([0, 0, 1, -1])
+    prof.count_law_evaluations(fid, 5)
+    prof.count_law_evaluations(fid, 0)
+    counters = prof.report()["counters"]
+    laws = reg.LINEAR_DERATING_LAWS
+    assert counters == {f"compiled.{laws[0]}": 10, f"compiled.{laws[1]}": 5, "compiled.no_derating": 5}
+
+
+def test_registry_calls_counted_and_restored(profiler):
+    originals = {t: dict(getattr(reg, t)) for t in prof.REGISTRY_TABLES}
+    prof.enable()
+    prof.count_registry_calls()                 # idempotent: no double wrapping
+    reg.DERATING_FUNCTIONS["coal_derating"]([30.0, 35.0], 100.0)
+    reg.DERATING_FUNCTIONS["coal_derating"]([30.0], 100.0)
+    assert prof.report()["counters"] == {"DERATING_FUNCTIONS.coal_derating": 2}
+
+    prof.disable()
+    for table, funcs in originals.items():
+        assert getattr(reg, table) == funcs
+
+
+def test_engine_stages_and_compiled_counters(profiler, tmp_path):
+    from benchmarks.synthetic import synthetic_fleet
+    from source_ema.ema_derating_calculator import DeratingEngine
+
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(40, seed=1).to_csv(path, index=False)
+    prof.enable(registry_calls=False)
+    eng = DeratingEngine(str(path))
+    eng.apply_derating_batch([30.0, 35.0, 40.0])
+
+    rep = prof.report()
+    assert {"engine.map_functions", "engine.derate_batch"} <= {s["stage"] for s in rep["stages"]}
+    compiled = {k: v for k, v in rep["counters"].items() if k.startswith("compiled.")}
+    assert sum(compiled.values()) == 40 * 3
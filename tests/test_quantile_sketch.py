@@ -0,0 +1,80 @@
+# =======================================================
+# test_quantile_sketch.py
+# HistogramSketch quantiles / exceedance vs numpy on the raw values.
+# =======================================================
+
+import numpy as np
+import pytest
+
+from source_ema.ema_quantile_sketch import HistogramSketch
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(5)
+    groups = rng.integers(0, 4, size=20_000)
+    values = rng.normal(30.0 + groups, 3.0)
+    values[::97] = np.nan
+    return groups, values
+
+
+@pytest.mark.parametrize("q", [0, 1, 10, 50, 90, 99.5, 100])
+def test_quantile_within_half_a_bin(data, q):
+    groups, values = data
+    sketch = HistogramSketch(4, resolution=0.01)
+    sketch.update(groups, values)
+    for g in range(4):
+        expected = np.nanpercentile(values[groups == g], q)
+        assert abs(sketch.quantile(q)[g] - expected) <= 0.005 + 1e-9
+
+
+def test_bins_follow_the_data_range(data):
+    groups, values = data
+    sketch = HistogramSketch(4, resolution=0.01)
+    sketch.update(groups, values)
+    span = np.nanmax(values) - np.nanmin(values)
+    assert sketch.n_bins <= span / 0.01 + 2
+    assert sketch.lo <= np.nanmin(values) and sketch.hi > np.nanmax(values)
+
+    # values far outside the current range extend it instead of being clamped
+    sketch.update([0], [120.0])
+    assert sketch.quantile(100)[0] == pytest.approx(120.005)
+
+
+def test_chunked_and_merged_updates_are_exact(data):
+    groups, values = data
+    whole = HistogramSketch(4)
+    whole.update(groups, values)
+
+    # tiny chunks take the sort-and-count path, large ones the bincount path
+    chunked = HistogramSketch(4)
+    for i in range(0, groups.size, 7):
+        chunked.update(groups[i:i + 7], values[i:i + 7])
+    left, right = HistogramSketch(4), HistogramSketch(4)
+    left.update(groups[:10_000], values[:10_000])
+    right.update(groups[10_000:], values[10_000:])
+    left.merge(right)
+    merged = HistogramSketch(0)
+    merged.merge(left)
+
+    for other in (chunked, left, merged):
+        assert other.n_groups == 4
+        a = np.zeros((4, 1 << 16), dtype=np.int64)
+        b = np.zeros_like(a)
+        a[:, whole.first_bin - 1000:whole.first_bin - 1000 + whole.n_bins] = whole.counts
+        b[:, other.first_bin - 1000:other.first_bin - 1000 + other.n_bins] = other.counts
+        np.testing.assert_array_equal(a, b)
+
+    with pytest.raises(ValueError):
+        whole.merge(HistogramSketch(4, resolution=0.1))
+
+
+def test_exceedance_and_empty_groups(data):
+    groups, values = data
+    sketch = HistogramSketch(5, resolution=0.01)
+    sketch.update(groups, values)
+    for g in range(4):
+        v = values[(groups == g) & ~np.isnan(values)]
+        assert sketch.exceedance(31.0)[g] == pytest.approx((v >= 31.0).mean(), abs=1e-3)
+    assert np.isnan(sketch.quantile(50)[4])
+    assert np.isnan(sketch.exceedance(31.0)[4])
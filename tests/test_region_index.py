@@ -0,0 +1,74 @@
+# =======================================================
+# test_region_index.py
+# Integer-coded province hierarchy vs the dict maps in region_maps.
+# =======================================================
+
+import warnings
+
+import numpy as np
+import pytest
+
+from source.region_index import LEVELS, RegionIndex, _level_maps, normalize_name
+from source.region_maps import ISLAND_MAP, SYSTEM_MAP
+
+
+@pytest.fixture(scope="module")
+def index():
+    return RegionIndex(warn=False)
+
+
+def test_codes_and_aliases(index):
+    assert normalize_name("  jawa   barat ") == "JAWA BARAT"
+    assert index.code("DIY") == index.code("daerah istimewa yogyakarta") >= 0
+    assert index.code("Kepri") == index.code("KEPULAUAN RIAU")
+    assert index.codes(["BANTEN", "ATLANTIS", "banten"]).tolist() == [index.code("BANTEN"), -1, index.code("BANTEN")]
+    assert index.unknown(["ATLANTIS", "ACEH", "ATLANTIS", "MORDOR"]) == ["ATLANTIS", "MORDOR"]
+
+
+def test_group_codes_match_region_maps(index):
+    maps = _level_maps()
+    for lvl in LEVELS:
+        for p, code in zip(index.provinces, index.parent[lvl]):
+            expected = maps[lvl].get(p)
+            assert (index.groups[lvl][code] if code >= 0 else None) == expected
+    assert index.group_codes(["BANTEN", "aceh", "DIY", "x"], "island").tolist() == [
+        list(ISLAND_MAP).index("Jawa"), list(ISLAND_MAP).index("Sumatera"), list(ISLAND_MAP).index("Jawa"), -1]
+
+
+def test_aggregate_matches_dict_rollup(index):
+    rng = np.random.default_rng(0)
+    values = rng.uniform(size=(3, len(index.provinces)))
+    values[1, index.code("ACEH")] = np.nan
+    out = index.aggregate(values, "system")
+    assert out.shape == (3, len(SYSTEM_MAP))
+
+    for s, provs in SYSTEM_MAP.items():
+        cols = sorted({index.code(p) for p in provs})    # aliases listed twice count once
+        np.testing.assert_allclose(out[:, index.groups["system"].index(s)], values[:, cols].sum(axis=1))
+    assert np.isnan(out[1, index.groups["system"].index("Sumatera")])
+    assert np.isfinite(np.delete(out[1], index.groups["system"].index("Sumatera"))).all()
+
+    dense = index.matrix("system", sparse=False)
+    np.testing.assert_allclose(values[[0, 2]] @ dense, out[[0, 2]])
+
+
+def test_aggregate_by_name(index):
+    out = index.aggregate_by_name([10.0, 5.0, 2.0, 7.0], ["BANTEN", "jakarta", "ACEH", "ATLANTIS"], "island")
+    assert out[list(ISLAND_MAP).index("Jawa")] == 15.0
+    assert out[list(ISLAND_MAP).index("Sumatera")] == 2.0
+    assert out.sum() == 17.0
+
+
+def test_unmapped_provinces_warn_once():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("default")
+        for _ in range(3):
+            index = RegionIndex()
+    missing = [lvl for lvl in LEVELS if index.unmapped[lvl]]
+    assert missing
+    assert len(caught) == 1
+    assert all(f"'{lvl}'" in str(caught[0].message) for lvl in missing)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        RegionIndex(warn=False)
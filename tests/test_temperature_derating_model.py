@@ -0,0 +1,64 @@
+# =======================================================
+# test_temperature_derating_model.py
+# Lazy entry point: no work at import, each legacy attribute built once.
+# =======================================================
+
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema import ema_temperature_derating_model as entry
+
+
+@pytest.fixture
+def fresh(tmp_path, monkeypatch):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(60, seed=6).to_csv(path, index=False)
+    monkeypatch.setitem(entry.DEFAULT_CONFIG, "rukn_csv", str(path))
+    monkeypatch.setattr(entry, "_LAZY", {})
+
+    loads = []
+    load_engine = entry.load_engine
+
+    def counting_load(config=None):
+        loads.append(config)
+        return load_engine(config)
+
+    monkeypatch.setattr(entry, "load_engine", counting_load)
+    return loads
+
+
+def test_import_does_no_work():
+    code = ("import sys; import source_ema.ema_temperature_derating_model as m; "
+            "assert not m._LAZY and not m.TIMINGS; "
+            "assert 'source_ema.ema_derating_calculator' not in sys.modules; "
+            "assert 'ema_workbench' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=entry._REPO_ROOT)
+
+
+def test_legacy_attributes_built_once(fresh):
+    eng = entry.eng
+    fn = entry.model_function
+    assert entry.eng is eng and entry.model_function is fn
+    assert len(fresh) == 1
+    assert "engine_load_s" in entry.TIMINGS
+
+    out = fn(T_nat_2060=36.0)
+    summary = eng.evaluate(36.0)
+    assert out == {"loss_percent": summary["loss_percent"], "loss_mw": summary["total_loss_mw"]}
+
+
+def test_unknown_attribute(fresh):
+    with pytest.raises(AttributeError):
+        entry.not_a_thing
+    assert not fresh
+
+
+def test_ema_model_reuses_engine(fresh):
+    pytest.importorskip("ema_workbench")
+    eng = entry.eng
+    model = entry.ema_model
+    assert entry.ema_model is model
+    assert len(fresh) == 1 and entry.eng is eng
@@ -0,0 +1,89 @@
+# =======================================================
+# test_timeseries_derating.py
+# Time-resolved fleet capacity and rolling statistics vs per-step
+# engine evaluation and pandas rolling windows.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema.ema_derating_calculator import DeratingEngine, derate_plants, derate_plants_or_full
+from source_ema.ema_timeseries_derating import (
+    CapacitySeries,
+    exceedance_curve,
+    fleet_capacity,
+    rolling_mean,
+    rolling_min,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(120, seed=4).to_csv(path, index=False)
+    return DeratingEngine(str(path))
+
+
+def test_fleet_capacity_matches_engine_and_ignores_chunking(engine):
+    T = np.random.default_rng(0).uniform(20, 45, 50)
+    # evaluate() rounds its totals to 0.01 MW
+    expected = [engine.evaluate(t)["total_after_mw"] for t in T]
+    for chunk_steps in (1, 7, 366):
+        np.testing.assert_allclose(fleet_capacity(engine.plant_table(), T, chunk_steps), expected, atol=0.006)
+
+
+def test_nan_temperature_keeps_full_capacity(engine):
+    table = engine.plant_table()
+    T = np.full((2, table.daya_mw.size), 40.0)
+    T[0, :10] = np.nan
+    out = derate_plants_or_full(table, T)
+    np.testing.assert_array_equal(out[0, :10], table.daya_mw[:10])
+    np.testing.assert_array_equal(out[1], derate_plants(table, T[1]))
+    np.testing.assert_allclose(fleet_capacity(table, T), out.sum(axis=1))
+
+
+def test_rolling_windows_match_pandas():
+    x = np.random.default_rng(1).normal(size=40)
+    s = pd.Series(x)
+    np.testing.assert_allclose(rolling_mean(x, 5), s.rolling(5).mean().dropna())
+    np.testing.assert_allclose(rolling_min(x, 5), s.rolling(5).min().dropna())
+    assert rolling_mean(x, 41).size == rolling_min(x, 41).size == 0
+
+
+def test_exceedance_curve():
+    curve = exceedance_curve([3.0, np.nan, 1.0, 2.0])
+    assert curve["value"].tolist() == [3.0, 2.0, 1.0]
+    np.testing.assert_allclose(curve["exceedance_probability"], [1 / 3, 2 / 3, 1.0])
+
+
+def test_capacity_series_statistics():
+    cs = CapacitySeries([100.0, 90.0, 95.0, 80.0, 99.0], total_mw=100.0, index=list("abcde"))
+    assert cs.worst_step() == ("d", 20.0)
+    assert cs.min_capacity(2) == ("c", 87.5)
+    assert cs.rolling_min_capacity(3).tolist() == [90.0, 80.0, 80.0]
+    exc = cs.exceedance([10.0, 20.0, 21.0])
+    np.testing.assert_allclose(exc["exceedance_probability"], [0.4, 0.2, 0.0])
+
+    summary = cs.summary(n_steps=(1, 2))
+    assert summary["worst_loss_percent"] == 20.0
+    assert summary["min_capacity_2_mw"] == 87.5
+    with pytest.raises(ValueError):
+        CapacitySeries([1.0, 2.0], 2.0, index=["a"])
+
+
+def test_empty_series(engine):
+    cs = CapacitySeries.from_chunks(engine, iter(()))
+    label, worst = cs.worst_step()
+    assert label is None and np.isnan(worst)
+    summary = cs.summary()
+    assert summary["worst_step"] is None
+    assert np.isnan(summary["mean_capacity_mw"]) and np.isnan(summary["min_capacity_1_mw"])
+
+
+def test_from_temperature_uses_current_table(engine):
+    T = np.array([30.0, 41.0])
+    cs = CapacitySeries.from_temperature(engine, T)
+    assert cs.total_mw == engine.plant_table().total_mw
+    np.testing.assert_allclose(cs.loss_mw, [engine.evaluate(t)["total_loss_mw"] for t in T], atol=0.006)
@@ -0,0 +1,91 @@
+# =======================================================
+# test_transmission_rating.py
+# Dynamic line ratings vs the registry list API, system rollups and
+# chunking.
+# =======================================================
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source_ema import f_derating_registry as reg
+from source_ema.ema_asset_derating import UNMAPPED_SYSTEM
+from source_ema.ema_transmission_rating import (
+    STATIC_T_AIR,
+    STATIC_WIND_SPEED,
+    LineRatingEngine,
+    system_of_region,
+)
+
+
+SEGMENTS = pd.DataFrame({
+    "diameter_mm": [28.0, 21.8, 35.1, 28.0],
+    "rated_ampacity_a": [900.0, 650.0, 1200.0, 800.0],
+    "region": ["Jamali", "BANTEN", "ACEH", "ATLANTIS"],
+})
+
+
+@pytest.fixture
+def lines():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return LineRatingEngine(SEGMENTS)
+
+
+def _reference_ratio(v, T, d):
+    q = reg.DERATING_FUNCTIONS["transmission_derating"]([v], [T], d)[0]
+    q0 = reg.DERATING_FUNCTIONS["transmission_derating"]([STATIC_WIND_SPEED], [STATIC_T_AIR], d)[0]
+    return np.sqrt(max(q, 0.0) / q0)
+
+
+def test_system_of_region():
+    assert system_of_region("Jamali") == "Jamali"
+    assert system_of_region("BANTEN") == "Jamali"
+    assert system_of_region("ACEH") == "Sumatera"
+    assert system_of_region("ATLANTIS") == UNMAPPED_SYSTEM
+
+
+def test_static_conditions_give_rated_ampacity(lines):
+    ratio = lines.rating_ratio([STATIC_WIND_SPEED], [STATIC_T_AIR])
+    np.testing.assert_allclose(ratio, 1.0)
+
+
+def test_ratings_match_registry(lines):
+    v = np.array([0.2, 0.61, 2.0, 5.0])
+    T = np.array([42.0, 35.0, 30.0, 25.0])
+    out = lines.dynamic_ratings(v, T)
+    expected = np.array([[_reference_ratio(vi, Ti, d) for d in SEGMENTS["diameter_mm"]] for vi, Ti in zip(v, T)])
+    np.testing.assert_allclose(out["segment_a"].to_numpy(), expected * SEGMENTS["rated_ampacity_a"].to_numpy(), rtol=1e-6)
+    np.testing.assert_allclose(out["segment_loss_percent"].to_numpy(),
+                               np.maximum(0, 100 * (1 - expected)), rtol=1e-5, atol=1e-4)
+
+    # more wind / cooler air -> more ampacity
+    assert (np.diff(out["segment_a"].to_numpy(), axis=0) > 0).all()
+
+
+def test_system_rollup_and_chunking(lines):
+    rng = np.random.default_rng(0)
+    v, T = rng.uniform(0.1, 4.0, 30), rng.uniform(22.0, 40.0, 30)
+    out = lines.dynamic_ratings(v, T, chunk_steps=7)
+    whole = lines.dynamic_ratings(v, T, keep_segments=False)
+    assert set(whole) == {"system_a", "system_loss_percent"}
+    pd.testing.assert_frame_equal(out["system_a"], whole["system_a"])
+
+    seg = out["segment_a"].to_numpy(dtype=float)
+    system = out["system_a"]
+    assert UNMAPPED_SYSTEM in system.columns
+    np.testing.assert_allclose(system["Jamali"], seg[:, 0] + seg[:, 1], rtol=1e-6)
+    np.testing.assert_allclose(system["Sumatera"], seg[:, 2], rtol=1e-6)
+    np.testing.assert_allclose(system[UNMAPPED_SYSTEM], seg[:, 3], rtol=1e-6)
+    assert out["system_loss_percent"]["Khatulistiwa"].isna().all()   # no segments
+
+
+def test_per_segment_weather_and_no_margin(lines):
+    T = np.array([[30.0, 30.0, 30.0, 200.0]])
+    amp = lines.dynamic_ratings(np.full((1, 4), 1.0), T)["segment_a"].to_numpy()
+    assert amp[0, 3] == 0.0 and (amp[0, :3] > 0).all()
+
+    with pytest.raises(ValueError):
+        LineRatingEngine(SEGMENTS.assign(T_conductor=30.0))
@@ -0,0 +1,76 @@
+# =======================================================
+# test_uncertainty_model.py
+# Latin hypercube design and vectorized evaluate_design vs the engine.
+# =======================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_fleet
+from source_ema import ema_uncertainty_model as um
+from source_ema.ema_derating_calculator import DeratingEngine, compile_plant_table
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "fleet.csv"
+    synthetic_fleet(300, seed=4).to_csv(path, index=False)
+    return DeratingEngine(str(path))
+
+
+def test_space_only_has_parameters_of_fleet_laws(engine):
+    names = [name for name, _, _ in um.uncertainty_space(plants=engine)]
+    assert "T_nat" in names and "alpha_coal" in names
+    # no jenis maps to diesel_derating_cummins, so its parameters would be inert
+    assert "T_ref_diesel_cummins" not in names and "m_min_diesel_cummins" not in names
+    assert set(um.fleet_laws(engine)) <= set(um.LINEAR_DERATING_LAWS)
+    assert "T_ref_diesel_cummins" in um.default_coefficient_ranges()
+
+
+def test_latin_hypercube_strata():
+    design = um.latin_hypercube([("a", 0.0, 1.0), ("b", 10.0, 20.0)], 50, seed=1)
+    for col, lo, hi in [("a", 0.0, 1.0), ("b", 10.0, 20.0)]:
+        strata = np.floor((design[col] - lo) / (hi - lo) * 50).astype(int)
+        assert sorted(strata) == list(range(50))
+    pd.testing.assert_frame_equal(design, um.latin_hypercube([("a", 0.0, 1.0), ("b", 10.0, 20.0)], 50, seed=1))
+
+
+def test_temperatures_only_match_engine(engine):
+    T = np.array([24.0, 31.5, 37.0])
+    out = um.evaluate_design(engine, {"T_nat": T})
+    np.testing.assert_allclose(out["loss_mw"], [engine.evaluate(t)["total_loss_mw"] for t in T], atol=0.005)
+
+
+def test_coefficient_experiments_match_recompiled_tables(engine):
+    design = pd.DataFrame({
+        "alpha_coal": [0.002, 0.006],
+        "T_ref_ocgt": [14.0, 18.0],
+        "epsilon": [0.003, 0.005],
+        "altitude_m": [0.0, 400.0],
+        "T_nat": [33.0, 36.0],
+    })
+    out = um.evaluate_design(engine, design)
+    for i, row in design.iterrows():
+        params = row.drop("T_nat").to_dict()
+        table = compile_plant_table(engine.df, params)
+        loss = table.total_mw - (table.daya_mw * um.linear_multiplier(
+            row["T_nat"], *(getattr(table, k) for k in um.COEFFICIENT_FIELDS))).sum()
+        assert out["loss_mw"][i] == pytest.approx(loss, rel=1e-12)
+
+
+def test_island_temperatures_are_capacity_share_weighted(engine):
+    shares = {"Sumatera": 0.25, "Jawa": 0.75}
+    design = {um.island_parameter("Sumatera"): [30.0, 40.0], um.island_parameter("Jawa"): [35.0, 28.0]}
+    out = um.evaluate_design(engine, design, shares)
+    single = um.evaluate_design(engine, {"T_nat": [30.0, 40.0, 35.0, 28.0]})["loss_mw"].to_numpy()
+    np.testing.assert_allclose(out["loss_mw"], [0.25 * single[0] + 0.75 * single[2],
+                                                0.25 * single[1] + 0.75 * single[3]], rtol=1e-12)
+
+
+def test_run_lhs_is_reproducible(engine):
+    d1, o1 = um.run_lhs(engine, 40, seed=9)
+    d2, o2 = um.run_lhs(engine, 40, seed=9)
+    pd.testing.assert_frame_equal(d1, d2)
+    pd.testing.assert_frame_equal(o1, o2)
+    assert list(d1.columns) == [name for name, _, _ in um.uncertainty_space(plants=engine)]